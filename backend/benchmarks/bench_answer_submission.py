@@ -0,0 +1,121 @@
+import time
+from benchmarks.fake_supabase import FakeSupabase
+from services import answer_service
+from services.answer_service import Answer, AnswerPrefetch
+
+# compares the per-answer persistence path (select retry, select question,
+# select existing, write) with prefetch + one upsert_answers rpc
+# run from backend/: python -m benchmarks.bench_answer_submission
+
+USER_ID = "bench-user"
+LATENCY = 0.02
+
+
+def make_client(n):
+    client = FakeSupabase(latency=LATENCY)
+    client.tables["Question"] = [
+        {
+            "questionID": qid,
+            "questionText": f"question {qid}",
+            "correctAnswer": "a",
+            "constraints": "",
+            "avgTimeSeconds": 60
+        }
+        for qid in range(1, n + 1)
+    ]
+
+    def upsert_answers(params):
+        rows = client.tables.setdefault("Answer", [])
+        stored = []
+        for row in params["p_answers"]:
+            existing = next((r for r in rows if r["userID"] == row["userID"] and r["questionID"] == row["questionID"]), None)
+            if existing:
+                existing.update(row, retry=existing["retry"] + 1)
+            else:
+                existing = dict(row, retry=0, answerID=len(rows) + 1)
+                rows.append(existing)
+            points = max(0, row["Points"] - existing["retry"])
+            existing["Points"] = points
+            stored.append({"questionID": existing["questionID"], "retry": existing["retry"], "Points": points})
+        return stored
+
+    client.rpc_handlers["upsert_answers"] = upsert_answers
+    return client
+
+
+def make_entries(n):
+    now = int(time.time())
+    return [
+        {"questionId": qid, "questionTypeId": 1, "userAnswer": "b", "startTime": now - 30, "endTime": now}
+        for qid in range(1, n + 1)
+    ]
+
+
+def validate(ans):
+    # how an answer used to be graded on its own, before grade_all
+    if not ans.resolve_locally():
+        started = time.perf_counter()
+        ans.store_verdict(ans.remote_verdict(), time.perf_counter() - started)
+
+
+def persist(ans):
+    # the old single-answer save: look the row up, then update or insert it
+    client = answer_service.supabase_client
+    res = client.table("Answer") \
+        .select("answerID") \
+        .eq("userID", ans.user_id) \
+        .eq("questionID", ans.question_id) \
+        .maybe_single() \
+        .execute()
+    existing = res.data if res and hasattr(res, "data") else None
+
+    payload = ans.to_row()
+    payload["Points"] = ans.points
+    ans.log_analysis()
+    if existing:
+        client.table("Answer").update(payload, count="exact").eq("answerID", existing["answerID"]).execute()
+    else:
+        payload["retry"] = 0
+        client.table("Answer").insert([payload], count="exact").execute()
+
+
+def per_answer(entries):
+    for entry in entries:
+        ans = Answer(entry, USER_ID, 1)
+        validate(ans)
+        persist(ans)
+
+
+def batched(entries):
+    prefetch = AnswerPrefetch.load(USER_ID, [e["questionId"] for e in entries])
+    answers = [Answer(entry, USER_ID, 1, prefetch) for entry in entries]
+    for ans in answers:
+        ans.resolve_locally()
+    Answer.persist_all(answers)
+
+
+def measure(label, fn, n):
+    client = make_client(n)
+    answer_service.supabase_client = client
+    entries = make_entries(n)
+
+    # first submission inserts, second one hits the retry path
+    fn(entries)
+    client.reset()
+    start = time.perf_counter()
+    fn(entries)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} answers={n:<3} round_trips={client.round_trips:<4} latency={elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    import contextlib
+    import io
+
+    print(f"simulated postgrest round-trip: {LATENCY * 1000:.0f} ms")
+    for n in (5, 20):
+        # saving prints an analysis block per answer, keep the table readable
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            measure("before", per_answer, n)
+            measure("after", batched, n)
+        print("\n".join(line for line in out.getvalue().splitlines() if line.startswith(("before", "after"))))
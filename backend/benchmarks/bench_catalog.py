@@ -0,0 +1,50 @@
+import time
+from flask import Flask
+from benchmarks.fake_supabase import FakeSupabase
+from routes.course_route import course_bp
+from services import course_service
+from services.course_service import catalog
+
+# requests/second on GET /api/courses: rebuilt every request (the old path),
+# served from the snapshot, and revalidated with If-None-Match (a 304)
+# run from backend/: python -m benchmarks.bench_catalog
+
+LATENCY = 0.02
+SECONDS = 2.0
+
+
+def make_client():
+    client = FakeSupabase(latency=LATENCY)
+    client.tables["RefUnit"] = [
+        {"unitID": u, "unitName": f"Unit {u}", "unitDescription": "An introduction to the topics of unit " * 3,
+         "RefSubUnit": [{"subUnitID": u * 100 + s, "subUnitName": f"Subunit {u}.{s}"} for s in range(1, 9)]}
+        for u in range(1, 13)
+    ]
+    return client
+
+
+def measure(name, http, before=None, headers=None):
+    done = 0
+    sent = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < SECONDS:
+        if before:
+            before()
+        response = http.get("/api/courses", headers=headers or {})
+        sent += len(response.data)
+        done += 1
+    elapsed = time.perf_counter() - start
+    print(f"{name:<12} status={response.status_code}  requests/s={done / elapsed:8.1f}  bytes/response={sent // done}")
+
+
+if __name__ == "__main__":
+    course_service.supabase_client = make_client()
+    app = Flask(__name__)
+    app.register_blueprint(course_bp, url_prefix="/api")
+    http = app.test_client()
+
+    print(f"simulated round trip: {LATENCY * 1000:.0f} ms")
+    measure("uncached", http, before=catalog.invalidate)
+    measure("snapshot", http)
+    etag = http.get("/api/courses").headers["ETag"]
+    measure("revalidated", http, headers={"If-None-Match": etag})
@@ -0,0 +1,45 @@
+import os
+import time
+from services.code_runner import CodeRunner
+
+# answers/second through the sandboxed runner as the worker count grows
+# run from backend/: python -m benchmarks.bench_code_runner
+
+ANSWER = """
+def add(a, b):
+    return a + b
+
+x = int(input())
+y = int(input())
+print(add(x, y))
+"""
+
+TEST_CASES = [
+    {"stdin": "2\n3\n", "expected_output": "5", "assertion": ""},
+    {"stdin": "-1\n1\n", "expected_output": "0", "assertion": ""},
+    {"stdin": "0\n0\n", "expected_output": "", "assertion": "assert add(10, 5) == 15"},
+]
+
+ANSWERS = 50
+
+
+def measure(workers):
+    runner = CodeRunner(workers=workers)
+    runner.available()  # isolation probe happens before the clock, like in the app
+    start = time.perf_counter()
+    futures = [runner.submit(ANSWER, TEST_CASES) for _ in range(ANSWERS)]
+    results = [future.result(timeout=runner.timeout(TEST_CASES) * ANSWERS) for future in futures]
+    elapsed = time.perf_counter() - start
+    runner.shutdown()
+
+    assert all(r["passed"] for answer in results for r in answer)
+    print(f"workers={workers:<3} answers={ANSWERS} tests/answer={len(TEST_CASES)} "
+          f"time={elapsed:6.2f} s  answers/s={ANSWERS / elapsed:8.1f}")
+
+
+if __name__ == "__main__":
+    cores = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, cores})
+    for workers in counts:
+        if workers <= cores:
+            measure(workers)
@@ -0,0 +1,68 @@
+import random
+import statistics
+import time
+from services.duplicate_index import DuplicateIndex
+
+# cost of the near-duplicate check as a subunit's question bank grows, plus how
+# often a reworded copy is caught and an unrelated question is wrongly rejected.
+# questions are random sentences with a code snippet, fully offline
+# run from backend/: python -m benchmarks.bench_duplicate_index
+
+LOOKUPS = 500
+WORDS = [f"w{i}" for i in range(3000)]
+NAMES = ["x", "y", "total", "items", "result", "count", "i", "n", "values", "key"]
+
+
+def question(rng):
+    sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(12, 25)))
+    a, b = rng.sample(NAMES, 2)
+    code = f"for {a} in range({rng.randint(1, 99)}):\n    {b} = {b} + {a} * {rng.randint(2, 9)}\nprint({b})"
+    return {"questionText": f"{sentence}?\n{code}", "correctAnswer": str(rng.randint(0, 9999))}
+
+
+def reword(row, rng):
+    # swaps a couple of words, the kind of rewording gemini does
+    words = row["questionText"].split(" ")
+    for _ in range(2):
+        words[rng.randrange(len(words))] = rng.choice(WORDS)
+    return " ".join(words), row["correctAnswer"]
+
+
+def measure(size):
+    rng = random.Random(size)
+    bank = [dict(question(rng), questionID=n) for n in range(size)]
+    index = DuplicateIndex(load=lambda lesson_id: bank)
+
+    start = time.perf_counter()
+    index.index(1)
+    load_s = time.perf_counter() - start
+
+    lookup_ms = []
+    caught = 0
+    for _ in range(LOOKUPS):
+        text, answer = reword(rng.choice(bank), rng)
+        t = time.perf_counter()
+        claim = index.claim(1, text, answer)
+        lookup_ms.append((time.perf_counter() - t) * 1000)
+        if claim is None:
+            caught += 1
+        else:
+            index.release(claim)
+
+    rejected = 0
+    for _ in range(LOOKUPS):
+        fresh = question(rng)
+        claim = index.claim(1, fresh["questionText"], fresh["correctAnswer"])
+        if claim is None:
+            rejected += 1
+        else:
+            index.release(claim)
+
+    p99 = sorted(lookup_ms)[int(len(lookup_ms) * 0.99) - 1]
+    print(f"bank={size:<6} load={load_s:6.2f} s  lookup p50={statistics.median(lookup_ms):5.3f} ms "
+          f"p99={p99:5.3f} ms  reworded caught={caught / LOOKUPS:6.1%}  new rejected={rejected / LOOKUPS:5.1%}")
+
+
+if __name__ == "__main__":
+    for size in (100, 1000, 10000):
+        measure(size)
@@ -0,0 +1,61 @@
+import os
+import statistics
+import tempfile
+import time
+from services.grading_queue import GradingQueue, make_job_store
+
+# enqueue latency and jobs/second through the grading queue as the worker count
+# grows, grading is a sleep standing in for gemini so it runs fully offline
+# run from backend/: python -m benchmarks.bench_grading_queue [sqlite|memory]
+
+JOBS = 100
+GRADING_SECONDS = 0.1
+
+
+def grade(job, job_id):
+    time.sleep(GRADING_SECONDS)
+    return {"results": [{"questionId": a["questionId"], "isCorrect": True, "points": 5} for a in job["answers"]]}
+
+
+def payload(n):
+    return {
+        "userId": "bench-user",
+        "answers": [{"questionId": q, "questionTypeId": 1, "userAnswer": "a"} for q in range(1, 6)],
+        "skillLevel": "beginner",
+        "n": n,
+    }
+
+
+def measure(backend, workers, directory):
+    store = make_job_store(backend, os.path.join(directory, f"jobs-{workers}.sqlite3"))
+    queue = GradingQueue(store, grade, workers=workers, poll_seconds=0.05)
+    queue.start()
+
+    enqueue_ms = []
+    start = time.perf_counter()
+    job_ids = []
+    for n in range(JOBS):
+        t = time.perf_counter()
+        job_ids.append(queue.submit("bench-user", payload(n)))
+        enqueue_ms.append((time.perf_counter() - t) * 1000)
+
+    pending = list(job_ids)
+    while pending:
+        pending = [job_id for job_id in pending if queue.status(job_id)["status"] != "done"]
+        if pending:
+            time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+
+    p99 = sorted(enqueue_ms)[int(len(enqueue_ms) * 0.99) - 1]
+    print(f"{backend:<7} workers={workers:<3} jobs={JOBS} enqueue p50={statistics.median(enqueue_ms):6.2f} ms "
+          f"p99={p99:6.2f} ms  time={elapsed:6.2f} s  jobs/s={JOBS / elapsed:7.1f}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    backend = sys.argv[1] if len(sys.argv) > 1 else "sqlite"
+    print(f"simulated grading time per job: {GRADING_SECONDS * 1000:.0f} ms")
+    with tempfile.TemporaryDirectory() as directory:
+        for workers in (1, 2, 4, 8):
+            measure(backend, workers, directory)
@@ -0,0 +1,66 @@
+import json
+import timeit
+from datetime import datetime, timezone
+from uuid import uuid4
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from benchmarks.bench_catalog import make_client as make_catalog_client
+from utils.compression import ENCODINGS, FAST_LEVELS, compress
+from utils.json_provider import OrjsonProvider, orjson
+
+# serialization time with flask's json against orjson, and what gzip/brotli
+# save, for a get_questions page, the get_courses catalog and a submission result
+# run from backend/: python -m benchmarks.bench_json
+
+RUNS = 2000
+
+
+def questions_page():
+    code = "def total(items):\n    result = 0\n    for item in items:\n        result += item['price'] * item['qty']\n    return result\n"
+    return [
+        {"questionID": 1000 + n, "questionTypeID": n % 4 + 1, "skilllevel": 2, "avgTimeSeconds": 120,
+         "questionText": f"What does this function return for the list below? ({n})\n```python\n{code}```",
+         "correctAnswer": json.dumps({"answer": f"{n * 7}", "explanation": "Each item's price times its quantity is summed."}),
+         "options": {"a": f"{n * 7}", "b": f"{n * 7 + 1}", "c": "0", "d": "It raises a KeyError"},
+         "constraints": "Do not use sum() or list comprehensions."}
+        for n in range(5)
+    ]
+
+
+def submission_result():
+    now = datetime.now(timezone.utc)
+    return {
+        "results": [
+            {"questionId": n, "isCorrect": n % 2 == 0, "points": 5 * n, "retry": 1, "gradedAt": now,
+             "feedback": "Close, but the loop skips the last element of the list."}
+            for n in range(10)
+        ],
+        "jobId": uuid4(),
+        "totalPoints": 125
+    }
+
+
+def measure(name, data, app):
+    default = DefaultJSONProvider(app)
+    fast = OrjsonProvider(app) if orjson is not None else None
+    with app.app_context():
+        body = default.response(data).get_data()
+        default_us = timeit.timeit(lambda: default.response(data), number=RUNS) / RUNS * 1e6
+        line = f"{name:<18} {len(body):>7} B  flask json {default_us:7.1f} us"
+        if fast is not None:
+            fast_us = timeit.timeit(lambda: fast.response(data), number=RUNS) / RUNS * 1e6
+            line += f"  orjson {fast_us:6.1f} us ({default_us / fast_us:4.1f}x)"
+    for encoding in ENCODINGS:
+        compressed = compress(body, encoding, FAST_LEVELS[encoding])
+        encode_us = timeit.timeit(lambda: compress(body, encoding, FAST_LEVELS[encoding]), number=RUNS // 10) / (RUNS // 10) * 1e6
+        line += f"  {encoding} {len(compressed):>6} B ({len(compressed) / len(body):4.0%}) in {encode_us:6.1f} us"
+    print(line)
+
+
+if __name__ == "__main__":
+    app = Flask(__name__)
+    if orjson is None:
+        print("orjson isnt installed, only flask json is measured")
+    measure("get_questions", questions_page(), app)
+    measure("get_courses", make_catalog_client().tables["RefUnit"], app)
+    measure("submit-answers", submission_result(), app)
@@ -0,0 +1,58 @@
+import time
+from benchmarks.fake_supabase import FakeSupabase
+from services import question_service
+from services.question_service import Questions
+
+# compares saving a generated batch one row at a time (Questions.persist per
+# question) with one Questions.persist_batch insert
+# run from backend/: python -m benchmarks.bench_question_insert
+
+LATENCY = 0.02
+RUNS = 5
+
+
+def make_batch(n):
+    return [
+        Questions(
+            question_type_id=1,
+            lesson_id=1,
+            correct_answer="a",
+            question_text=f"question {i}",
+            options={"a": "yes", "b": "no"},
+            tags=["bench"],
+            constraints="",
+            generated=True,
+            skilllevel=1,
+            avgTimeSeconds=60
+        )
+        for i in range(n)
+    ]
+
+
+def per_row(batch):
+    return [Questions.persist(question)["data"][0]["questionID"] for question in batch]
+
+
+def bulk(batch):
+    return [row["questionID"] for row in Questions.persist_batch(batch)["data"]]
+
+
+def measure(name, save, n):
+    client = FakeSupabase(latency=LATENCY)
+    question_service.supabase_client = client
+    batch = make_batch(n)
+
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        ids = save(batch)
+    elapsed = (time.perf_counter() - start) / RUNS
+
+    assert len(ids) == n
+    print(f"{name:<8} questions={n:<3} {elapsed * 1000:8.1f} ms per batch  round trips={client.round_trips // RUNS}")
+
+
+if __name__ == "__main__":
+    print(f"simulated round trip: {LATENCY * 1000:.0f} ms")
+    for n in (3, 5, 11):
+        measure("per-row", per_row, n)
+        measure("bulk", bulk, n)
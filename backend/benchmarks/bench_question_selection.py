@@ -0,0 +1,90 @@
+import statistics
+import time
+from benchmarks.fake_supabase import FakeSupabase
+from services import question_service
+from services.question_service import Questions, question_sets
+
+# subunit page load by skill level (2 to 4 question types): one select per type,
+# as get_questions used to do, against the select_questions rpc and the cached set
+# run from backend/: python -m benchmarks.bench_question_selection
+
+LATENCY = 0.02
+LOADS = 20
+LESSON_ID = 1
+
+
+def make_client():
+    client = FakeSupabase(latency=LATENCY)
+    client.tables["Question"] = [
+        {"questionID": n, "lessonID": LESSON_ID, "questionTypeID": n % 4 + 1, "generated": True,
+         "questionText": f"question {n}", "correctAnswer": "a", "options": {}, "constraints": "",
+         "skilllevel": 1, "avgTimeSeconds": 60}
+        for n in range(1, 201)
+    ]
+
+    def select_questions(params):
+        limits = {int(k): v for k, v in params["p_limits"].items()}
+        taken = {q_type: 0 for q_type in limits}
+        rows = []
+        for row in reversed(client.tables["Question"]):
+            q_type = row["questionTypeID"]
+            if row["lessonID"] == params["p_lesson_id"] and q_type in limits and taken[q_type] < limits[q_type] \
+                    and row["questionID"] not in params["p_exclude"]:
+                taken[q_type] += 1
+                rows.append(row)
+        return rows
+
+    client.rpc_handlers["select_questions"] = select_questions
+    return client
+
+
+def per_type(skill_level):
+    questions = []
+    for q_type, limit in Questions.TYPE_LIMITS[skill_level].items():
+        response = (
+            question_service.supabase_client.table("Question")
+            .select(", ".join(Questions.CLIENT_FIELDS))
+            .eq("lessonID", LESSON_ID)
+            .eq("questionTypeID", q_type)
+            .eq("generated", True)
+            .order("created_at", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        questions.extend(response.data)
+    return questions
+
+
+def single_query(skill_level):
+    return Questions.fetch_question_set(LESSON_ID, Questions.TYPE_LIMITS[skill_level])
+
+
+def cached(skill_level):
+    return Questions.get_questions(LESSON_ID, {"chosenSkillLevel": skill_level})[0]
+
+
+def measure(name, load, skill_level):
+    client = make_client()
+    question_service.supabase_client = client
+    question_sets.clear()
+
+    load_ms = []
+    for _ in range(LOADS):
+        start = time.perf_counter()
+        load(skill_level)
+        load_ms.append((time.perf_counter() - start) * 1000)
+
+    p99 = sorted(load_ms)[int(len(load_ms) * 0.99) - 1]
+    types = len(Questions.TYPE_LIMITS[skill_level])
+    print(f"{name:<13} skill={skill_level} types={types}  p50={statistics.median(load_ms):6.1f} ms  "
+          f"p99={p99:6.1f} ms  round trips per load={client.round_trips / LOADS:4.2f}")
+
+
+if __name__ == "__main__":
+    # the pool would refill from gemini on every page load
+    question_service.question_pool = None
+    print(f"simulated round trip: {LATENCY * 1000:.0f} ms, {LOADS} loads each")
+    for skill_level in (3, 1, 2):
+        measure("per-type", per_type, skill_level)
+        measure("single query", single_query, skill_level)
+        measure("cached", cached, skill_level)
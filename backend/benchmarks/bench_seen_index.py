@@ -0,0 +1,50 @@
+import random
+import statistics
+import time
+from services.seen_index import SeenIndex
+from services.question_service import Questions
+
+# memory per active user in the seen-question index and the cost of picking a
+# page that skips answered questions, for light to very heavy users
+# run from backend/: python -m benchmarks.bench_seen_index
+
+USERS = 200
+LESSONS = 40
+PICKS = 2000
+
+
+def answers(rng, count):
+    return [{"questionID": rng.randrange(1, 200000), "lessonID": rng.randrange(1, LESSONS + 1)} for _ in range(count)]
+
+
+def candidates(lesson_id, type_limits):
+    rows = []
+    for q_type, limit in type_limits.items():
+        rows.extend({"questionID": lesson_id * 1000 + q_type * 100 + n, "questionTypeID": q_type} for n in range(limit * 4))
+    return rows
+
+
+def measure(answered):
+    rng = random.Random(answered)
+    history = {user_id: answers(rng, answered) for user_id in range(USERS)}
+    index = SeenIndex(load=history.__getitem__)
+    for user_id in range(USERS):
+        index.lessons(user_id)
+    stats = index.cache.stats()
+
+    type_limits = Questions.TYPE_LIMITS[2]
+    pool = candidates(7, type_limits)
+    pick_us = []
+    for _ in range(PICKS):
+        user_id = rng.randrange(USERS)
+        start = time.perf_counter()
+        Questions.pick(pool, type_limits, index.seen(user_id, 7))
+        pick_us.append((time.perf_counter() - start) * 1e6)
+
+    print(f"answers/user={answered:<5} users={stats['entries']}  bytes/user={stats['bytes'] / stats['entries']:9.0f}  "
+          f"pick p50={statistics.median(pick_us):5.1f} us")
+
+
+if __name__ == "__main__":
+    for answered in (50, 500, 5000):
+        measure(answered)
@@ -0,0 +1,64 @@
+import json
+import time
+from flask import Flask
+from benchmarks.fake_supabase import FakeSupabase
+from routes.subunit_route import subunit_bp
+from services import subunit_service
+from services.subunit_service import content_store
+
+# GET /api/subunit/<id> for a large lesson: the old path (fetch, parse, serialize
+# every request) against the content store, plain and precompressed, and a 304
+# run from backend/: python -m benchmarks.bench_subunit_content
+
+LATENCY = 0.02
+SECONDS = 2.0
+SUBUNIT_ID = 1
+
+
+def make_client():
+    client = FakeSupabase(latency=LATENCY)
+    content = {
+        "title": "Loops",
+        "sections": [
+            {"heading": f"Section {n}", "body": "A for loop repeats its body once for every item in a sequence. " * 40,
+             "example": f"for i in range({n}):\n    print(i * {n})\n"}
+            for n in range(1, 41)
+        ]
+    }
+    # stored double-encoded, the way add_subunit writes it
+    client.tables["RefSubUnit"] = [
+        {"subUnitID": SUBUNIT_ID, "subUnitName": "Loops", "subUnitContent": json.dumps(content)}
+    ]
+    return client
+
+
+def measure(name, http, before=None, headers=None):
+    done = 0
+    sent = 0
+    cpu = time.process_time()
+    start = time.perf_counter()
+    while time.perf_counter() - start < SECONDS:
+        if before:
+            before()
+        response = http.get(f"/api/subunit/{SUBUNIT_ID}", headers=headers or {})
+        sent += len(response.data)
+        done += 1
+    elapsed = time.perf_counter() - start
+    cpu_ms = (time.process_time() - cpu) * 1000 / done
+    print(f"{name:<16} status={response.status_code} encoding={response.headers.get('Content-Encoding', '-'):<5} "
+          f"requests/s={done / elapsed:8.1f}  cpu/request={cpu_ms:6.3f} ms  bytes/response={sent // done}")
+
+
+if __name__ == "__main__":
+    subunit_service.supabase_client = make_client()
+    app = Flask(__name__)
+    app.register_blueprint(subunit_bp, url_prefix="/api")
+    http = app.test_client()
+
+    print(f"simulated round trip: {LATENCY * 1000:.0f} ms")
+    measure("uncached", http, before=lambda: content_store.invalidate(SUBUNIT_ID))
+    measure("cached", http)
+    measure("cached gzip", http, headers={"Accept-Encoding": "gzip"})
+    measure("cached br", http, headers={"Accept-Encoding": "br, gzip"})
+    etag = http.get(f"/api/subunit/{SUBUNIT_ID}", headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+    measure("revalidated gzip", http, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
@@ -0,0 +1,150 @@
+import time
+import threading
+
+# stand-in for supabase_client that answers every query from memory after a
+# fixed sleep, so benchmarks measure round-trips rather than a live database
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+        self.count = len(data) if isinstance(data, list) else None
+
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.op = "select"
+        self.payload = None
+        self.filters = {}
+        self.in_filters = {}
+        self.single_row = False
+        self.limit_rows = None
+        self.range_rows = None
+
+    def select(self, *columns, **kwargs):
+        self.op = "select"
+        return self
+
+    def insert(self, payload, **kwargs):
+        self.op = "insert"
+        self.payload = payload
+        return self
+
+    def update(self, payload, **kwargs):
+        self.op = "update"
+        self.payload = payload
+        return self
+
+    def upsert(self, payload, **kwargs):
+        self.op = "upsert"
+        self.payload = payload
+        return self
+
+    def delete(self, **kwargs):
+        self.op = "delete"
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def in_(self, column, values):
+        self.in_filters[column] = list(values)
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def limit(self, n):
+        self.limit_rows = n
+        return self
+
+    def range(self, start, end):
+        self.range_rows = (start, end)
+        return self
+
+    def single(self):
+        self.single_row = True
+        return self
+
+    def maybe_single(self):
+        self.single_row = True
+        return self
+
+    def execute(self):
+        self.client.round_trip()
+        rows = self.client.handle(self)
+        if self.single_row:
+            return FakeResponse(rows[0] if rows else None)
+        return FakeResponse(rows)
+
+
+class FakeRpc:
+    def __init__(self, client, name, params):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self):
+        self.client.round_trip()
+        handler = self.client.rpc_handlers.get(self.name)
+        return FakeResponse(handler(self.params) if handler else [])
+
+
+class FakeSupabase:
+    def __init__(self, latency=0.02):
+        self.latency = latency
+        self.round_trips = 0
+        self.tables = {}
+        self.rpc_handlers = {}
+        self.lock = threading.Lock()
+
+    def round_trip(self):
+        with self.lock:
+            self.round_trips += 1
+        time.sleep(self.latency)
+
+    def reset(self):
+        self.round_trips = 0
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, name, params=None):
+        return FakeRpc(self, name, params or {})
+
+    def handle(self, query):
+        rows = self.tables.setdefault(query.table, [])
+
+        if query.op in ("insert", "upsert"):
+            payload = query.payload if isinstance(query.payload, list) else [query.payload]
+            created = []
+            for row in payload:
+                row = dict(row)
+                row.setdefault(f"{query.table.lower()}ID", len(rows) + 1)
+                rows.append(row)
+                created.append(row)
+            return created
+
+        matched = [
+            row for row in rows
+            if all(row.get(k) == v for k, v in query.filters.items())
+            and all(row.get(k) in v for k, v in query.in_filters.items())
+        ]
+
+        if query.op == "update":
+            for row in matched:
+                row.update(query.payload)
+        elif query.op == "delete":
+            for row in matched:
+                rows.remove(row)
+
+        if query.range_rows is not None:
+            matched = matched[query.range_rows[0]:query.range_rows[1] + 1]
+        if query.limit_rows is not None:
+            matched = matched[:query.limit_rows]
+        return matched
@@ -13,3 +13,117 @@ if not SUPABASE_URL or not SUPABASE_KEY:
 
 # Initialize Client
 supabase_client = supabase.create_client(SUPABASE_URL, SUPABASE_KEY)
+
+def _named_values(name, cast):
+    # "a=1,b=2" env vars, for settings that can be overridden per operation or type
+    return {
+        key.strip(): cast(value)
+        for key, _, value in (item.partition("=") for item in os.getenv(name, "").split(",") if "=" in item)
+    }
+
+# answer grading: how many answers are graded at once (1 = sequential) and
+# how long a whole submission may spend grading before unfinished answers fail
+GRADING_MAX_WORKERS = int(os.getenv("GRADING_MAX_WORKERS", "5"))
+GRADING_DEADLINE_SECONDS = float(os.getenv("GRADING_DEADLINE_SECONDS", "45"))
+
+# sandboxed runner for coding answers, limits apply to each test case run
+CODE_RUNNER_WORKERS = int(os.getenv("CODE_RUNNER_WORKERS", "0")) or os.cpu_count() or 1
+CODE_RUNNER_CPU_SECONDS = int(os.getenv("CODE_RUNNER_CPU_SECONDS", "2"))
+CODE_RUNNER_MEMORY_MB = int(os.getenv("CODE_RUNNER_MEMORY_MB", "256"))
+CODE_RUNNER_WALL_SECONDS = float(os.getenv("CODE_RUNNER_WALL_SECONDS", "5"))
+# an answer waiting longer than this for a free runner is graded by gemini instead
+CODE_RUNNER_QUEUE_SECONDS = float(os.getenv("CODE_RUNNER_QUEUE_SECONDS", "10"))
+# "auto" runs each test in new namespaces when unshare works, "none" without them,
+# anything else is a command prefix the child is started under (e.g. an nsjail call)
+CODE_RUNNER_ISOLATION = os.getenv("CODE_RUNNER_ISOLATION", "auto")
+
+# graded verdicts reused when a student resubmits the same answer
+VERDICT_CACHE_MAX_ENTRIES = int(os.getenv("VERDICT_CACHE_MAX_ENTRIES", "5000"))
+VERDICT_CACHE_TTL_SECONDS = float(os.getenv("VERDICT_CACHE_TTL_SECONDS", "3600"))
+VERDICT_CACHE_MAX_BYTES = int(os.getenv("VERDICT_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# grade all open-ended answers of a submission with one gemini call (0 = one call each)
+BATCH_GRADING = os.getenv("BATCH_GRADING", "1") == "1"
+
+# async grading: submit-answers with "Prefer: respond-async" queues a job instead of
+# grading in the request. sqlite keeps queued jobs across restarts, memory does not
+GRADING_QUEUE_BACKEND = os.getenv("GRADING_QUEUE_BACKEND", "sqlite")
+GRADING_QUEUE_PATH = os.getenv(
+    "GRADING_QUEUE_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "grading_jobs.sqlite3")
+)
+GRADING_QUEUE_WORKERS = int(os.getenv("GRADING_QUEUE_WORKERS", "2"))
+GRADING_QUEUE_POLL_SECONDS = float(os.getenv("GRADING_QUEUE_POLL_SECONDS", "1"))
+GRADING_QUEUE_RETENTION_SECONDS = float(os.getenv("GRADING_QUEUE_RETENTION_SECONDS", "86400"))
+# a running job whose worker stopped renewing it for this long goes to another worker
+GRADING_QUEUE_LEASE_SECONDS = float(os.getenv("GRADING_QUEUE_LEASE_SECONDS", "60"))
+# the dev server (python main.py) grades queued jobs itself, under gunicorn run
+# python grading_worker.py next to it instead
+GRADING_QUEUE_EMBEDDED = os.getenv("GRADING_QUEUE_EMBEDDED", "1") == "1"
+
+# Idempotency-Key on submit-answers: responses are kept this long per user and key,
+# a duplicate sent while the first is grading waits up to the grading deadline
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+
+# gemini calls (llm_gateway.py): calls in flight overall and per prompt, per-prompt
+# overrides as "check_batch=2,generate_coding=3", retries on 429/5xx and dropped connections
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_OPERATION_CONCURRENCY = int(os.getenv("LLM_OPERATION_CONCURRENCY", "4"))
+LLM_OPERATION_LIMITS = _named_values("LLM_OPERATION_LIMITS", int)
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+LLM_BACKOFF_SECONDS = float(os.getenv("LLM_BACKOFF_SECONDS", "0.5"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "30"))
+
+# question generation: the four types are generated at once, each type gets its
+# own deadline, per-type overrides as "coding=90,mcq=30"
+GENERATION_MAX_WORKERS = int(os.getenv("GENERATION_MAX_WORKERS", "8"))
+GENERATION_TIMEOUT_SECONDS = float(os.getenv("GENERATION_TIMEOUT_SECONDS", "60"))
+GENERATION_TYPE_TIMEOUTS = _named_values("GENERATION_TYPE_TIMEOUTS", float)
+# identical generate requests share one generation, and for this long after it
+# finishes they get its questions instead of starting another
+GENERATION_FRESH_SECONDS = float(os.getenv("GENERATION_FRESH_SECONDS", "30"))
+
+# warm pool of pre-generated questions so "generate more" doesnt wait for gemini,
+# the stock per lesson, type and skill level is this many pages worth of questions
+QUESTION_POOL_ENABLED = os.getenv("QUESTION_POOL_ENABLED", "1") == "1"
+QUESTION_POOL_TARGET_BATCHES = int(os.getenv("QUESTION_POOL_TARGET_BATCHES", "2"))
+QUESTION_POOL_MAX_LESSONS = int(os.getenv("QUESTION_POOL_MAX_LESSONS", "500"))
+
+# the questions a subunit page shows per (lesson, skill level), kept briefly and
+# dropped as soon as new questions are saved for the lesson
+QUESTION_SET_CACHE_TTL_SECONDS = float(os.getenv("QUESTION_SET_CACHE_TTL_SECONDS", "30"))
+QUESTION_SET_CACHE_MAX_ENTRIES = int(os.getenv("QUESTION_SET_CACHE_MAX_ENTRIES", "2000"))
+# the cached set holds this many times a page of candidates per type, so each
+# student can be shown the ones they havent answered yet
+QUESTION_SET_CANDIDATES = int(os.getenv("QUESTION_SET_CANDIDATES", "4"))
+
+# answered question ids per active user, see services/seen_index.py
+SEEN_INDEX_MAX_USERS = int(os.getenv("SEEN_INDEX_MAX_USERS", "10000"))
+SEEN_INDEX_TTL_SECONDS = float(os.getenv("SEEN_INDEX_TTL_SECONDS", "3600"))
+
+# near-duplicate check on generated questions, a new question whose estimated
+# similarity to one already in its subunit reaches the threshold isnt saved
+DUPLICATE_CHECK_ENABLED = os.getenv("DUPLICATE_CHECK_ENABLED", "1") == "1"
+DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", "0.7"))
+DUPLICATE_NUM_PERM = int(os.getenv("DUPLICATE_NUM_PERM", "64"))
+DUPLICATE_BANDS = int(os.getenv("DUPLICATE_BANDS", "16"))
+
+# GET /api/courses is served from a snapshot rebuilt after add_course/add_subunit,
+# the ttl only matters for edits made straight in supabase. browsers may reuse it
+# for CATALOG_MAX_AGE_SECONDS, 0 makes them revalidate (a 304) on every visit
+CATALOG_CACHE_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "300"))
+CATALOG_MAX_AGE_SECONDS = int(os.getenv("CATALOG_MAX_AGE_SECONDS", "0"))
+
+# parsed and precompressed subunit content, see services/content_store.py
+CONTENT_CACHE_MAX_ENTRIES = int(os.getenv("CONTENT_CACHE_MAX_ENTRIES", "500"))
+CONTENT_CACHE_MAX_BYTES = int(os.getenv("CONTENT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CONTENT_CACHE_TTL_SECONDS = float(os.getenv("CONTENT_CACHE_TTL_SECONDS", "600"))
+CONTENT_MAX_AGE_SECONDS = int(os.getenv("CONTENT_MAX_AGE_SECONDS", "0"))
+
+# response encoding: "orjson" serializes with orjson when it is installed,
+# anything else keeps flask's json. json and text bodies of at least
+# COMPRESSION_MIN_BYTES go out gzip or brotli when the client accepts it
+JSON_PROVIDER = os.getenv("JSON_PROVIDER", "orjson")
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1") == "1"
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
@@ -0,0 +1,18 @@
+import signal
+import sys
+from services.answer_service import grading_queue
+
+# grades queued submissions (submit-answers with "Prefer: respond-async") in
+# its own process, for deployments where the api runs under gunicorn. run one
+# or more next to the api from backend/: python grading_worker.py
+# jobs are leased, a worker that dies leaves its jobs to the others once
+# GRADING_QUEUE_LEASE_SECONDS pass
+
+if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"Grading worker {grading_queue.worker_id} started")
+    grading_queue.start()
+    try:
+        grading_queue.join()
+    except KeyboardInterrupt:
+        pass
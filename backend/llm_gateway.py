@@ -0,0 +1,172 @@
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+from google import genai
+from google.genai import errors
+from utils.metrics import metrics
+
+# every gemini call goes through one gateway: a single client whose http
+# connections are reused, generation configs built once when prompt.py registers
+# them, a cap on calls in flight (overall and per operation) and retries with
+# jittered backoff when gemini is overloaded or the connection drops
+
+# http codes worth retrying, anything else in 4xx is our request's fault
+RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+
+
+@dataclass
+class LLMResult:
+    ok: bool
+    data: Any = None          # the parsed json response
+    text: str = ""
+    error: Optional[str] = None
+    details: Optional[str] = None
+    status: int = 200
+    attempts: int = 0
+    latency_ms: float = 0.0
+
+
+class LLMError(Exception):
+    # raised by LLMGateway.stream, .result says what went wrong
+    def __init__(self, result):
+        super().__init__(f"{result.error}: {result.details}")
+        self.result = result
+
+
+@dataclass
+class Operation:
+    name: str
+    config: Any
+    error: str
+    limit: threading.BoundedSemaphore
+
+
+class LLMGateway:
+    def __init__(self, api_key, model, max_concurrency=8, operation_concurrency=4, operation_limits=None,
+                 max_attempts=3, backoff_seconds=0.5, max_backoff_seconds=8.0, queue_timeout_seconds=30.0):
+        self.api_key = api_key
+        self.model = model
+        self.operation_concurrency = operation_concurrency
+        self.operation_limits = operation_limits or {}
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.operations = {}
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._client = None
+        self._lock = threading.Lock()
+
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = genai.Client(api_key=self.api_key)
+            return self._client
+
+    def register(self, name, config, error):
+        limit = self.operation_limits.get(name, self.operation_concurrency)
+        self.operations[name] = Operation(name, config, error, threading.BoundedSemaphore(max(1, limit)))
+
+    @staticmethod
+    def retryable(error):
+        if isinstance(error, errors.APIError):
+            return error.code in RETRYABLE_CODES
+        # dropped connections and truncated or malformed json are worth another go
+        return isinstance(error, (ConnectionError, TimeoutError, json.JSONDecodeError)) \
+            or type(error).__module__.startswith("httpx")
+
+    def backoff(self, attempt):
+        # full jitter so callers that failed together dont retry together
+        return random.uniform(0, min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt))
+
+    def call(self, name, text):
+        operation = self.operations[name]
+        started = time.perf_counter()
+
+        if not operation.limit.acquire(timeout=self.queue_timeout_seconds):
+            return self.failed(operation, "Too many requests in flight", 503, 0, started)
+        try:
+            if not self._slots.acquire(timeout=self.queue_timeout_seconds):
+                return self.failed(operation, "Too many requests in flight", 503, 0, started)
+            try:
+                return self.attempt(operation, text, started)
+            finally:
+                self._slots.release()
+        finally:
+            operation.limit.release()
+
+    def stream(self, name, text):
+        # yields the response text chunk by chunk, raises LLMError on failure.
+        # only retries before the first chunk, after that the caller has used it
+        operation = self.operations[name]
+        started = time.perf_counter()
+
+        if not operation.limit.acquire(timeout=self.queue_timeout_seconds):
+            raise LLMError(self.failed(operation, "Too many requests in flight", 503, 0, started))
+        try:
+            if not self._slots.acquire(timeout=self.queue_timeout_seconds):
+                raise LLMError(self.failed(operation, "Too many requests in flight", 503, 0, started))
+            try:
+                metrics.incr(f"llm.{operation.name}.calls")
+                for attempt in range(1, self.max_attempts + 1):
+                    sent = False
+                    try:
+                        for chunk in self.client().models.generate_content_stream(
+                            model=self.model,
+                            contents=text,
+                            config=operation.config,
+                        ):
+                            if chunk.text:
+                                if not sent:
+                                    metrics.incr(f"llm.{operation.name}.first_chunk_ms",
+                                                 round((time.perf_counter() - started) * 1000))
+                                sent = True
+                                yield chunk.text
+                        metrics.incr(f"llm.{operation.name}.latency_ms", round((time.perf_counter() - started) * 1000))
+                        return
+                    except Exception as e:
+                        if sent or attempt == self.max_attempts or not self.retryable(e):
+                            status = e.code if isinstance(e, errors.APIError) and e.code in RETRYABLE_CODES else 500
+                            raise LLMError(self.failed(operation, str(e), status, attempt, started))
+                        metrics.incr("llm.retries")
+                        time.sleep(self.backoff(attempt))
+            finally:
+                self._slots.release()
+        finally:
+            operation.limit.release()
+
+    def attempt(self, operation, text, started):
+        metrics.incr(f"llm.{operation.name}.calls")
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = self.client().models.generate_content(
+                    model=self.model,
+                    contents=text,
+                    config=operation.config,
+                )
+                body = response.text or ""
+                data = json.loads(body)
+                latency_ms = (time.perf_counter() - started) * 1000
+                metrics.incr(f"llm.{operation.name}.latency_ms", round(latency_ms))
+                return LLMResult(ok=True, data=data, text=body, attempts=attempt, latency_ms=latency_ms)
+            except Exception as e:
+                if attempt == self.max_attempts or not self.retryable(e):
+                    status = e.code if isinstance(e, errors.APIError) and e.code in RETRYABLE_CODES else 500
+                    return self.failed(operation, str(e), status, attempt, started)
+                metrics.incr("llm.retries")
+                time.sleep(self.backoff(attempt))
+
+    def failed(self, operation, details, status, attempts, started):
+        print(f"{operation.error}: {details}")
+        metrics.incr(f"llm.{operation.name}.errors")
+        return LLMResult(
+            ok=False,
+            error=operation.error,
+            details=details,
+            status=status,
+            attempts=attempts,
+            latency_ms=(time.perf_counter() - started) * 1000
+        )
@@ -6,17 +6,31 @@ from routes.question_route import question_bp
 from routes.course_route import course_bp
 from routes.subunit_route import subunit_bp
 from routes.bookmark_route import bookmark_bp
+from routes.answer_route import answer_bp
+from routes.metrics_route import metrics_bp
+from services.answer_service import grading_queue
+from config.settings import JSON_PROVIDER, COMPRESSION_ENABLED, COMPRESSION_MIN_BYTES, GRADING_QUEUE_EMBEDDED
+from utils.json_provider import make_json_provider
+from utils.compression import install_compression
 # from routes.mission_route import mission_bp
 # starting up flask app, registers routes and enables CORS
 app = Flask(__name__)
 CORS(app)
 
+# faster json encoding and compressed responses for the big payloads
+# (question lists, subunit content, the catalog)
+app.json = make_json_provider(app, JSON_PROVIDER)
+if COMPRESSION_ENABLED:
+    install_compression(app, COMPRESSION_MIN_BYTES)
+
 # loads the routes dynamically from the route files
 app.register_blueprint(user_bp, url_prefix="/api")
 app.register_blueprint(question_bp, url_prefix="/api")
 app.register_blueprint(course_bp, url_prefix="/api")
 app.register_blueprint(subunit_bp, url_prefix="/api")
 app.register_blueprint(bookmark_bp, url_prefix="/api")
+app.register_blueprint(answer_bp, url_prefix="/api")
+app.register_blueprint(metrics_bp, url_prefix="/api")
 # app.register_blueprint(mission_bp, url_prefix="/api")
 
 
@@ -27,4 +41,8 @@ def serve_profile_picture(filename):
 # they are all structured to have prefix /api for restful api consistency,
 # and to avoid conflicts with frontend routes
 if __name__ == "__main__":
+    # queued submissions are graded in the process serving requests, not in
+    # the reloader that watches it. gunicorn never gets here, see grading_worker.py
+    if GRADING_QUEUE_EMBEDDED and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        grading_queue.start()
     app.run(port=8080, debug=True)
\ No newline at end of file
@@ -0,0 +1,40 @@
+-- bulk answer upsert used by Answer.persist_all
+-- run once in the supabase sql editor
+
+-- keep only the newest answer per user/question before adding the unique key
+delete from "Answer" a
+using "Answer" b
+where a."userID" = b."userID"
+  and a."questionID" = b."questionID"
+  and a."answerID" < b."answerID";
+
+alter table "Answer"
+  add constraint "Answer_userID_questionID_key" unique ("userID", "questionID");
+
+-- writes a whole submission in one statement, first attempt stores retry 0
+-- and every later attempt increments the stored counter in place
+create or replace function upsert_answers(p_answers jsonb)
+returns table ("questionID" bigint, retry bigint)
+language sql
+as $$
+  insert into "Answer" as a (
+    "questionID", "userID", "userAnswer", "correctAnswer", "is_correct",
+    "feedback", "hint", "Points", "retry", "startedAt", "completedAt", "timeTaken"
+  )
+  select
+    r."questionID", r."userID", r."userAnswer", r."correctAnswer", r."is_correct",
+    r."feedback", r."hint", r."Points", 0, r."startedAt", r."completedAt", r."timeTaken"
+  from jsonb_populate_recordset(null::"Answer", p_answers) as r
+  on conflict ("userID", "questionID") do update set
+    "userAnswer" = excluded."userAnswer",
+    "correctAnswer" = excluded."correctAnswer",
+    "is_correct" = excluded."is_correct",
+    "feedback" = excluded."feedback",
+    "hint" = excluded."hint",
+    "Points" = excluded."Points",
+    "retry" = coalesce(a."retry", 0) + 1,
+    "startedAt" = excluded."startedAt",
+    "completedAt" = excluded."completedAt",
+    "timeTaken" = excluded."timeTaken"
+  returning a."questionID"::bigint, a."retry"::bigint;
+$$;
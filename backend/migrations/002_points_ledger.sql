@@ -0,0 +1,57 @@
+-- append-only points ledger used by PointsService
+-- run once in the supabase sql editor, after 001
+
+create table if not exists "PointsLedger" (
+  "entryID" bigint generated always as identity primary key,
+  "userID" uuid not null references "User" ("userID"),
+  "delta" integer not null,
+  "source" text not null,
+  "createdAt" timestamptz not null default now()
+);
+
+create index if not exists "PointsLedger_userID_idx" on "PointsLedger" ("userID");
+
+-- carry the current balances over so reconciliation doesnt wipe them
+insert into "PointsLedger" ("userID", "delta", "source")
+select "userID", points, 'opening_balance'
+from "User"
+where coalesce(points, 0) <> 0;
+
+-- appends the ledger row and bumps the balance in one transaction,
+-- returns the new balance
+create or replace function award_points(p_user_id uuid, p_delta integer, p_source text)
+returns integer
+language sql
+as $$
+  insert into "PointsLedger" ("userID", "delta", "source")
+  values (p_user_id, p_delta, p_source);
+
+  update "User"
+  set points = coalesce(points, 0) + p_delta
+  where "userID" = p_user_id
+  returning points;
+$$;
+
+-- rebuilds balances from the ledger, all users when p_user_ids is null,
+-- returns how many balances were corrected
+create or replace function reconcile_points(p_user_ids uuid[] default null)
+returns integer
+language sql
+as $$
+  with totals as (
+    select u."userID", coalesce(sum(l."delta"), 0)::integer as total
+    from "User" u
+    left join "PointsLedger" l on l."userID" = u."userID"
+    where p_user_ids is null or u."userID" = any (p_user_ids)
+    group by u."userID"
+  ),
+  corrected as (
+    update "User" u
+    set points = t.total
+    from totals t
+    where u."userID" = t."userID"
+      and u.points is distinct from t.total
+    returning 1
+  )
+  select count(*)::integer from corrected;
+$$;
@@ -0,0 +1,5 @@
+-- test cases generated with coding questions, run by services/code_runner.py
+-- run once in the supabase sql editor
+
+alter table "Question"
+  add column if not exists "testCases" jsonb not null default '[]'::jsonb;
@@ -0,0 +1,5 @@
+-- machine-checkable constraints for coding questions, see services/constraint_checker.py
+-- run once in the supabase sql editor
+
+alter table "Question"
+  add column if not exists "constraintRules" jsonb not null default '[]'::jsonb;
@@ -0,0 +1,30 @@
+-- one round trip for a subunit page, used by Questions.fetch_question_set
+-- run once in the supabase sql editor
+
+create index if not exists "Question_lesson_type_created_idx"
+  on "Question" ("lessonID", "questionTypeID", "created_at" desc)
+  where "generated";
+
+-- newest generated questions of a lesson, p_limits caps each type as
+-- {"<questionTypeID>": n}, types not in p_limits are left out and ids in
+-- p_exclude are skipped
+create or replace function select_questions(p_lesson_id bigint, p_limits jsonb, p_exclude bigint[] default '{}')
+returns setof "Question"
+language sql
+stable
+as $$
+  select (ranked.q).*
+  from (
+    select
+      q,
+      q."questionTypeID" as type_id,
+      row_number() over (partition by q."questionTypeID" order by q."created_at" desc) as rn
+    from "Question" q
+    where q."lessonID" = p_lesson_id
+      and q."generated"
+      and p_limits ? q."questionTypeID"::text
+      and not (q."questionID" = any(p_exclude))
+  ) ranked
+  where ranked.rn <= (p_limits ->> ranked.type_id::text)::int
+  order by ranked.type_id, ranked.rn;
+$$;
@@ -0,0 +1,24 @@
+-- a grading job awards its points once, even when it is graded again after
+-- its worker lost the lease. run once in the supabase sql editor, after 002
+
+create unique index if not exists "PointsLedger_job_source_idx"
+  on "PointsLedger" ("source")
+  where "source" like 'grading_job:%';
+
+-- same as in 002, a second award with the same grading_job source adds no
+-- ledger row and leaves the balance alone, returns the balance either way
+create or replace function award_points(p_user_id uuid, p_delta integer, p_source text)
+returns integer
+language sql
+as $$
+  with entry as (
+    insert into "PointsLedger" ("userID", "delta", "source")
+    values (p_user_id, p_delta, p_source)
+    on conflict ("source") where "source" like 'grading_job:%' do nothing
+    returning "delta"
+  )
+  update "User"
+  set points = coalesce(points, 0) + coalesce((select sum("delta") from entry), 0)
+  where "userID" = p_user_id
+  returning points;
+$$;
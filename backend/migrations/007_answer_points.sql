@@ -0,0 +1,34 @@
+-- upsert_answers with the retry penalty applied in the same statement, so the
+-- points match the attempt that was actually stored even when two submissions
+-- for a question race. run once in the supabase sql editor, after 001
+--
+-- "Points" comes in without the penalty (Answer.to_row), every attempt after
+-- the first loses one point per retry, never below 0, like ScoreCalculator
+
+drop function if exists upsert_answers(jsonb);
+
+create function upsert_answers(p_answers jsonb)
+returns table ("questionID" bigint, retry bigint, "Points" bigint)
+language sql
+as $$
+  insert into "Answer" as a (
+    "questionID", "userID", "userAnswer", "correctAnswer", "is_correct",
+    "feedback", "hint", "Points", "retry", "startedAt", "completedAt", "timeTaken"
+  )
+  select
+    r."questionID", r."userID", r."userAnswer", r."correctAnswer", r."is_correct",
+    r."feedback", r."hint", r."Points", 0, r."startedAt", r."completedAt", r."timeTaken"
+  from jsonb_populate_recordset(null::"Answer", p_answers) as r
+  on conflict ("userID", "questionID") do update set
+    "userAnswer" = excluded."userAnswer",
+    "correctAnswer" = excluded."correctAnswer",
+    "is_correct" = excluded."is_correct",
+    "feedback" = excluded."feedback",
+    "hint" = excluded."hint",
+    "Points" = greatest(0, coalesce(excluded."Points", 0) - (coalesce(a."retry", 0) + 1)),
+    "retry" = coalesce(a."retry", 0) + 1,
+    "startedAt" = excluded."startedAt",
+    "completedAt" = excluded."completedAt",
+    "timeTaken" = excluded."timeTaken"
+  returning a."questionID"::bigint, a."retry"::bigint, a."Points"::bigint;
+$$;
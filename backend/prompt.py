@@ -1,609 +1,661 @@
-import base64
 import os
 from google import genai
 from google.genai import types
+from llm_gateway import LLMGateway, LLMError
+from config.settings import (
+    GEMINI_MODEL, LLM_MAX_CONCURRENCY, LLM_OPERATION_CONCURRENCY, LLM_OPERATION_LIMITS,
+    LLM_MAX_ATTEMPTS, LLM_BACKOFF_SECONDS, LLM_QUEUE_TIMEOUT_SECONDS
+)
 
-class Prompt:    
-    def generate_MCQ(prompt):
-        try:
-            client = genai.Client(
-                api_key=os.environ.get("GEMINI_API_KEY"),
-            )
-
-            model = "gemini-2.0-flash"
-            contents = [
-                types.Content(
-                    role="user",
-                    parts=[
-                        types.Part.from_text(text=prompt),
-                    ],
-                ),
-            ]
-            generate_content_config = types.GenerateContentConfig(
-                temperature=0.5,
-                top_p=0.9,
-                top_k=40,
-                max_output_tokens=2000,
-                response_mime_type="application/json",
-                response_schema=genai.types.Schema(
-                    type = genai.types.Type.ARRAY,
-                    items = genai.types.Schema(
+# one client and one config per prompt for the whole process, see llm_gateway.py
+gateway = LLMGateway(
+    api_key=os.environ.get("GEMINI_API_KEY"),
+    model=GEMINI_MODEL,
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    operation_concurrency=LLM_OPERATION_CONCURRENCY,
+    operation_limits=LLM_OPERATION_LIMITS,
+    max_attempts=LLM_MAX_ATTEMPTS,
+    backoff_seconds=LLM_BACKOFF_SECONDS,
+    queue_timeout_seconds=LLM_QUEUE_TIMEOUT_SECONDS
+)
+
+gateway.register(
+    "generate_mcq",
+    types.GenerateContentConfig(
+        temperature=0.5,
+        top_p=0.9,
+        top_k=40,
+        max_output_tokens=2000,
+        response_mime_type="application/json",
+        response_schema=genai.types.Schema(
+            type = genai.types.Type.ARRAY,
+            items = genai.types.Schema(
+                type = genai.types.Type.OBJECT,
+                required = ["question", "options", "correct_answer", "tags", "avgTimeSeconds", "skillLevel"],
+                properties = {
+                    "question": genai.types.Schema(
+                        type = genai.types.Type.STRING,
+                    ),
+                    "options": genai.types.Schema(
                         type = genai.types.Type.OBJECT,
-                        required = ["question", "options", "correct_answer", "tags", "avgTimeSeconds", "skillLevel"],
+                        required = ["a", "b", "c", "d"],
                         properties = {
-                            "question": genai.types.Schema(
+                            "a": genai.types.Schema(
                                 type = genai.types.Type.STRING,
                             ),
-                            "options": genai.types.Schema(
-                                type = genai.types.Type.OBJECT,
-                                required = ["a", "b", "c", "d"],
-                                properties = {
-                                    "a": genai.types.Schema(
-                                        type = genai.types.Type.STRING,
-                                    ),
-                                    "b": genai.types.Schema(
-                                        type = genai.types.Type.STRING,
-                                    ),
-                                    "c": genai.types.Schema(
-                                        type = genai.types.Type.STRING,
-                                    ),
-                                    "d": genai.types.Schema(
-                                        type = genai.types.Type.STRING,
-                                    ),
-                                },
-                            ),
-                            "correct_answer": genai.types.Schema(
+                            "b": genai.types.Schema(
                                 type = genai.types.Type.STRING,
                             ),
-                            "tags": genai.types.Schema(
-                                type = genai.types.Type.ARRAY,
-                                items = genai.types.Schema(
-                                    type = genai.types.Type.STRING,
-                                ),
-                            ),
-                            "avgTimeSeconds": genai.types.Schema(
-                                type = genai.types.Type.INTEGER,
-                                description = "Estimated average time in seconds it would take a student to solve the question"
+                            "c": genai.types.Schema(
+                                type = genai.types.Type.STRING,
                             ),
-                            "skillLevel": genai.types.Schema(
+                            "d": genai.types.Schema(
                                 type = genai.types.Type.STRING,
-                                enum = ["beginner", "intermediate", "advanced"],
-                                description = "Target student skill level"
                             ),
                         },
                     ),
-                ),
-                system_instruction=[
-                    types.Part.from_text(text="""Act as an energetic and engaging teacher creating 3 unique Python multiple-choice questions in a JSON array,
-                                         each question must follow the schema exactly. Respond with a JSON array only. Make questions educational, age-appropriate (10–17),
-                                         fun, and directly tied to the provided subunit description! Avoid repeating the same question with slight rewording
-                                         A skill level: based on this user input: beginner = never coded, intermediate = some coding knowledge, advanced = knows other programming languages
-                                         """),],
-            )
-
-            response = ""
-            for chunk in client.models.generate_content_stream(
-                model=model,
-                contents=contents,
-                config=generate_content_config,
-            ): 
-                print(chunk.text, end="")
-                response += chunk.text
-            return response
-        except Exception as e:
-            return {
-            "error": "Failed to generate MCQ",
-            "details": str(e),
-            "status": 500
-        }
-    
-    def generate_coding(prompt):
-        try:
-            client = genai.Client(
-                api_key=os.environ.get("GEMINI_API_KEY"),
-            )
-
-            model = "gemini-2.0-flash"
-            contents = [
-                types.Content(
-                    role="user",
-                    parts=[
-                        types.Part.from_text(text=prompt),
-                    ],
-                ),
-            ]
-            generate_content_config = types.GenerateContentConfig(
-                temperature=0.5,
-                top_p=0.9,
-                top_k=40,
-                max_output_tokens=2000,
-                response_mime_type="application/json",
-                response_schema=genai.types.Schema(
-                    type = genai.types.Type.ARRAY,
-                    items = genai.types.Schema(
-                        type = genai.types.Type.OBJECT,
-                        required = ["question", "correct_answer", "constraints", "tags", "avgTimeSeconds", "skillLevel"],
-                        properties = {
-                            "question": genai.types.Schema(
-                                type = genai.types.Type.STRING,
-                            ),
-                            "correct_answer": genai.types.Schema(
-                                type = genai.types.Type.STRING,
-                            ),
-                            "constraints": genai.types.Schema(
-                                type = genai.types.Type.STRING,
-                            ),
-                            "tags": genai.types.Schema(
-                                type = genai.types.Type.ARRAY,
-                                items = genai.types.Schema(
+                    "correct_answer": genai.types.Schema(
+                        type = genai.types.Type.STRING,
+                    ),
+                    "tags": genai.types.Schema(
+                        type = genai.types.Type.ARRAY,
+                        items = genai.types.Schema(
+                            type = genai.types.Type.STRING,
+                        ),
+                    ),
+                    "avgTimeSeconds": genai.types.Schema(
+                        type = genai.types.Type.INTEGER,
+                        description = "Estimated average time in seconds it would take a student to solve the question"
+                    ),
+                    "skillLevel": genai.types.Schema(
+                        type = genai.types.Type.STRING,
+                        enum = ["beginner", "intermediate", "advanced"],
+                        description = "Target student skill level"
+                    ),
+                },
+            ),
+        ),
+        system_instruction=[
+            types.Part.from_text(text="""Act as an energetic and engaging teacher creating 3 unique Python multiple-choice questions in a JSON array,
+                                 each question must follow the schema exactly. Respond with a JSON array only. Make questions educational, age-appropriate (10–17),
+                                 fun, and directly tied to the provided subunit description! Avoid repeating the same question with slight rewording
+                                 A skill level: based on this user input: beginner = never coded, intermediate = some coding knowledge, advanced = knows other programming languages
+                                 """),],
+    ),
+    error="Failed to generate MCQ"
+)
+
+gateway.register(
+    "generate_coding",
+    types.GenerateContentConfig(
+        temperature=0.5,
+        top_p=0.9,
+        top_k=40,
+        max_output_tokens=2000,
+        response_mime_type="application/json",
+        response_schema=genai.types.Schema(
+            type = genai.types.Type.ARRAY,
+            items = genai.types.Schema(
+                type = genai.types.Type.OBJECT,
+                required = ["question", "correct_answer", "constraints", "constraint_rules", "tags", "avgTimeSeconds", "skillLevel", "test_cases"],
+                properties = {
+                    "question": genai.types.Schema(
+                        type = genai.types.Type.STRING,
+                    ),
+                    "correct_answer": genai.types.Schema(
+                        type = genai.types.Type.STRING,
+                    ),
+                    "constraints": genai.types.Schema(
+                        type = genai.types.Type.STRING,
+                    ),
+                    "constraint_rules": genai.types.Schema(
+                        type = genai.types.Type.ARRAY,
+                        description = "The constraints as machine-checkable rules",
+                        items = genai.types.Schema(
+                            type = genai.types.Type.STRING,
+                        ),
+                    ),
+                    "tags": genai.types.Schema(
+                        type = genai.types.Type.ARRAY,
+                        items = genai.types.Schema(
+                            type = genai.types.Type.STRING,
+                        ),
+                    ),
+                    "avgTimeSeconds": genai.types.Schema(
+                        type = genai.types.Type.INTEGER,
+                        description = "Estimated average time in seconds it would take a student to solve the question"
+                    ),
+                    "skillLevel": genai.types.Schema(
+                        type = genai.types.Type.STRING,
+                        enum = ["beginner", "intermediate", "advanced"],
+                        description = "Target student skill level"
+                    ),
+                    "test_cases": genai.types.Schema(
+                        type = genai.types.Type.ARRAY,
+                        description = "2 to 4 test cases that the correct_answer passes when run as a Python script",
+                        items = genai.types.Schema(
+                            type = genai.types.Type.OBJECT,
+                            required = ["stdin", "expected_output", "assertion"],
+                            properties = {
+                                "stdin": genai.types.Schema(
                                     type = genai.types.Type.STRING,
+                                    description = "Text fed to input(), one value per line, empty if the code reads no input",
                                 ),
-                            ),
-                            "avgTimeSeconds": genai.types.Schema(
-                                type = genai.types.Type.INTEGER,
-                                description = "Estimated average time in seconds it would take a student to solve the question"
-                            ),
-                            "skillLevel": genai.types.Schema(
-                                type = genai.types.Type.STRING,
-                                enum = ["beginner", "intermediate", "advanced"],
-                                description = "Target student skill level"
-                            )
-                        },
+                                "expected_output": genai.types.Schema(
+                                    type = genai.types.Type.STRING,
+                                    description = "Exact text the code prints, empty if only the assertion is checked",
+                                ),
+                                "assertion": genai.types.Schema(
+                                    type = genai.types.Type.STRING,
+                                    description = "Python assert statements run after the code, each of the form assert <expression> == <literal value>, e.g. assert add(2, 3) == 5, empty if only the output is checked",
+                                ),
+                            },
+                        ),
+                    )
+                },
+            ),
+        ),
+        system_instruction=[
+            types.Part.from_text(text="""Act as an energetic and engaging teacher creating 4 Python short coding questions
+                                 in a JSON array. Follow the schema exactly. Each question must ask the student to write code, not a full program.
+                                 Stick to the subunit description content scope ONLY. Keep it educational, age-appropriate (10–17), and fun. 
+                                 Avoid repeating the same question with slight rewording!
+                                 For every question write test_cases that the correct_answer passes. Tests only use input() and print() or asserts of the form assert <expression> == <literal value> on the names the question asks for,
+                                 never files, network or extra modules. Do not test exact prompt text passed to input().
+                                 Write every constraint again in constraint_rules using only these forms: uses:<construct>, avoids:<construct>, calls:<function>,
+                                 never_calls:<function>, defines:<function>, assigns:<variable>, max_lines:<n>, where <construct> is one of
+                                 for, while, if, def, return, class, lambda, try, with, import, break, continue, comprehension, list, dict, tuple, set, fstring
+                                 (e.g. "must use a for loop" -> "uses:for", "print the result" -> "calls:print"). Leave constraint_rules empty if nothing can be expressed that way.
+                                 A skill level: based on this user input: beginner = never coded, intermediate = some coding knowledge, advanced = knows other programming languages
+                                 """),
+        ],
+    ),
+    error="Failed to generate coding question"
+)
+
+gateway.register(
+    "generate_fill_in",
+    types.GenerateContentConfig(
+        temperature=0.5,
+        top_p=0.9,
+        top_k=40,
+        max_output_tokens=2000,
+        response_mime_type="application/json",
+        response_schema=genai.types.Schema(
+            type = genai.types.Type.ARRAY,
+            items = genai.types.Schema(
+                type = genai.types.Type.OBJECT,
+                required = ["question", "correct_answer", "tags", "avgTimeSeconds", "skillLevel"],
+                properties = {
+                    "question": genai.types.Schema(
+                        type = genai.types.Type.STRING,
                     ),
-                ),
-                system_instruction=[
-                    types.Part.from_text(text="""Act as an energetic and engaging teacher creating 4 Python short coding questions
-                                         in a JSON array. Follow the schema exactly. Each question must ask the student to write code, not a full program.
-                                         Stick to the subunit description content scope ONLY. Keep it educational, age-appropriate (10–17), and fun. 
-                                         Avoid repeating the same question with slight rewording!
-                                         A skill level: based on this user input: beginner = never coded, intermediate = some coding knowledge, advanced = knows other programming languages
-                                         """),
+                    "correct_answer": genai.types.Schema(
+                        type = genai.types.Type.STRING,
+                    ),
+                    "tags": genai.types.Schema(
+                        type = genai.types.Type.ARRAY,
+                        items = genai.types.Schema(
+                            type = genai.types.Type.STRING,
+                        ),
+                    ),
+                    "avgTimeSeconds": genai.types.Schema(
+                        type = genai.types.Type.INTEGER,
+                        description = "Estimated average time in seconds it would take a student to solve the question"
+                    ),
+                    "skillLevel": genai.types.Schema(
+                        type = genai.types.Type.STRING,
+                        enum = ["beginner", "intermediate", "advanced"],
+                        description = "Target student skill level"
+                    )
+                },
+            ),
+        ),
+        system_instruction=[
+            types.Part.from_text(text="""Act as an energetic and engaging Python teacher creating 2 unique fill-in-the-blank questions in a JSON array.
+                            Each question must:
+                            Be directly based on the given subunit description.
+                            Be age-appropriate (10–17).
+                            Contain 1 or 2 blanks, marked clearly as _____.
+                            Include a correct_answer array matching the blanks in order.
+                            Strictly follow the structured schema provided.
+                            Keep the questions clear, relevant, and educational. Avoid repeating concepts or introducing topics outside the subunit’s scope
+                            A skill level: based on this user input: beginner = never coded, intermediate = some coding knowledge, advanced = knows other programming languages
+                            """),
                 ],
-            )
-
-            response = ""
-            for chunk in client.models.generate_content_stream(
-                model=model,
-                contents=contents,
-                config=generate_content_config,
-            ): 
-                print(chunk.text, end="")
-                response += chunk.text
-            return response
-        except Exception as e:
-            return {
-            "error": "Failed to generate coding question",
-            "details": str(e),
-            "status": 500
-        }
-            
-    def generate_fill_in(prompt):
-        try: 
-            client = genai.Client(
-                api_key=os.environ.get("GEMINI_API_KEY"),
-            )
-
-            model = "gemini-2.0-flash"
-            contents = [
-                types.Content(
-                    role="user",
-                    parts=[
-                        types.Part.from_text(text=prompt),
+            ),
+    error="Failed to generate fill in the blanks"
+)
+
+gateway.register(
+    "generate_drag_and_drop",
+    types.GenerateContentConfig(
+        temperature=0.5,
+        top_p=0.9,
+        top_k=40,
+        max_output_tokens=2000,
+        response_mime_type="application/json",
+        response_schema=genai.types.Schema(
+            type = genai.types.Type.ARRAY,
+            items = genai.types.Schema(
+                type = genai.types.Type.OBJECT,
+                required = ["question", "correct_answer", "options", "tags",  "avgTimeSeconds", "skillLevel"],
+                properties = {
+                    "question": genai.types.Schema(
+                        type = genai.types.Type.STRING,
+                    ),
+                    "correct_answer": genai.types.Schema(
+                        type = genai.types.Type.ARRAY,
+                        items = genai.types.Schema(
+                            type = genai.types.Type.STRING,
+                        ),
+                    ),
+                    "options": genai.types.Schema(
+                        type = genai.types.Type.ARRAY,
+                        items = genai.types.Schema(
+                            type = genai.types.Type.STRING,
+                        ),
+                    ),
+                    "tags": genai.types.Schema(
+                        type = genai.types.Type.ARRAY,
+                        items = genai.types.Schema(
+                            type = genai.types.Type.STRING,
+                        ),
+                    ),
+                    "avgTimeSeconds": genai.types.Schema(
+                        type = genai.types.Type.INTEGER,
+                        description = "Estimated average time in seconds it would take a student to solve the question"
+                    ),
+                    "skillLevel": genai.types.Schema(
+                        type = genai.types.Type.STRING,
+                        enum = ["beginner", "intermediate", "advanced"],
+                        description = "Target student skill level"
+                    ),
+                },
+            ),
+        ),
+        system_instruction=[
+            types.Part.from_text(text="""Act as an engaging Python instructor. Generate 2 unique drag-and-drop Python questions in a JSON array.
+                                Each question must:
+                                - Be clearly tied to the provided subunit description
+                                - Include stricktly 2 to 3 blanks in the code or question to be filled in (use `_____`), or include blanks at the end of the question if the question asks to "Drag the correct blocks into the blanks"
+                                - Be age-appropriate (10–17), fun, and educational
+                                - Include a `question` (context with blanks), `correct_answer` (ordered list), and `options` (correct answers + distractors)
+                                - Follow the JSON schema exactly
+
+                                Do NOT repeat the same pattern, and don’t go beyond the subunit scope.
+                                A skill level: based on this user input: beginner = never coded, intermediate = some coding knowledge, advanced = knows other programming languages
+                                """),
+        ],
+    ),
+    error="Failed to generate drag and drop"
+)
+
+gateway.register(
+    "check_coding",
+    types.GenerateContentConfig(
+        temperature=0.2,
+        top_p=1,
+        top_k=40,
+        max_output_tokens=250,
+        response_mime_type="application/json",
+        response_schema=genai.types.Schema(
+            type = genai.types.Type.OBJECT,
+            required = ["questionid", "user_answer", "feedback", "isCorrect", "points"],
+            properties = {
+                "questionid": genai.types.Schema(
+                    type = genai.types.Type.STRING,
+                    description = "ID that links this feedback to the original question",
+                ),
+                "user_answer": genai.types.Schema(
+                    type = genai.types.Type.STRING,
+                    description = "The student's submitted code or answer",
+                ),
+                "feedback": genai.types.Schema(
+                    type = genai.types.Type.STRING,
+                    description = "One short sentence of encouraging, constructive feedback, not suggestions",
+                ),
+                "isCorrect": genai.types.Schema(
+                    type = genai.types.Type.BOOLEAN,
+                    description = "True if the user's answer logically solves the question as written. False otherwise",
+                ),
+                "points": genai.types.Schema(
+                    type = genai.types.Type.NUMBER,
+                    description = "Score out of 10 based on how well the student's code meets the question's requirements",
+                ),
+            },
+        ),
+        system_instruction=[
+            types.Part.from_text(text="""You are a Python tutor analyzing a student's answer to a coding question.
+                    Determine if the student's code logically solves the problem described or stated in the "question" field fully.
+                    Do NOT compare to "correct_answer" literally. Instead, judge whether the code accomplishes what the question ASKS FOR.
+                    user answer should match "constraints", if it doesnt, the user answer is incorrect.
+
+                    If the solution is CORRECT:
+                    feedback: Give brief, positive reinforcement only (e.g. “Well done!” or “Correct.”) in one sentence.
+                    If the solution is INCORRECT:
+                    user answer doesnt apply the "constraints".
+                    feedback: State only what the user current code does in one sentence (e.g. “thats not quite right, your code does ...”) Socratic-style.
+
+                    NEVER:
+                    Do NOT give direct suggestions or code in feedback.
+                    Do NOT reveal the correct answer.
+                    Do NOT praise incorrect answers.
+                    
+                    based on time taken to solve in seconds compared to avgTimeSeconds , give score out of 10 in points
+                    If no answer is submitted for a question, assume it's incorrect and say so in the feedback
+                    """),
+                    ],
+                ),
+    error="Failed to analyze user's coding answer"
+)
+
+gateway.register(
+    "explain_coding",
+    types.GenerateContentConfig(
+        temperature=0.2,
+        top_p=1,
+        top_k=40,
+        max_output_tokens=150,
+        response_mime_type="application/json",
+        response_schema=genai.types.Schema(
+            type = genai.types.Type.OBJECT,
+            required = ["questionid", "feedback"],
+            properties = {
+                "questionid": genai.types.Schema(
+                    type = genai.types.Type.STRING,
+                    description = "ID that links this feedback to the original question",
+                ),
+                "feedback": genai.types.Schema(
+                    type = genai.types.Type.STRING,
+                    description = "One short sentence of encouraging, constructive feedback, not suggestions",
+                ),
+            },
+        ),
+        system_instruction=[
+            types.Part.from_text(text="""You are a Python tutor writing feedback on a student's answer to a coding question.
+                    The answer was already graded by running it against test cases, "isCorrect" and "testResults" hold the outcome. Do NOT change or question the verdict.
+
+                    If isCorrect is true:
+                    feedback: Give brief, positive reinforcement only (e.g. “Well done!” or “Correct.”) in one sentence.
+                    If isCorrect is false:
+                    feedback: State only what the user current code does in one sentence, using the failing tests (e.g. “thats not quite right, your code does ...”) Socratic-style.
+
+                    NEVER:
+                    Do NOT give direct suggestions or code in feedback.
+                    Do NOT reveal the correct answer or the test cases.
+                    Do NOT praise incorrect answers.
+                    """),
                     ],
                 ),
-            ]
-            generate_content_config = types.GenerateContentConfig(
-                temperature=0.5,
-                top_p=0.9,
-                top_k=40,
-                max_output_tokens=2000,
-                response_mime_type="application/json",
-                response_schema=genai.types.Schema(
+    error="Failed to write feedback for user's coding answer"
+)
+
+gateway.register(
+    "check_fill_in",
+    types.GenerateContentConfig(
+        temperature=0.2,
+        top_p=1,
+        top_k=40,
+        max_output_tokens=250,
+        response_mime_type="application/json",
+        response_schema=genai.types.Schema(
+            type = genai.types.Type.OBJECT,
+            required = ["questionid", "user_answer", "isCorrect", "feedback","points"],
+            properties = {
+                "questionid": genai.types.Schema(
+                    type = genai.types.Type.STRING,
+                    description = "ID to link this analysis to the original question",
+                ),
+                "user_answer": genai.types.Schema(
                     type = genai.types.Type.ARRAY,
+                    description = "Array of user-provided answers",
                     items = genai.types.Schema(
-                        type = genai.types.Type.OBJECT,
-                        required = ["question", "correct_answer", "tags", "avgTimeSeconds", "skillLevel"],
-                        properties = {
-                            "question": genai.types.Schema(
-                                type = genai.types.Type.STRING,
-                            ),
-                            "correct_answer": genai.types.Schema(
-                                type = genai.types.Type.STRING,
-                            ),
-                            "tags": genai.types.Schema(
-                                type = genai.types.Type.ARRAY,
-                                items = genai.types.Schema(
-                                    type = genai.types.Type.STRING,
-                                ),
-                            ),
-                            "avgTimeSeconds": genai.types.Schema(
-                                type = genai.types.Type.INTEGER,
-                                description = "Estimated average time in seconds it would take a student to solve the question"
-                            ),
-                            "skillLevel": genai.types.Schema(
-                                type = genai.types.Type.STRING,
-                                enum = ["beginner", "intermediate", "advanced"],
-                                description = "Target student skill level"
-                            )
-                        },
+                        type = genai.types.Type.STRING,
                     ),
                 ),
-                system_instruction=[
-                    types.Part.from_text(text="""Act as an energetic and engaging Python teacher creating 2 unique fill-in-the-blank questions in a JSON array.
-                                    Each question must:
-                                    Be directly based on the given subunit description.
-                                    Be age-appropriate (10–17).
-                                    Contain 1 or 2 blanks, marked clearly as _____.
-                                    Include a correct_answer array matching the blanks in order.
-                                    Strictly follow the structured schema provided.
-                                    Keep the questions clear, relevant, and educational. Avoid repeating concepts or introducing topics outside the subunit’s scope
-                                    A skill level: based on this user input: beginner = never coded, intermediate = some coding knowledge, advanced = knows other programming languages
-                                    """),
+                "isCorrect": genai.types.Schema(
+                    type = genai.types.Type.BOOLEAN,
+                    description = "True if the user’s answers are correct and logical",
+                ),
+                "feedback": genai.types.Schema(
+                    type = genai.types.Type.STRING,
+                    description = "One short constructive sentence. Encouraging if correct, helpful if not, no answer suggestions",
+                ),
+                "points": genai.types.Schema(
+                    type = genai.types.Type.INTEGER,
+                    description = "Score out of 8 based on how well the student's code meets the question's requirements"
+                ),
+            },
+        ),
+        system_instruction=[
+            types.Part.from_text(text="""You are a Python tutor helping assess student answers for fill-in-the-blank Python questions. These questions may contain 1 to 3 blanks, marked as \"_____\".
+
+                Your job is to evaluate if the student's answers fill the blanks logically and correctly, based on the context of the original question.
+
+                You MUST:
+                - Use the original question as the main reference (not the exact correct answer).
+                - Accept alternate correct phrasing or synonyms if they make sense.
+                - Use the expected answers (correct_answer) as a guide, not a strict match.
+                - If the student answer is logically correct, mark it as correct (correct!, great work!).
+                - Keep all feedback to one short sentence, Socratic-style and focused, (not quite right, your code does...), Do NOT give away the correct answer, do not give tips or suggestions
+                
+                based on time taken to solve in seconds compared to avgTimeSeconds , give score out of 7 in points
+                
+                Your response MUST follow this exact JSON schema
+                If no answer is submitted for a question, assume it's incorrect and say so in the feedback"""),
                         ],
-                    )
+                    ),
+    error="failed to analyze user's fill in the blanks answer"
+)
 
-            response = ""
-            for chunk in client.models.generate_content_stream(
-                model=model,
-                contents=contents,
-                config=generate_content_config,
-            ): 
-                print(chunk.text, end="")
-                response += chunk.text
-            return response
-        
-        except Exception as e:
-            return {
-            "error": "Failed to generate fill in the blanks",
-            "details": str(e),
-            "status": 500
-            }
-    
-    def generate_drag_and_drop(prompt):
-        try:
-            client = genai.Client(
-                api_key=os.environ.get("GEMINI_API_KEY"),
-            )
-
-            model = "gemini-2.0-flash"
-            contents = [
-                types.Content(
-                    role="user",
-                    parts=[
-                        types.Part.from_text(text=prompt),
+gateway.register(
+    "check_batch",
+    types.GenerateContentConfig(
+        temperature=0.2,
+        top_p=1,
+        top_k=40,
+        max_output_tokens=2000,
+        response_mime_type="application/json",
+        response_schema=genai.types.Schema(
+            type = genai.types.Type.ARRAY,
+            items = genai.types.Schema(
+                type = genai.types.Type.OBJECT,
+                required = ["questionid", "isCorrect", "feedback", "points"],
+                properties = {
+                    "questionid": genai.types.Schema(
+                        type = genai.types.Type.STRING,
+                        description = "The questionid of the answer this result grades, copied exactly",
+                    ),
+                    "isCorrect": genai.types.Schema(
+                        type = genai.types.Type.BOOLEAN,
+                        description = "True if the answer is correct, copy the given isCorrect when the answer has testResults",
+                    ),
+                    "feedback": genai.types.Schema(
+                        type = genai.types.Type.STRING,
+                        description = "One short sentence of encouraging, constructive feedback, not suggestions",
+                    ),
+                    "points": genai.types.Schema(
+                        type = genai.types.Type.NUMBER,
+                        description = "Score out of 10 for coding answers, out of 7 for fill_in answers",
+                    ),
+                },
+            ),
+        ),
+        system_instruction=[
+            types.Part.from_text(text="""You are a Python tutor grading all of a student's open-ended answers at once.
+                    The input is a JSON array of answers, each with a "type" of "coding" or "fill_in" and a "questionid".
+                    Return exactly one result per answer, in the same order, with the same questionid.
+
+                    For "coding" answers:
+                    Determine if the student's code logically solves the problem stated in the "question" field fully.
+                    Judge whether the code accomplishes what the question ASKS FOR, user answer should match "constraints", if it doesnt, it is incorrect.
+                    If the answer has "testResults", it was already graded by running it: copy its "isCorrect" and only write the feedback.
+                    Score out of 10 in points based on time taken compared to avgTimeSeconds.
+
+                    For "fill_in" answers:
+                    Evaluate if the answers fill the blanks (marked "_____") logically and correctly, based on the context of the question.
+                    Use correct_answer as a guide, not a strict match, and accept alternate correct phrasing.
+                    Score out of 7 in points based on time taken compared to avgTimeSeconds.
+
+                    For every answer:
+                    If CORRECT, feedback: one sentence of brief, positive reinforcement (e.g. “Well done!”).
+                    If INCORRECT, feedback: one sentence stating only what the student's answer does, Socratic-style.
+                    If no answer is submitted, it is incorrect, say so in the feedback.
+
+                    NEVER:
+                    Do NOT give direct suggestions or code in feedback.
+                    Do NOT reveal the correct answer.
+                    Do NOT praise incorrect answers.
+                    """),
                     ],
                 ),
-            ]
-            generate_content_config = types.GenerateContentConfig(
-                temperature=0.5,
-                top_p=0.9,
-                top_k=40,
-                max_output_tokens=2000,
-                response_mime_type="application/json",
-                response_schema=genai.types.Schema(
-                    type = genai.types.Type.ARRAY,
-                    items = genai.types.Schema(
+    error="Failed to grade user's answers"
+)
+
+gateway.register(
+    "generate_hint",
+    types.GenerateContentConfig(
+        temperature=0.4,
+        top_p=1,
+        top_k=40,
+        max_output_tokens=200,
+        response_mime_type="application/json",
+        response_schema=genai.types.Schema(
+            type = genai.types.Type.OBJECT,
+            required = ["questionid", "hint"],
+            properties = {
+                "questionid": genai.types.Schema(
+                    type = genai.types.Type.STRING,
+                    description = "ID that links this hint to the original question",
+                ),
+                "hint": genai.types.Schema(
+                    type = genai.types.Type.STRING,
+                    description = "A Socratic-style hint that nudges the student to think deeper without revealing the answer",
+                ),
+            },
+        ),
+        system_instruction=[
+            types.Part.from_text(text="""You are a Python tutor writing a hint for a student who asked for one after answering a question.
+                    The input has the question, the student's latest answer, whether it was graded correct ("isCorrect") and the feedback they already saw.
+                    The "type" is "coding" or "fill_in", fill_in questions mark their blanks with "_____".
+
+                    If isCorrect is true:
+                    hint: Provide a deeper-thinking challenge (e.g. “now, what if the input was a float instead of an integer?”).
+                    If isCorrect is false:
+                    hint: Use a Socratic-style question that nudges the student to figure out what went wrong, without revealing the solution (e.g. “How do we usually get input from the user?”).
+                    If no answer was submitted, the hint should point at the concept behind the question.
+
+                    NEVER:
+                    Do NOT give direct suggestions or code in the hint.
+                    Do NOT reveal the correct answer.
+                    Do NOT repeat the feedback.
+                    """),
+                    ],
+                ),
+    error="Failed to write a hint for user's answer"
+)
+
+gateway.register(
+    "check_performance",
+    types.GenerateContentConfig(
+        temperature=0,
+        top_p=1,
+        top_k=40,
+        max_output_tokens=300,
+        response_mime_type="application/json",
+        response_schema=genai.types.Schema(
                         type = genai.types.Type.OBJECT,
-                        required = ["question", "correct_answer", "options", "tags",  "avgTimeSeconds", "skillLevel"],
+                        required = ["levelSuggestion", "aiSummary", "feedbackPrompt"],
                         properties = {
-                            "question": genai.types.Schema(
-                                type = genai.types.Type.STRING,
-                            ),
-                            "correct_answer": genai.types.Schema(
-                                type = genai.types.Type.ARRAY,
-                                items = genai.types.Schema(
-                                    type = genai.types.Type.STRING,
-                                ),
-                            ),
-                            "options": genai.types.Schema(
-                                type = genai.types.Type.ARRAY,
-                                items = genai.types.Schema(
-                                    type = genai.types.Type.STRING,
-                                ),
-                            ),
-                            "tags": genai.types.Schema(
-                                type = genai.types.Type.ARRAY,
-                                items = genai.types.Schema(
-                                    type = genai.types.Type.STRING,
-                                ),
-                            ),
-                            "avgTimeSeconds": genai.types.Schema(
+                            "levelSuggestion": genai.types.Schema(
                                 type = genai.types.Type.INTEGER,
-                                description = "Estimated average time in seconds it would take a student to solve the question"
+                                description = "Recommended skill level (1 = Beginner, 2 = Intermediate, 3 = Advanced)",
                             ),
-                            "skillLevel": genai.types.Schema(
+                            "aiSummary": genai.types.Schema(
                                 type = genai.types.Type.STRING,
-                                enum = ["beginner", "intermediate", "advanced"],
-                                description = "Target student skill level"
+                                description = "Short summary of user performance to be shown on the dashboard",
+                            ),
+                            "feedbackPrompt": genai.types.Schema(
+                                type = genai.types.Type.STRING,
+                                description = "Message to show the user in a popup when a level change is suggested",
                             ),
                         },
                     ),
-                ),
-                system_instruction=[
-                    types.Part.from_text(text="""Act as an engaging Python instructor. Generate 2 unique drag-and-drop Python questions in a JSON array.
-                                        Each question must:
-                                        - Be clearly tied to the provided subunit description
-                                        - Include stricktly 2 to 3 blanks in the code or question to be filled in (use `_____`), or include blanks at the end of the question if the question asks to "Drag the correct blocks into the blanks"
-                                        - Be age-appropriate (10–17), fun, and educational
-                                        - Include a `question` (context with blanks), `correct_answer` (ordered list), and `options` (correct answers + distractors)
-                                        - Follow the JSON schema exactly
-
-                                        Do NOT repeat the same pattern, and don’t go beyond the subunit scope.
-                                        A skill level: based on this user input: beginner = never coded, intermediate = some coding knowledge, advanced = knows other programming languages
-                                        """),
-                ],
-            )
-
-            response = ""
-            for chunk in client.models.generate_content_stream(
-                model=model,
-                contents=contents,
-                config=generate_content_config,
-            ): 
-                print(chunk.text, end="")
-                response += chunk.text
-            return response    
-        except Exception as e:
-            return {
-            "error": "Failed to generate drag and drop",
-            "details": str(e),
-            "status": 500
-            }  
-    
+        system_instruction=[
+            types.Part.from_text(text="""You are an AI tutor evaluating Python learners' progress.
+                    Based on subunit-level stats, do three things:
+                    1. Write a short summary for dashboard
+                    2. Suggest level change, 
+                    3. Give popup message to user if level change is needed
+                    When evaluating performance:
+                        - Look at correct vs total answers ratio
+                        - Consider time spent vs average time
+                        - Review tag performance to identify strength/weakness areas
+                        - Analyze progress across multiple subunits
+                        - Consider current skill level when making recommendations
+                    """),
+        ],
+    ),
+    error="failed to analyze user's performance"
+)
+
+class Prompt:
+    # each method returns an LLMResult, .data holds the parsed json when .ok
+    @staticmethod
+    def generate_MCQ(prompt):
+        return gateway.call("generate_mcq", prompt)
+
+    @staticmethod
+    def generate_coding(prompt):
+        return gateway.call("generate_coding", prompt)
+
+    @staticmethod
+    def generate_fill_in(prompt):
+        return gateway.call("generate_fill_in", prompt)
+
+    @staticmethod
+    def generate_drag_and_drop(prompt):
+        return gateway.call("generate_drag_and_drop", prompt)
+
+    # streamed versions of the generators, they yield the json array text as it
+    # arrives and raise LLMError on failure
+    @staticmethod
+    def stream_MCQ(prompt):
+        return gateway.stream("generate_mcq", prompt)
+
+    @staticmethod
+    def stream_coding(prompt):
+        return gateway.stream("generate_coding", prompt)
+
+    @staticmethod
+    def stream_fill_in(prompt):
+        return gateway.stream("generate_fill_in", prompt)
+
+    @staticmethod
+    def stream_drag_and_drop(prompt):
+        return gateway.stream("generate_drag_and_drop", prompt)
+
     @staticmethod
     def check_coding(input_data):
-        try:
-            client = genai.Client(
-                api_key=os.environ.get("GEMINI_API_KEY"),
-            )
-
-            model = "gemini-2.0-flash"
-            contents = [
-                types.Content(
-                    role="user",
-                    parts=[
-                        types.Part.from_text(text = input_data),
-                    ],
-                ),
-            ]
-            generate_content_config = types.GenerateContentConfig(
-                temperature=0.2,
-                top_p=1,
-                top_k=40,
-                max_output_tokens=500,
-                response_mime_type="application/json",
-                response_schema=genai.types.Schema(
-                    type = genai.types.Type.OBJECT,
-                    required = ["questionid", "user_answer", "hint", "feedback", "isCorrect", "points"],
-                    properties = {
-                        "questionid": genai.types.Schema(
-                            type = genai.types.Type.STRING,
-                            description = "ID that links this feedback to the original question",
-                        ),
-                        "user_answer": genai.types.Schema(
-                            type = genai.types.Type.STRING,
-                            description = "The student's submitted code or answer",
-                        ),
-                        "hint": genai.types.Schema(
-                            type = genai.types.Type.STRING,
-                            description = "A Socratic-style hint that nudges the student to think deeper without revealing the answer",
-                        ),
-                        "feedback": genai.types.Schema(
-                            type = genai.types.Type.STRING,
-                            description = "Encouraging, constructive feedback with high-level observations, not suggestions",
-                        ),
-                        "isCorrect": genai.types.Schema(
-                            type = genai.types.Type.BOOLEAN,
-                            description = "True if the user's answer logically solves the question as written. False otherwise",
-                        ),
-                        "points": genai.types.Schema(
-                            type = genai.types.Type.NUMBER,
-                            description = "Score out of 10 based on how well the student's code meets the question's requirements",
-                        ),
-                    },
-                ),
-                system_instruction=[
-                    types.Part.from_text(text="""You are a Python tutor analyzing a student's answer to a coding question.
-                            Determine if the student's code logically solves the problem described or stated in the "question" field fully.
-                            Do NOT compare to "correct_answer" literally. Instead, judge whether the code accomplishes what the question ASKS FOR.
-                            user answer should match "constraints", if it doesnt, the user answer is incorrect.
-
-                            If the solution is CORRECT:
-                            feedback: Give brief, positive reinforcement only (e.g. “Well done!” or “Correct.”) and briefly explain the users currect answer.
-                            hint: Provide a deeper-thinking challenge (e.g. “now, what if the input was a float instead of an integer?”).
-                            If the solution is INCORRECT:
-                            user answer doesnt apply the "constraints".
-                            feedback: State only what the user current code does (e.g. “thats not quite right, your code does ...”) Socratic-style.
-                            hint: Use a Socratic-style question that nudges the student to figure out what went wrong, without revealing the solution (e.g. “How do we usually get input from the user?”).
-
-                            NEVER:
-                            Do NOT give direct suggestions or code in feedback or hint.
-                            Do NOT reveal the correct answer.
-                            Do NOT praise incorrect answers.
-                            
-                            based on time taken to solve in seconds compared to avgTimeSeconds , give score out of 10 in points
-                            If no answer is submitted for a question, assume it's incorrect and provide feedback and a hint that explain the correct approach or concept behind the question
-                            """),
-                            ],
-                        )
-
-            response = ""
-            for chunk in client.models.generate_content_stream(
-                model=model,
-                contents=contents,
-                config=generate_content_config,
-            ): 
-                print(chunk.text, end="")
-                response += chunk.text
-            return response
-        except Exception as e:
-            return {
-            "error": "Failed to analyze user's coding answer",
-            "details": str(e),
-            "status": 500
-        }
-       
+        return gateway.call("check_coding", input_data)
+
+    @staticmethod
+    def explain_coding(input_data):
+        return gateway.call("explain_coding", input_data)
+
     @staticmethod
     def check_fill_in(input_data):
-        try:
-            client = genai.Client(
-                api_key=os.environ.get("GEMINI_API_KEY"),
-            )
-
-            model = "gemini-2.0-flash"
-            contents = [
-                types.Content(
-                    role="user",
-                    parts=[
-                        types.Part.from_text(text = input_data),
-                    ],
-                ),
-            ]
-            generate_content_config = types.GenerateContentConfig(
-                temperature=0.2,
-                top_p=1,
-                top_k=40,
-                max_output_tokens=500,
-                response_mime_type="application/json",
-                response_schema=genai.types.Schema(
-                    type = genai.types.Type.OBJECT,
-                    required = ["questionid", "user_answer", "isCorrect", "hint", "feedback","points"],
-                    properties = {
-                        "questionid": genai.types.Schema(
-                            type = genai.types.Type.STRING,
-                            description = "ID to link this analysis to the original question",
-                        ),
-                        "user_answer": genai.types.Schema(
-                            type = genai.types.Type.ARRAY,
-                            description = "Array of user-provided answers",
-                            items = genai.types.Schema(
-                                type = genai.types.Type.STRING,
-                            ),
-                        ),
-                        "isCorrect": genai.types.Schema(
-                            type = genai.types.Type.BOOLEAN,
-                            description = "True if the user’s answers are correct and logical",
-                        ),
-                        "hint": genai.types.Schema(
-                            type = genai.types.Type.STRING,
-                            description = "Socratic-style hint guiding student thinking without giving the answer",
-                        ),
-                        "feedback": genai.types.Schema(
-                            type = genai.types.Type.STRING,
-                            description = "Constructive comment. Encouraging if correct, helpful if not, no answer suggestions",
-                        ),
-                        "points": genai.types.Schema(
-                            type = genai.types.Type.INTEGER,
-                            description = "Score out of 8 based on how well the student's code meets the question's requirements"
-                        ),
-                    },
-                ),
-                system_instruction=[
-                    types.Part.from_text(text="""You are a Python tutor helping assess student answers for fill-in-the-blank Python questions. These questions may contain 1 to 3 blanks, marked as \"_____\".
-
-                        Your job is to evaluate if the student's answers fill the blanks logically and correctly, based on the context of the original question.
-
-                        You MUST:
-                        - Use the original question as the main reference (not the exact correct answer).
-                        - Accept alternate correct phrasing or synonyms if they make sense.
-                        - Use the expected answers (correct_answer) as a guide, not a strict match.
-                        - If the student answer is logically correct, mark it as correct (correct!, great work!).
-                        - for hints, use a short Socratic-style hint (that encourages thinking without giving the answer).
-                        - Keep all feedback short, Socratic-style and focused, (not quite right, your code does...), Do NOT give away the correct answer, do not give tips or suggestions
-                        
-                        based on time taken to solve in seconds compared to avgTimeSeconds , give score out of 7 in points
-                        
-                        Your response MUST follow this exact JSON schema
-                        If no answer is submitted for a question, assume it's incorrect and provide feedback and a hint that explain the correct approach or concept behind the question"""),
-                                ],
-                            )
-
-            response = ""
-            for chunk in client.models.generate_content_stream(
-                model=model,
-                contents=contents,
-                config=generate_content_config,
-            ): 
-                print(chunk.text, end="")
-                response += chunk.text
-            return response
-        
-        except Exception as e:
-            return {
-            "error": "failed to analyze user's fill in the blanks answer",
-            "details": str(e),
-            "status": 500
-        }
-    
+        return gateway.call("check_fill_in", input_data)
+
+    @staticmethod
+    def check_batch(input_data):
+        return gateway.call("check_batch", input_data)
+
+    @staticmethod
+    def generate_hint(input_data):
+        return gateway.call("generate_hint", input_data)
+
     @staticmethod
     def check_performance(data):
-        try:   
-            client = genai.Client(
-                api_key=os.environ.get("GEMINI_API_KEY"),
-            )
-
-            model = "gemini-2.0-flash"
-            contents = [
-                types.Content(
-                    role="user",
-                    parts=[
-                        types.Part.from_text(text=data),
-                    ],
-                ),
-            ]
-            generate_content_config = types.GenerateContentConfig(
-                temperature=0,
-                top_p=1,
-                top_k=40,
-                max_output_tokens=300,
-                response_mime_type="application/json",
-                response_schema=genai.types.Schema(
-                                type = genai.types.Type.OBJECT,
-                                required = ["levelSuggestion", "aiSummary", "feedbackPrompt"],
-                                properties = {
-                                    "levelSuggestion": genai.types.Schema(
-                                        type = genai.types.Type.INTEGER,
-                                        description = "Recommended skill level (1 = Beginner, 2 = Intermediate, 3 = Advanced)",
-                                    ),
-                                    "aiSummary": genai.types.Schema(
-                                        type = genai.types.Type.STRING,
-                                        description = "Short summary of user performance to be shown on the dashboard",
-                                    ),
-                                    "feedbackPrompt": genai.types.Schema(
-                                        type = genai.types.Type.STRING,
-                                        description = "Message to show the user in a popup when a level change is suggested",
-                                    ),
-                                },
-                            ),
-                system_instruction=[
-                    types.Part.from_text(text="""You are an AI tutor evaluating Python learners' progress.
-                            Based on subunit-level stats, do three things:
-                            1. Write a short summary for dashboard
-                            2. Suggest level change, 
-                            3. Give popup message to user if level change is needed
-                            When evaluating performance:
-                                - Look at correct vs total answers ratio
-                                - Consider time spent vs average time
-                                - Review tag performance to identify strength/weakness areas
-                                - Analyze progress across multiple subunits
-                                - Consider current skill level when making recommendations
-                            """),
-                ],
-            )
-
-            response = ""
-            for chunk in client.models.generate_content_stream(
-                model=model,
-                contents=contents,
-                config=generate_content_config,
-            ): 
-                print(chunk.text, end="")
-                response += chunk.text
-            return response
-        except Exception as e:
-            return {
-            "error": "failed to analyze user's performance",
-            "details": str(e),
-            "status": 500
-        }
-    
\ No newline at end of file
+        return gateway.call("check_performance", data)
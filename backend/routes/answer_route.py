@@ -1,11 +1,21 @@
 import json
-from flask import Blueprint, request, jsonify
-from services.answer_service import Answer
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from services.answer_service import Answer, idempotency_store
+from services.idempotency import IdempotencyStore, IdempotencyConflict, IdempotencyTimeout
 from services.user_service import UserService
 from utils.auth import verify_token
 
 answer_bp = Blueprint("answer_bp", __name__)
 
+def idempotency_key():
+    # returns (key, error response), key is None when the header wasnt sent
+    key = request.headers.get("Idempotency-Key", "").strip()
+    if not key:
+        return None, None
+    if len(key) > IdempotencyStore.MAX_KEY_LENGTH:
+        return None, (jsonify({"error": "Idempotency-Key is too long"}), 400)
+    return key, None
+
 @answer_bp.route("/submit-answers", methods=["POST"])
 def submit_answers():
     try:
@@ -32,8 +42,133 @@ def submit_answers():
         if not isinstance(answers_data, list):
             return jsonify({"error": "payload must be a list of answers"}), 400
 
-        results = Answer.submit_answers(user_id, answers_data, skill_level)
-        return jsonify(results), 200
+        def grade():
+            # "Prefer: respond-async" queues the grading and answers 202 with a job id to poll
+            if "respond-async" in request.headers.get("Prefer", ""):
+                job_id = Answer.enqueue_submission(user_id, answers_data, skill_level)
+                return {"jobId": job_id, "status": "queued"}, 202
+            return Answer.submit_answers(user_id, answers_data, skill_level), 200
+
+        key, error = idempotency_key()
+        if error:
+            return error
+        replayed = False
+        if key:
+            try:
+                body, status, replayed = idempotency_store.run(user_id, "submit-answers", key, raw_data, grade)
+            except IdempotencyConflict as e:
+                return jsonify({"error": str(e)}), 422
+            except IdempotencyTimeout as e:
+                return jsonify({"error": str(e)}), 409
+        else:
+            body, status = grade()
+
+        response = jsonify(body)
+        if status == 202:
+            response.headers["Location"] = f"/api/grading-jobs/{body['jobId']}"
+            response.headers["Preference-Applied"] = "respond-async"
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        return response, status
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# same payload as /submit-answers, answered as server-sent events: one "result"
+# event per answer as soon as it is graded, then a "done" event with the total
+@answer_bp.route("/submit-answers/stream", methods=["POST"])
+def submit_answers_stream():
+    try:
+        auth_result = verify_token()
+        if isinstance(auth_result, tuple):
+            return jsonify(auth_result[0]), auth_result[1]
+        user_id = auth_result["id"]
+
+        user_profile, status = UserService.get_user_profile(auth_result)
+        if status != 200:
+            return jsonify(user_profile), status
+
+        skill_level = user_profile["chosenSkillLevel"]
+
+        raw_data = request.get_data(as_text=True)
+        try:
+            answers_data = json.loads(raw_data)
+        except json.JSONDecodeError as e:
+            return jsonify({"error": f"Invalid JSON: {str(e)}"}), 400
+
+        if not isinstance(answers_data, list):
+            return jsonify({"error": "payload must be a list of answers"}), 400
+
+        key, error = idempotency_key()
+        if error:
+            return error
+        entry, stored = None, None
+        if key:
+            try:
+                entry, stored = idempotency_store.begin(user_id, "submit-answers/stream", key, raw_data)
+            except IdempotencyConflict as e:
+                return jsonify({"error": str(e)}), 422
+            except IdempotencyTimeout as e:
+                return jsonify({"error": str(e)}), 409
+
+        def format_event(event, data):
+            return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+        def events():
+            if stored is not None:
+                # a repeat of a finished submission gets the same events again
+                for event, data in stored[0]:
+                    yield format_event(event, data)
+                return
+            for event, data in submission:
+                yield format_event(event, data)
+
+        def finished(sent):
+            # only a submission that reached "done" is replayable, a failed one can be retried
+            if entry is not None:
+                if sent and sent[-1][0] == "done":
+                    idempotency_store.finish(entry, sent, 200)
+                else:
+                    idempotency_store.forget(entry)
+
+        # grading starts here and carries on if the client goes away, the
+        # response only reads its events
+        submission = None
+        if stored is None:
+            submission = Answer.stream_submission(user_id, answers_data, skill_level, finished)
+
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        if stored is not None:
+            headers["Idempotent-Replayed"] = "true"
+        return Response(stream_with_context(events()), mimetype="text/event-stream", headers=headers)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# status of a queued submission, "result" has the submit-answers response once "status" is "done"
+@answer_bp.route("/grading-jobs/<job_id>", methods=["GET"])
+def get_grading_job(job_id):
+    try:
+        auth_result = verify_token()
+        if isinstance(auth_result, tuple):
+            return jsonify(auth_result[0]), auth_result[1]
+
+        job, status = Answer.grading_job(auth_result["id"], job_id)
+        return jsonify(job), status
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# the hint for the user's latest answer to a question, generated on first request
+@answer_bp.route("/answers/<int:question_id>/hint", methods=["GET"])
+def get_answer_hint(question_id):
+    try:
+        auth_result = verify_token()
+        if isinstance(auth_result, tuple):
+            return jsonify(auth_result[0]), auth_result[1]
+
+        hint, status = Answer.get_hint(auth_result["id"], question_id)
+        return jsonify(hint), status
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
@@ -1,13 +1,17 @@
 from flask import Blueprint, request, jsonify
 from services.course_service import CourseService
+from config.settings import CATALOG_MAX_AGE_SECONDS
 from utils.auth import verify_token
+from utils.http_cache import negotiated_response
 
 course_bp = Blueprint("course_bp", __name__)
 
 @course_bp.route("/courses", methods=["GET"])
 def get_courses():
     data, status_code = CourseService.get_courses()
-    return jsonify(data), status_code
+    if status_code != 200:
+        return jsonify(data), status_code
+    return negotiated_response(data.bodies, data.etag, CATALOG_MAX_AGE_SECONDS)
 
 @course_bp.route("/questions", methods=["GET"])
 def get_questions():
@@ -0,0 +1,13 @@
+from flask import Blueprint, jsonify
+from utils.auth import verify_token
+from utils.metrics import metrics
+
+metrics_bp = Blueprint("metrics_bp", __name__)
+
+# counters reveal traffic and cache internals, signed-in users only
+@metrics_bp.route("/metrics", methods=["GET"])
+def get_metrics():
+    auth_result = verify_token()
+    if isinstance(auth_result, tuple):
+        return jsonify(auth_result[0]), auth_result[1]
+    return jsonify(metrics.snapshot()), 200
@@ -1,4 +1,5 @@
-from flask import Blueprint, request, jsonify
+import json
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from services.question_service import *
 from services.user_service import *
 from utils.auth import verify_token
@@ -30,3 +31,28 @@ def generate_questions(subunit_id):
            
     result, status_code = Questions.generate_questions(subunit_id, user_profile)
     return jsonify(result), int(status_code)
+
+# same generation as above, answered as server-sent events: a "question" event for
+# each new question the page shows as soon as it is saved, then a "done" event
+@question_bp.route("/subunits/<int:subunit_id>/generate-questions/stream", methods=["POST"])
+def generate_questions_stream(subunit_id):
+    auth_result = verify_token()
+    if isinstance(auth_result, tuple):
+        return jsonify(auth_result[0]), auth_result[1]
+    user_profile, status = UserService.get_user_profile(auth_result)
+    if status != 200:
+        return jsonify(user_profile), status
+
+    skill_level = user_profile["chosenSkillLevel"]
+    if skill_level not in Questions.TYPE_LIMITS:
+        return jsonify({"error": "Invalid skill level provided"}), 400
+
+    def events():
+        for event, data in Questions.stream_questions(subunit_id, skill_level):
+            yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from services.subunit_service import SubunitService
+from config.settings import CONTENT_MAX_AGE_SECONDS
 from utils.auth import verify_token
+from utils.http_cache import negotiated_response
 
 subunit_bp = Blueprint("subunit_bp", __name__)
 
@@ -8,7 +10,9 @@ subunit_bp = Blueprint("subunit_bp", __name__)
 @subunit_bp.route("/subunit/<int:subunit_id>", methods=["GET"])
 def get_subunit_content(subunit_id):
     data, status_code = SubunitService.get_subunit_content(subunit_id)
-    return jsonify(data), status_code
+    if status_code != 200:
+        return jsonify(data), status_code
+    return negotiated_response(data.bodies, data.etag, CONTENT_MAX_AGE_SECONDS)
 
 
 @subunit_bp.route("/subunit", methods=["POST"])
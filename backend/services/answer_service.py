@@ -1,11 +1,62 @@
 from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed, wait
 import json 
 from prompt import Prompt 
-from config.settings import supabase_client 
+from services.points_service import PointsService
+from services.fill_in_grader import FillInGrader
+from services.code_runner import CodeRunner, TIME_LIMIT, KILLED
+from services.constraint_checker import ConstraintChecker
+from services.verdict_cache import VerdictCache
+from services.grading_queue import GradingQueue, make_job_store
+from services.idempotency import IdempotencyStore
+from services.seen_index import SeenIndex
+from config.settings import (
+    supabase_client, GRADING_MAX_WORKERS, GRADING_DEADLINE_SECONDS, CODE_RUNNER_WORKERS,
+    CODE_RUNNER_CPU_SECONDS, CODE_RUNNER_MEMORY_MB, CODE_RUNNER_WALL_SECONDS, CODE_RUNNER_ISOLATION,
+    CODE_RUNNER_QUEUE_SECONDS,
+    VERDICT_CACHE_MAX_ENTRIES, VERDICT_CACHE_TTL_SECONDS, VERDICT_CACHE_MAX_BYTES, BATCH_GRADING,
+    GRADING_QUEUE_BACKEND, GRADING_QUEUE_PATH, GRADING_QUEUE_WORKERS, GRADING_QUEUE_POLL_SECONDS,
+    GRADING_QUEUE_RETENTION_SECONDS, GRADING_QUEUE_LEASE_SECONDS, IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_MAX_ENTRIES,
+    SEEN_INDEX_MAX_USERS, SEEN_INDEX_TTL_SECONDS
+)
+from utils.metrics import metrics
+from utils.single_flight import SingleFlight
+
+# shared by every request so GRADING_MAX_WORKERS caps gemini calls process-wide
+grading_pool = ThreadPoolExecutor(max_workers=max(1, GRADING_MAX_WORKERS), thread_name_prefix="grader")
+
+# each test case runs in its own sandboxed interpreter, CODE_RUNNER_WORKERS answers at a time
+code_runner = CodeRunner(
+    workers=CODE_RUNNER_WORKERS,
+    cpu_seconds=CODE_RUNNER_CPU_SECONDS,
+    memory_mb=CODE_RUNNER_MEMORY_MB,
+    wall_seconds=CODE_RUNNER_WALL_SECONDS,
+    isolation=CODE_RUNNER_ISOLATION,
+    queue_seconds=CODE_RUNNER_QUEUE_SECONDS
+)
+
+verdict_cache = VerdictCache(
+    max_entries=VERDICT_CACHE_MAX_ENTRIES,
+    ttl_seconds=VERDICT_CACHE_TTL_SECONDS,
+    max_bytes=VERDICT_CACHE_MAX_BYTES
+)
+
+# a retried submission replays the first response instead of grading and awarding twice
+idempotency_store = IdempotencyStore(
+    max_entries=IDEMPOTENCY_MAX_ENTRIES,
+    ttl_seconds=IDEMPOTENCY_TTL_SECONDS,
+    wait_seconds=GRADING_DEADLINE_SECONDS + 15
+)
+
+# streamed submissions are graded and saved on their own thread, a client that
+# disconnects only stops reading, its answers and points are still saved
+submission_flight = SingleFlight("answers.submission_stream")
 
 class ScoreCalculator:
     BASE_POINTS = {
         1: 5,  # MCQ
+        2: 10, # Coding, when graded by its test cases
         4: 8   # Drag-drop
     }
     
@@ -25,10 +76,46 @@ class ScoreCalculator:
         time_bonus = 4 if time_taken < avg_time else 0
 
         total = base_score + skill_bonus + time_bonus - retry_penalty
-        return max(total)
+        return max(0, total)
+
+class AnswerPrefetch:
+    # question rows and the users previous answers for a whole submission,
+    # loaded with one in_() query per table instead of one query per answer
+    QUESTION_FIELDS = "questionID, lessonID, questionText, correctAnswer, constraints, avgTimeSeconds, testCases, constraintRules"
+
+    def __init__(self, questions, answers):
+        self.questions = questions
+        self.answers = answers
+
+    @staticmethod
+    def load(user_id, question_ids):
+        ids = list({qid for qid in question_ids if qid is not None})
+        if not ids:
+            return AnswerPrefetch({}, {})
+
+        questions = supabase_client.table("Question") \
+            .select(AnswerPrefetch.QUESTION_FIELDS) \
+            .in_("questionID", ids) \
+            .execute()
+        answers = supabase_client.table("Answer") \
+            .select("answerID, questionID, retry") \
+            .eq("userID", user_id) \
+            .in_("questionID", ids) \
+            .execute()
+
+        return AnswerPrefetch(
+            {str(q["questionID"]): q for q in questions.data or []},
+            {str(a["questionID"]): a for a in answers.data or []}
+        )
+
+    def question(self, question_id):
+        return self.questions.get(str(question_id))
+
+    def answer(self, question_id):
+        return self.answers.get(str(question_id))
 
 class Answer:
-    def __init__(self, answer_data, user_id, skill_level=None):
+    def __init__(self, answer_data, user_id, skill_level=None, prefetch=None):
         if isinstance(answer_data, str):
             answer_data = json.loads(answer_data)
         
@@ -42,18 +129,36 @@ class Answer:
         delta = self.end_time - self.start_time
         self.time_taken = max(1, int(delta.total_seconds()))
 
+        self.lesson_id = None
         self.question_text = ""
         self.correct_answer = ""
         self.constraints = ""
         self.avg_time = 90
+        self.test_cases = []
+        self.constraint_rules = []
+        self.test_results = None
+        # cleared when the verdict came from a fallback (runner failure, stock
+        # feedback), those arent what the next submitter of this answer should get
+        self.cacheable = True
 
         self.is_correct = False
+        self.base_points = 0
         self.points = 0
         self.feedback = ""
+        # hints are written on request by get_hint, a new attempt clears the old one
         self.hint = ""
-        self.retry = self.get_retry_count()
 
-        self.load_question_metadata()
+        # the expected attempt, persist_all replaces it with the one the db stored
+        if prefetch is None:
+            self.retry = self.get_retry_count()
+            self.load_question_metadata()
+        else:
+            existing = prefetch.answer(self.question_id)
+            self.retry = existing.get("retry", 0) + 1 if existing else 0
+            q = prefetch.question(self.question_id)
+            if q is None:
+                raise Exception("Failed to load question info: question not found")
+            self.apply_question_metadata(q)
 
     def get_retry_count(self):
         try:
@@ -73,46 +178,117 @@ class Answer:
     def load_question_metadata(self):
         try:
             res = supabase_client.table("Question") \
-                .select("questionText", "correctAnswer", "constraints", "avgTimeSeconds") \
+                .select("lessonID", "questionText", "correctAnswer", "constraints", "avgTimeSeconds", "testCases", "constraintRules") \
                 .eq("questionID", self.question_id) \
                 .single() \
                 .execute()
-            q = res.data
-            
-            self.question_text = q.get("questionText", "")
-            self.correct_answer = q.get("correctAnswer", "")
-            self.constraints = q.get("constraints", "")
-            self.avg_time = q.get("avgTimeSeconds", 90)
-            
-            if isinstance(self.correct_answer, str):
-                try:
-                    self.correct_answer = json.loads(self.correct_answer)
-                except json.JSONDecodeError:
-                    pass
-                    
-            if isinstance(self.constraints, str):
-                try:
-                    self.constraints = json.loads(self.constraints)
-                except json.JSONDecodeError:
-                    pass
+            self.apply_question_metadata(res.data)
         except Exception as e:
             raise Exception("Failed to load question info: " + str(e))
 
-    def validate(self):
+    def apply_question_metadata(self, q):
+        self.lesson_id = q.get("lessonID")
+        self.question_text = q.get("questionText", "")
+        self.correct_answer = q.get("correctAnswer", "")
+        self.constraints = q.get("constraints", "")
+        self.avg_time = q.get("avgTimeSeconds", 90)
+        self.test_cases = q.get("testCases") or []
+        self.constraint_rules = q.get("constraintRules") or []
+        
+        if isinstance(self.correct_answer, str):
+            try:
+                self.correct_answer = json.loads(self.correct_answer)
+            except json.JSONDecodeError:
+                pass
+                
+        if isinstance(self.constraints, str):
+            try:
+                self.constraints = json.loads(self.constraints)
+            except json.JSONDecodeError:
+                pass
+
+        if isinstance(self.test_cases, str):
+            try:
+                self.test_cases = json.loads(self.test_cases)
+            except json.JSONDecodeError:
+                self.test_cases = []
+
+        if self.test_cases and not code_runner.available():
+            # no sandbox on this host, gemini grades the code on its own
+            self.test_cases = []
+            self.cacheable = False
+
+        if isinstance(self.constraint_rules, str):
+            try:
+                self.constraint_rules = json.loads(self.constraint_rules)
+            except json.JSONDecodeError:
+                self.constraint_rules = []
+
+    def resolve_locally(self):
+        # applies an in-process or cached verdict, False when gemini is needed
+        verdict = self.local_verdict()
+        if verdict is None:
+            verdict = verdict_cache.get(self.question_id, self.question_type_id, self.user_answer)
+        if verdict is None:
+            return False
+        self.apply_verdict(verdict)
+        return True
+
+    def store_verdict(self, verdict, cost_seconds):
+        if self.cacheable:
+            verdict_cache.put(self.question_id, self.question_type_id, self.user_answer, verdict, cost_seconds)
+        else:
+            metrics.incr("verdict_cache.skipped")
+        self.apply_verdict(verdict)
+
+    def apply_verdict(self, verdict):
+        # verdict points are the base score, bonuses depend on this attempt
+        self.is_correct = verdict.get("isCorrect", False)
+        self.feedback = verdict.get("feedback", "")
+        self.base_points = int(verdict.get("points", 0))
+        self.points = self.score(self.retry)
+
+    def score(self, retry):
+        return ScoreCalculator.apply_bonuses(
+            base_score=self.base_points,
+            is_correct=self.is_correct,
+            retry=retry,
+            time_taken=self.time_taken,
+            avg_time=self.avg_time,
+            skill_level=self.skill_level
+        )
+
+    def local_verdict(self):
+        # verdicts we can reach in-process, None means the answer needs remote_verdict
         if self.question_type_id in (1, 4):
-            self.is_correct = self.user_answer == self.correct_answer
-            base_score = ScoreCalculator.BASE_POINTS[self.question_type_id]
-            self.points = ScoreCalculator.apply_bonuses(
-                base_score=base_score,
-                is_correct=self.is_correct,
-                retry=self.retry,
-                time_taken=self.time_taken,
-                avg_time=self.avg_time,
-                skill_level=self.skill_level
-            )
-            self.feedback = "Correct!" if self.is_correct else "Incorrect"
-            return
+            is_correct = self.user_answer == self.correct_answer
+            return {
+                "isCorrect": is_correct,
+                "feedback": "Correct!" if is_correct else "Incorrect",
+                "points": ScoreCalculator.BASE_POINTS[self.question_type_id]
+            }
+
+        if self.question_type_id == 2:
+            # blank, unparsable or rule-breaking code is wrong whatever gemini would say
+            ok, reason = ConstraintChecker.check(self.user_answer, self.constraint_rules)
+            if not ok:
+                return {"isCorrect": False, "feedback": reason, "points": 0}
+            return None
+
+        if self.question_type_id == 3:
+            verdict, base_score = FillInGrader.grade(self.user_answer, self.correct_answer)
+            if verdict == FillInGrader.AMBIGUOUS:
+                return None
+            is_correct = verdict == FillInGrader.CORRECT
+            return {
+                "isCorrect": is_correct,
+                "feedback": "Correct!" if is_correct else "No answer submitted",
+                "points": base_score
+            }
+
+        raise Exception("Unsupported question type")
 
+    def grading_payload(self):
         if self.question_type_id == 2:
             payload = {
                 "questionid": self.question_id,
@@ -122,144 +298,524 @@ class Answer:
                 "avgTimeSeconds": self.avg_time,
                 "timeTaken": self.time_taken
             }
-            raw_response = Prompt.check_coding(json.dumps(payload))
+            results = self.run_tests() if self.test_cases else None
+            if results is not None:
+                payload["isCorrect"] = all(r["passed"] for r in results)
+                payload["testResults"] = [{"passed": r["passed"], "error": r["error"]} for r in results]
+            return payload
 
-        elif self.question_type_id == 3:
-            parsed_answer = self.correct_answer
-            payload = {
-                "questionid": self.question_id,
-                "user_answer": self.user_answer,
-                "correct_answer": parsed_answer,
-                "avgTimeSeconds": self.avg_time,
-                "timeTaken": self.time_taken
-            }
-            raw_response = Prompt.check_fill_in(json.dumps(payload))
+        return {
+            "questionid": self.question_id,
+            "user_answer": self.user_answer,
+            "correct_answer": self.correct_answer,
+            "avgTimeSeconds": self.avg_time,
+            "timeTaken": self.time_taken
+        }
 
+    def run_tests(self):
+        # None when the runner couldnt grade the answer, it is graded without tests then
+        if self.test_results is None and self.test_cases:
+            try:
+                results = code_runner.run(self.user_answer, self.test_cases)
+            except Exception:
+                results = None
+            self.use_test_results(results)
+        return self.test_results
+
+    def use_test_results(self, results):
+        # a busy or broken runner says nothing about the code, so that isnt a
+        # failed test: the tests are dropped and gemini grades the answer alone
+        if results is None or any(r.get("infra") for r in results):
+            metrics.incr("grading.sandbox_fallbacks")
+            self.test_cases = []
+            self.test_results = None
+            self.cacheable = False
         else:
-            raise Exception("Unsupported question type")
-        
-        response = json.loads(raw_response) if isinstance(raw_response, str) else raw_response
+            self.test_results = results
+            # a timeout or kill can be the host being loaded rather than the
+            # code, good enough for this attempt but not for the next one
+            if any(r.get("error") in (TIME_LIMIT["error"], KILLED["error"]) for r in results):
+                self.cacheable = False
+
+    def remote_verdict(self):
+        payload = json.dumps(self.grading_payload())
+        if self.question_type_id == 2 and self.test_cases:
+            result = Prompt.explain_coding(payload)
+        elif self.question_type_id == 2:
+            result = Prompt.check_coding(payload)
+        else:
+            result = Prompt.check_fill_in(payload)
+
+        if not result.ok:
+            response = {"error": result.error}
+        elif not isinstance(result.data, dict):
+            response = {"error": "Malformed grading response"}
+        else:
+            response = result.data
+        return self.verdict_from(response)
+
+    def verdict_from(self, response):
+        results = self.run_tests() if self.question_type_id == 2 else None
+        if results is not None:
+            # the verdict comes from running the code, gemini only writes the feedback,
+            # so a failed feedback call shouldnt throw away a verdict we already have
+            if "error" in response:
+                response = {}
+                self.cacheable = False
+            passed = sum(1 for r in results if r["passed"])
+            is_correct = passed == len(results)
+            return {
+                "isCorrect": is_correct,
+                "feedback": response.get("feedback") or (
+                    "Correct!" if is_correct else f"{passed} of {len(results)} tests passed"
+                ),
+                "points": ScoreCalculator.BASE_POINTS[2]
+            }
 
         if "error" in response:
             raise Exception(response["error"])
 
-        self.is_correct = response.get("isCorrect", False)
-        self.feedback = response.get("feedback", "")
-        self.hint = response.get("hint", "")
-        self.points = ScoreCalculator.apply_bonuses(
-            base_score=int(response.get("points", 0)),
-            is_correct=self.is_correct,
-            retry=self.retry,
-            time_taken=self.time_taken,
-            avg_time=self.avg_time,
-            skill_level=self.skill_level
-        )
-        
-    def persist(self):
+        return {
+            "isCorrect": response.get("isCorrect", False),
+            "feedback": response.get("feedback", ""),
+            "points": int(response.get("points", 0))
+        }
+
+    def to_row(self):
+        return {
+            "questionID": self.question_id,
+            "userID": self.user_id,
+            "userAnswer": self.user_answer,
+            "correctAnswer": self.correct_answer,
+            "is_correct": self.is_correct,
+            "feedback": self.feedback if self.question_type_id in (2, 3) else "",
+            "hint": self.hint,
+            # without the retry penalty, upsert_answers takes it off for the attempt it stores
+            "Points": self.score(0),
+            "retry": self.retry,
+            "startedAt": self.start_time.isoformat(),
+            "completedAt": self.end_time.isoformat(),
+            "timeTaken": self.time_taken 
+        }
+
+    def log_analysis(self):
+        print("\nANSWER ANALYSIS IN TERMINAL -----------------------")
+        print(f"QuestionID    : {self.question_id}")
+        print(f"UserID        : {self.user_id}")
+        print(f"Skill Level   : {self.skill_level}")
+        print(f"Retries       : {self.retry}")
+        print(f"AvgTime       : {self.avg_time} seconds")
+        print(f"Time Taken    : {self.time_taken} seconds")
+        print(f"Is Correct     : {self.is_correct}")
+        print(f"Points Earned : {self.points}")
+        print("----------------------------------------------------\n")
+
+    @staticmethod
+    def persist_all(answers):
+        # one upsert_answers rpc for the whole submission, the db bumps retry on
+        # conflict so concurrent submissions for the same question cant race,
+        # and the points come back with the retry penalty for the stored attempt
+        # (see migrations/001_answer_bulk_upsert.sql and 007_answer_points.sql)
+        if not answers:
+            return
+
+        # postgres cant touch the same row twice in one statement, last one wins
+        latest = {}
+        for ans in answers:
+            latest[str(ans.question_id)] = ans
+
         try:
+            res = supabase_client.rpc(
+                "upsert_answers",
+                {"p_answers": [ans.to_row() for ans in latest.values()]}
+            ).execute()
+        except Exception as e:
+            raise Exception("db save failed: " + str(e))
+
+        stored = {str(row["questionID"]): row for row in res.data or []}
+        for ans in answers:
+            row = stored.get(str(ans.question_id))
+            if row is not None:
+                ans.retry = row["retry"]
+                ans.points = row["Points"] if row.get("Points") is not None else ans.score(ans.retry)
+            ans.log_analysis()
+        Answer.mark_seen(latest.values())
+
+    @staticmethod
+    def mark_seen(answers):
+        # the answers are already saved, a bookkeeping error here mustnt fail them.
+        # worst case the next page shows one of these questions again
+        try:
+            for user_id in {ans.user_id for ans in answers}:
+                seen_questions.mark(
+                    user_id, [(ans.lesson_id, ans.question_id) for ans in answers if ans.user_id == user_id]
+                )
+        except Exception as e:
+            print(f"Seen questions not updated: {e}")
+
+    @staticmethod
+    def answered_questions(user_id, page_size=1000):
+        # (questionID, lessonID) of every question the user has answered, loads seen_questions
+        rows = []
+        while True:
             res = supabase_client.table("Answer") \
-                .select("answerID") \
-                .eq("userID", self.user_id) \
-                .eq("questionID", self.question_id) \
-                .maybe_single() \
+                .select("questionID, Question(lessonID)") \
+                .eq("userID", user_id) \
+                .order("questionID") \
+                .range(len(rows), len(rows) + page_size - 1) \
                 .execute()
-                
-            existing = res.data if res and hasattr(res, "data") else None
+            page = res.data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return [
+                    {"questionID": row["questionID"], "lessonID": (row.get("Question") or {}).get("lessonID")}
+                    for row in rows
+                ]
 
-            payload = {
-                "questionID": self.question_id,
-                "userID": self.user_id,
-                "userAnswer": self.user_answer,
-                "correctAnswer": self.correct_answer,
-                "is_correct": self.is_correct,
-                "feedback": self.feedback if self.question_type_id in (2, 3) else "",
-                "hint": self.hint if self.question_type_id in (2, 3) else "",
-                "Points": self.points,
-                "retry": self.retry,
-                "startedAt": self.start_time.isoformat(),
-                "completedAt": self.end_time.isoformat(),
-                "timeTaken": self.time_taken 
+    @staticmethod
+    def grade_remote(ans):
+        # never raises so one bad answer doesnt sink the whole submission
+        try:
+            started = time.perf_counter()
+            ans.store_verdict(ans.remote_verdict(), time.perf_counter() - started)
+            return None
+        except Exception as e:
+            return str(e)
+
+    @staticmethod
+    def grade_batch(answers):
+        # grades every open-ended answer with one check_batch call and returns
+        # the answers it couldnt grade, those fall back to one call each
+        try:
+            # sandbox runs go in parallel before the single gemini call
+            runs = {
+                id(ans): code_runner.submit(ans.user_answer, ans.test_cases) for ans in answers
+                if ans.question_type_id == 2 and ans.test_cases and ans.test_results is None
             }
-            
-            print("\nANSWER ANALYSIS IN TERMINAL -----------------------")
-            print(f"QuestionID    : {self.question_id}")
-            print(f"UserID        : {self.user_id}")
-            print(f"Skill Level   : {self.skill_level}")
-            print(f"Retries       : {self.retry}")
-            print(f"AvgTime       : {self.avg_time} seconds")
-            print(f"Time Taken    : {self.time_taken} seconds")
-            print(f"Is Correct     : {self.is_correct}")
-            print(f"Points Earned : {self.points}")
-            print("----------------------------------------------------\n")
-
-            if existing:
-                supabase_client.table("Answer") \
-                    .update(payload, count="exact") \
-                    .eq("answerID", existing["answerID"]) \
-                    .execute()
-            else:
-                payload["retry"] = 0
-                supabase_client.table("Answer") \
-                    .insert([payload], count="exact") \
-                    .execute()
+            for ans in answers:
+                if id(ans) in runs:
+                    try:
+                        results = runs[id(ans)].result(timeout=code_runner.timeout(ans.test_cases))
+                    except Exception:
+                        results = None
+                    ans.use_test_results(results)
+
+            items = []
+            for ans in answers:
+                item = ans.grading_payload()
+                item["type"] = "coding" if ans.question_type_id == 2 else "fill_in"
+                items.append(item)
+
+            started = time.perf_counter()
+            result = Prompt.check_batch(json.dumps(items))
+            response = result.data if result.ok else None
+            cost = (time.perf_counter() - started) / len(answers)
+        except Exception:
+            response = None
 
+        metrics.incr("grading.batch_calls")
+        if not isinstance(response, list):
+            metrics.incr("grading.batch_fallbacks", len(answers))
+            return answers
+
+        by_id = {
+            str(item.get("questionid")): item for item in response
+            if isinstance(item, dict)
+            and isinstance(item.get("isCorrect"), bool)
+            and isinstance(item.get("feedback"), str)
+            and isinstance(item.get("points"), (int, float))
+        }
+
+        leftovers = []
+        for ans in answers:
+            item = by_id.get(str(ans.question_id))
+            try:
+                if item is None:
+                    raise Exception("missing from batch response")
+                ans.store_verdict(ans.verdict_from(item), cost)
+            except Exception:
+                leftovers.append(ans)
+
+        metrics.incr("grading.batch_items", len(answers) - len(leftovers))
+        metrics.incr("grading.batch_fallbacks", len(leftovers))
+        return leftovers
+
+    @staticmethod
+    def iter_grades(entries, user_id, skill_level):
+        # yields (index, answer, error) as soon as each entry's grade is known,
+        # answers still grading when the deadline passes come back as timed out
+        try:
+            prefetch = AnswerPrefetch.load(
+                user_id, [a.get("questionId") for a in entries if isinstance(a, dict)]
+            )
         except Exception as e:
-            raise Exception("db save failed: " + str(e))
+            for i in range(len(entries)):
+                yield i, None, "Failed to load question info: " + str(e)
+            return
+
+        pending = []
+        for i, a in enumerate(entries):
+            try:
+                ans = Answer(a, user_id, skill_level, prefetch)
+                if ans.resolve_locally():
+                    yield i, ans, None
+                else:
+                    pending.append((i, ans))
+            except Exception as e:
+                yield i, None, str(e)
+
+        timed_out = f"Grading timed out after {GRADING_DEADLINE_SECONDS:g} seconds"
+        deadline = time.monotonic() + GRADING_DEADLINE_SECONDS
+
+        if BATCH_GRADING and len(pending) > 1:
+            batch = grading_pool.submit(Answer.grade_batch, [ans for _, ans in pending])
+            wait([batch], timeout=max(0, deadline - time.monotonic()))
+            if not batch.done():
+                for i, _ in pending:
+                    yield i, None, timed_out
+                return
+
+            leftovers = {id(ans) for ans in batch.result()}
+            for i, ans in pending:
+                if id(ans) not in leftovers:
+                    yield i, ans, None
+            pending = [(i, ans) for i, ans in pending if id(ans) in leftovers]
+
+        if GRADING_MAX_WORKERS <= 1 or len(pending) <= 1:
+            for i, ans in pending:
+                error = Answer.grade_remote(ans)
+                yield (i, None, error) if error else (i, ans, None)
+            return
+
+        futures = {grading_pool.submit(Answer.grade_remote, ans): (i, ans) for i, ans in pending}
+        try:
+            for future in as_completed(futures, timeout=max(0, deadline - time.monotonic())):
+                i, ans = futures.pop(future)
+                error = future.result()
+                yield (i, None, error) if error else (i, ans, None)
+        except FuturesTimeout:
+            for future, (i, _) in futures.items():
+                future.cancel()
+                yield i, None, timed_out
+
+    @staticmethod
+    def grade_all(entries, user_id, skill_level):
+        # (answer, error) pairs in submission order
+        graded = [(None, "Not graded")] * len(entries)
+        for i, ans, error in Answer.iter_grades(entries, user_id, skill_level):
+            graded[i] = (ans, error)
+        return graded
 
     @staticmethod
-    def submit_answers(user_id, answers_data, skill_level):
+    def parse_entries(answers_data):
+        # returns (entries, error)
         try:
             if isinstance(answers_data, str):
                 answers_data = json.loads(answers_data)
         except json.JSONDecodeError:
-            return {"results": [], "error": "Invalid JSON input"}
-
-        total_points = 0
-        results = []
+            return None, "Invalid JSON input"
 
+        entries = []
         for a in answers_data:
             if isinstance(a, str):
                 try:
                     a = json.loads(a)
                 except Exception as e:
-                    return {"results": [], "error": f"Failed to parse entry: {str(e)}"}
+                    return None, f"Failed to parse entry: {str(e)}"
+            entries.append(a)
+        return entries, None
+
+    @staticmethod
+    def result_entry(entry, ans, error):
+        if error:
+            return {
+                "questionId": entry.get("questionId", "unknown") if isinstance(entry, dict) else "unknown",
+                "success": False,
+                "error": error
+            }
+        return {
+            "questionId": ans.question_id,
+            "success": True,
+            "isCorrect": ans.is_correct,
+            "points": ans.points,
+            "feedback": ans.feedback,
+            "retry": ans.retry
+        }
 
+    @staticmethod
+    def stream_submission(user_id, answers_data, skill_level, finished=None):
+        # starts grading right away on its own thread and returns a generator of
+        # its events, see grade_submission. finished(events) runs on that thread
+        # with everything it yielded once it stops, whether or not anyone read them
+        def produce():
+            events = []
             try:
-                ans = Answer(a, user_id, skill_level)
-                ans.validate()
-                ans.persist()
+                for event in Answer.grade_submission(user_id, answers_data, skill_level):
+                    events.append(event)
+                    yield event
+            finally:
+                if finished is not None:
+                    finished(events)
+
+        # every submission is its own flight, nothing is shared between them
+        return submission_flight.stream(object(), produce)
+
+    @staticmethod
+    def grade_submission(user_id, answers_data, skill_level):
+        # yields ("result", ...) per answer in the order grades finish, then one
+        # ("done", ...) once the answers and points are saved
+        entries, error = Answer.parse_entries(answers_data)
+        if error:
+            yield "done", {"results": [], "error": error, "totalPoints": 0}
+            return
+
+        graded = []
+        for i, ans, error in Answer.iter_grades(entries, user_id, skill_level):
+            if ans is not None:
+                graded.append(ans)
+            result = Answer.result_entry(entries[i], ans, error)
+            result["index"] = i
+            yield "result", result
+
+        done = {"totalPoints": 0}
+        try:
+            Answer.persist_all(graded)
+        except Exception as e:
+            done["error"] = str(e)
+            yield "done", done
+            return
+
+        done["totalPoints"] = sum(ans.points for ans in graded)
+        # the saved retry counts and the points for them come back from the upsert,
+        # the result events only had an estimate
+        done["retries"] = {str(ans.question_id): ans.retry for ans in graded}
+        done["points"] = {str(ans.question_id): ans.points for ans in graded}
+        try:
+            PointsService.award(user_id, done["totalPoints"], "submit-answers")
+        except Exception as e:
+            done["error"] = "Failed to update user points: " + str(e)
+        yield "done", done
+
+    @staticmethod
+    def submit_answers(user_id, answers_data, skill_level, points_source="submit-answers"):
+        entries, error = Answer.parse_entries(answers_data)
+        if error:
+            return {"results": [], "error": error}
+
+        graded = Answer.grade_all(entries, user_id, skill_level)
+
+        save_error = None
+        try:
+            Answer.persist_all([ans for ans, error in graded if ans is not None])
+        except Exception as e:
+            save_error = str(e)
+
+        total_points = 0
+        results = []
+
+        for a, (ans, error) in zip(entries, graded):
+            results.append(Answer.result_entry(a, ans, error or save_error))
+            if not (error or save_error):
                 total_points += ans.points
-                results.append({
-                    "questionId": ans.question_id,
-                    "success": True,
-                    "isCorrect": ans.is_correct,
-                    "points": ans.points,
-                    "feedback": ans.feedback,
-                    "hint": ans.hint,
-                    "retry": ans.retry
-                })
-            except Exception as e:
-                results.append({
-                    "questionId": a.get("questionId", "unknown") if isinstance(a, dict) else "unknown",
-                    "success": False,
-                    "error": str(e)
-                })
 
         try:
-            res = supabase_client.table("User") \
-                .select("points") \
+            PointsService.award(user_id, total_points, points_source)
+        except Exception as e:
+            results.append({"error": "Failed to update user points: " + str(e)})
+
+        return {"results": results}
+
+    @staticmethod
+    def get_hint(user_id, question_id):
+        # hints cost a gemini call, so they're only written when a student asks
+        # for one and then kept on the answer row until the next attempt
+        try:
+            res = supabase_client.table("Answer") \
+                .select("userAnswer, is_correct, feedback, hint, retry") \
                 .eq("userID", user_id) \
-                .single() \
+                .eq("questionID", question_id) \
+                .maybe_single() \
                 .execute()
-            user_data = res.data
+            answer = res.data if res and hasattr(res, "data") else None
+            if not answer:
+                return {"error": "Submit an answer to this question first"}, 404
+
+            if answer.get("hint"):
+                metrics.incr("hints.cached")
+                return {"questionId": question_id, "hint": answer["hint"]}, 200
 
-            old_points = user_data.get("points", 0)
-            new_total = old_points + total_points
-            supabase_client.table("User") \
-                .update({"points": new_total}) \
+            question = supabase_client.table("Question") \
+                .select("questionText, questionTypeID, correctAnswer, constraints") \
+                .eq("questionID", question_id) \
+                .single() \
+                .execute().data
+            if question.get("questionTypeID") not in (2, 3):
+                return {"error": "Hints are only available for coding and fill in questions"}, 400
+
+            payload = {
+                "questionid": question_id,
+                "type": "coding" if question["questionTypeID"] == 2 else "fill_in",
+                "question": question.get("questionText", ""),
+                "constraints": question.get("constraints", ""),
+                "correct_answer": question.get("correctAnswer", ""),
+                "user_answer": answer.get("userAnswer", ""),
+                "isCorrect": answer.get("is_correct", False),
+                "feedback": answer.get("feedback", "")
+            }
+            result = Prompt.generate_hint(json.dumps(payload))
+            if not result.ok:
+                return {"error": result.error}, result.status
+            if not isinstance(result.data, dict):
+                return {"error": "Malformed hint response"}, 500
+
+            hint = result.data.get("hint", "")
+            # matching retry keeps a slow hint off an answer resubmitted in the meantime
+            supabase_client.table("Answer") \
+                .update({"hint": hint}) \
                 .eq("userID", user_id) \
+                .eq("questionID", question_id) \
+                .eq("retry", answer.get("retry", 0)) \
                 .execute()
+            metrics.incr("hints.generated")
+            return {"questionId": question_id, "hint": hint}, 200
+
         except Exception as e:
-            results.append({"error": "Failed to update user points: " + str(e)})
+            return {"error": str(e)}, 500
+
+    @staticmethod
+    def enqueue_submission(user_id, answers_data, skill_level):
+        # returns the job id right away, a grading worker runs submit_answers later
+        return grading_queue.submit(user_id, {
+            "userId": user_id,
+            "answers": answers_data,
+            "skillLevel": skill_level
+        })
+
+    @staticmethod
+    def grading_job(user_id, job_id):
+        job = grading_queue.status(job_id, owner=user_id)
+        if job is None:
+            return {"error": "Grading job not found"}, 404
+        return job, 200
+
+
+# workers start from grading_worker.py (or the dev server), GRADING_QUEUE_WORKERS sets
+# the throughput without touching how long submit-answers takes to respond. the points
+# are keyed on the job so a job graded again after its lease ran out doesnt pay twice
+grading_queue = GradingQueue(
+    make_job_store(GRADING_QUEUE_BACKEND, GRADING_QUEUE_PATH),
+    handler=lambda job, job_id: Answer.submit_answers(
+        job["userId"], job["answers"], job["skillLevel"], points_source=f"grading_job:{job_id}"
+    ),
+    workers=GRADING_QUEUE_WORKERS,
+    poll_seconds=GRADING_QUEUE_POLL_SECONDS,
+    retention_seconds=GRADING_QUEUE_RETENTION_SECONDS,
+    lease_seconds=GRADING_QUEUE_LEASE_SECONDS
+)
 
-        return {"results": results}
\ No newline at end of file
+# what each active user has answered, so a subunit page can skip it
+seen_questions = SeenIndex(
+    load=Answer.answered_questions,
+    max_users=SEEN_INDEX_MAX_USERS,
+    ttl_seconds=SEEN_INDEX_TTL_SECONDS
+)
@@ -0,0 +1,316 @@
+import ast
+import json
+import os
+import select
+import shlex
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.metrics import metrics
+
+# runs student code against a question's test cases. every test case gets a
+# fresh interpreter (services/sandbox_child.py under python -I -S) started with
+# close_fds and an empty environment, inside new pid/net/ipc/uts/mount
+# namespaces when unshare works here. the child sets its rlimits, drops root
+# and installs a seccomp allowlist before the answer runs. nothing is long
+# lived, a child that runs past its deadline is killed with its process group.
+# the child only reports what the answer printed and the values of the
+# expressions in the test's assertion, the expected output and values stay
+# here, so an answer writing a fake result to stdout gains nothing
+
+CHILD_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_child.py")
+CHILD_ENV = {"LC_ALL": "C.UTF-8"}
+UNSHARE_ARGS = ("--net", "--ipc", "--uts", "--pid", "--fork", "--kill-child", "--mount", "--mount-proc")
+
+# interpreter start, preloads and namespace setup, before the answer's wall clock starts
+STARTUP_SECONDS = 3.0
+# anything bigger than this on the child's stdout is the answer misbehaving
+MAX_RESULT_BYTES = 64 * 1024
+# same marker as sandbox_child.READY, nothing before it comes from the answer
+READY = b"READY\n"
+
+TIME_LIMIT = {"passed": False, "output": "", "error": "Time limit exceeded"}
+KILLED = {"passed": False, "output": "", "error": "Killed: resource limit exceeded"}
+
+
+def infra_error(error):
+    # the runner failed, not the answer. results with "infra" say nothing about
+    # the code and callers grade it some other way
+    return {"passed": False, "output": "", "error": error, "infra": True}
+
+
+class ResultTooLarge(Exception):
+    pass
+
+
+class StartupTimeout(Exception):
+    pass
+
+
+def split_assertion(source):
+    # a test's assertion as (expression, expected value) pairs, the child
+    # evaluates the expressions and the values are compared here. None when it
+    # isnt only "assert <expression> == <literal>" statements, the expected
+    # value would have to go to the child then
+    if not (source or "").strip():
+        return []
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+    checks = []
+    for node in tree.body:
+        test = node.test if isinstance(node, ast.Assert) else None
+        if not (isinstance(test, ast.Compare) and len(test.ops) == 1 and isinstance(test.ops[0], ast.Eq)):
+            return None
+        for expression, literal in ((test.left, test.comparators[0]), (test.comparators[0], test.left)):
+            try:
+                checks.append((ast.unparse(expression), ast.literal_eval(literal)))
+                break
+            except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+                continue
+        else:
+            return None
+    return checks
+
+
+def checkable(test):
+    return isinstance(test, dict) and split_assertion(test.get("assertion")) is not None
+
+
+def _last_json(raw):
+    lines = raw.strip().splitlines()
+    try:
+        result = json.loads(lines[-1])
+    except (IndexError, ValueError):
+        return None
+    return result if isinstance(result, dict) else None
+
+
+def _same_value(value, expected):
+    try:
+        return isinstance(value, str) and ast.literal_eval(value) == expected
+    except Exception:
+        # not a literal (an object, nan) or built to blow up the parser
+        return False
+
+
+def _same_output(actual, expected):
+    def clean(text):
+        return [line.rstrip() for line in str(text).strip().splitlines()]
+    return clean(actual) == clean(expected)
+
+
+def _exchange(process, job, wall_seconds):
+    # writes the job and reads the result without ever blocking for long. the
+    # answer gets wall_seconds from the READY marker on, the time before it
+    # (a busy host starting the interpreter) isnt charged to the answer
+    stdin_fd, stdout_fd = process.stdin.fileno(), process.stdout.fileno()
+    os.set_blocking(stdin_fd, False)
+    pending = memoryview(job)
+    writers = [stdin_fd]
+    chunks, size = [], 0
+    started = False
+    deadline = time.monotonic() + STARTUP_SECONDS
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError if started else StartupTimeout
+        readable, writable, _ = select.select([stdout_fd], writers, [], remaining)
+        if writable:
+            try:
+                pending = pending[os.write(stdin_fd, pending[:65536]):]
+            except (BlockingIOError, InterruptedError):
+                pass
+            except BrokenPipeError:
+                pending = pending[:0]
+            if not pending:
+                process.stdin.close()
+                writers = []
+        if readable:
+            chunk = os.read(stdout_fd, 65536)
+            if not chunk:
+                return b"".join(chunks)
+            size += len(chunk)
+            if size > MAX_RESULT_BYTES:
+                raise ResultTooLarge
+            chunks.append(chunk)
+            if not started and READY in b"".join(chunks):
+                started = True
+                deadline = time.monotonic() + wall_seconds
+
+
+def _kill(process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    for pipe in (process.stdin, process.stdout):
+        if pipe is not None and not pipe.closed:
+            pipe.close()
+    process.wait()
+
+
+def _verdict(raw, test, checks):
+    before, ready, after = raw.partition(READY)
+    if not ready:
+        # the answer never ran: a syntax error, or the sandbox didnt come up
+        result = _last_json(before) or {}
+        if result.get("syntax"):
+            return {"passed": False, "output": "", "error": str(result.get("error")), "syntax": True}
+        return infra_error(str(result.get("error") or "Sandbox did not start"))
+
+    result = _last_json(after)
+    if result is None:
+        return dict(KILLED)
+    output = str(result.get("output") or "")
+    if result.get("error"):
+        return {"passed": False, "output": output[:500], "error": str(result["error"])}
+
+    expected = test.get("expected_output") or ""
+    if expected.strip() and not _same_output(output, expected):
+        return {"passed": False, "output": output[:500], "error": "Output did not match"}
+    values = result.get("values")
+    if not isinstance(values, list) or len(values) != len(checks) or \
+            not all(_same_value(value, check[1]) for value, check in zip(values, checks)):
+        return {"passed": False, "output": output[:500], "error": "AssertionError"}
+    return {"passed": True, "output": output[:500], "error": None}
+
+
+class CodeRunner:
+    # isolation: "auto" uses unshare when it works here, "none" runs without
+    # namespaces, anything else is a command prefix such as an nsjail invocation
+    # queue_seconds: how long an answer may wait for a free worker before it
+    # comes back as an infra error instead of running
+    def __init__(self, workers=None, cpu_seconds=2, memory_mb=256, wall_seconds=5, isolation="auto",
+                 queue_seconds=10):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.queue_seconds = float(queue_seconds)
+        self.limits = {
+            "cpu_seconds": int(cpu_seconds),
+            "memory_mb": int(memory_mb),
+            "wall_seconds": float(wall_seconds),
+        }
+        self.isolation = isolation
+        self._prefix = None
+        self._available = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+
+    def prefix(self):
+        with self._lock:
+            if self._prefix is None:
+                self._prefix = self._isolation_prefix()
+            return self._prefix
+
+    def _isolation_prefix(self):
+        if self.isolation == "none":
+            return []
+        if self.isolation != "auto":
+            return shlex.split(self.isolation)
+        unshare = shutil.which("unshare")
+        if unshare is None:
+            return []
+        command = [unshare, *UNSHARE_ARGS]
+        try:
+            probe = subprocess.run(
+                [*command, "true"],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5
+            )
+        except (OSError, subprocess.SubprocessError):
+            return []
+        return command if probe.returncode == 0 else []
+
+    def available(self):
+        # whether the sandbox actually comes up here (seccomp loads), checked
+        # once. without it coding answers are graded by gemini alone
+        with self._probe_lock:
+            if self._available is None:
+                test = {"stdin": "", "expected_output": "1", "assertion": ""}
+                result = self.run_test("print(1)", test)
+                self._available = result["passed"]
+                if not self._available:
+                    print(f"Code runner unavailable: {result['error']}")
+            return self._available
+
+    def per_test(self):
+        return self.limits["wall_seconds"] + STARTUP_SECONDS
+
+    def timeout(self, test_cases):
+        # the longest a submitted answer can take, queueing included, callers
+        # pass this to future.result()
+        return self.queue_seconds + self.per_test() * max(1, len(test_cases)) + STARTUP_SECONDS
+
+    def run_test(self, code, test):
+        checks = split_assertion(test.get("assertion"))
+        if checks is None:
+            return infra_error("Assertion cannot be checked")
+        job = json.dumps({
+            "code": code,
+            "stdin": test.get("stdin") or "",
+            "probes": [expression for expression, _ in checks],
+            "limits": self.limits,
+        }).encode()
+        process = subprocess.Popen(
+            [*self.prefix(), sys.executable, "-I", "-S", "-B", CHILD_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            close_fds=True,
+            start_new_session=True,
+            cwd="/",
+            env=CHILD_ENV,
+        )
+        try:
+            raw = _exchange(process, job, self.limits["wall_seconds"])
+        except StartupTimeout:
+            return infra_error("Sandbox did not start in time")
+        except TimeoutError:
+            return dict(TIME_LIMIT)
+        except ResultTooLarge:
+            return dict(KILLED)
+        finally:
+            _kill(process)
+        return _verdict(raw, test, checks)
+
+    def run_tests(self, code, test_cases, queued):
+        if time.monotonic() - queued > self.queue_seconds:
+            metrics.incr("code_runner.queue_timeouts")
+            return [infra_error("Code runner busy") for _ in test_cases]
+        results = []
+        for test in test_cases:
+            result = self.run_test(code, test)
+            if result.pop("syntax", False):
+                # the same for every test case, no need to start the rest
+                return [dict(result) for _ in test_cases]
+            results.append(result)
+        return results
+
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="code-runner")
+            return self._executor
+
+    def submit(self, code, test_cases):
+        # the future settles within timeout(test_cases): an answer that waited
+        # longer than queue_seconds for a worker isnt run at all
+        return self.executor().submit(self.run_tests, code or "", list(test_cases), time.monotonic())
+
+    def run(self, code, test_cases):
+        # returns one {"passed", "output", "error"} per test case, in order,
+        # plus "infra": True on results the runner itself failed
+        if not test_cases:
+            return []
+        return self.submit(code, test_cases).result(timeout=self.timeout(test_cases))
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
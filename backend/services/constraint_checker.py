@@ -0,0 +1,138 @@
+import ast
+from utils.metrics import metrics
+
+metrics.define_ratio("coding.precheck_reject_ratio", "coding.precheck_rejected", "coding.precheck_passed")
+
+class ConstraintChecker:
+    # checks a coding answer against the question's constraintRules without gemini.
+    # rules are "kind:argument" strings written by Prompt.generate_coding:
+    #   uses:<construct>      avoids:<construct>
+    #   calls:<function>      never_calls:<function>
+    #   defines:<function>    assigns:<variable>
+    #   max_lines:<n>
+    # unknown rules are ignored so a bad generation cant block every answer
+
+    CONSTRUCTS = {
+        "for": (ast.For, ast.AsyncFor),
+        "while": (ast.While,),
+        "if": (ast.If, ast.IfExp),
+        "def": (ast.FunctionDef, ast.AsyncFunctionDef),
+        "return": (ast.Return,),
+        "class": (ast.ClassDef,),
+        "lambda": (ast.Lambda,),
+        "try": (ast.Try,),
+        "with": (ast.With,),
+        "import": (ast.Import, ast.ImportFrom),
+        "break": (ast.Break,),
+        "continue": (ast.Continue,),
+        "comprehension": (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp),
+        "list": (ast.List, ast.ListComp),
+        "dict": (ast.Dict, ast.DictComp),
+        "tuple": (ast.Tuple,),
+        "set": (ast.Set, ast.SetComp),
+        "fstring": (ast.JoinedStr,),
+    }
+
+    NAMES = {
+        "for": "a for loop", "while": "a while loop", "if": "an if statement",
+        "def": "a function definition", "return": "a return statement", "class": "a class",
+        "lambda": "a lambda", "try": "a try block", "with": "a with block",
+        "import": "an import", "break": "break", "continue": "continue",
+        "comprehension": "a comprehension", "list": "a list", "dict": "a dictionary",
+        "tuple": "a tuple", "set": "a set", "fstring": "an f-string",
+    }
+
+    @staticmethod
+    def parse_rules(rules):
+        parsed = []
+        for rule in rules or []:
+            if not isinstance(rule, str) or ":" not in rule:
+                continue
+            kind, _, arg = rule.partition(":")
+            kind, arg = kind.strip().lower(), arg.strip()
+            if not arg:
+                continue
+            if kind in ("uses", "avoids") and arg.lower() not in ConstraintChecker.CONSTRUCTS:
+                continue
+            if kind == "max_lines" and not arg.isdigit():
+                continue
+            if kind in ("uses", "avoids", "calls", "never_calls", "defines", "assigns", "max_lines"):
+                parsed.append((kind, arg.lower() if kind in ("uses", "avoids") else arg))
+        return parsed
+
+    @staticmethod
+    def called_names(tree):
+        names = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Call):
+                if isinstance(node.func, ast.Name):
+                    names.add(node.func.id)
+                elif isinstance(node.func, ast.Attribute):
+                    names.add(node.func.attr)
+        return names
+
+    @staticmethod
+    def assigned_names(tree):
+        names = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+                names.add(node.id)
+        return names
+
+    @staticmethod
+    def violation(tree, code, kind, arg):
+        if kind in ("uses", "avoids"):
+            found = any(isinstance(node, ConstraintChecker.CONSTRUCTS[arg]) for node in ast.walk(tree))
+            if kind == "uses" and not found:
+                return f"Your answer needs to use {ConstraintChecker.NAMES[arg]}."
+            if kind == "avoids" and found:
+                return f"Your answer shouldn't use {ConstraintChecker.NAMES[arg]} here."
+        elif kind == "calls" and arg not in ConstraintChecker.called_names(tree):
+            return f"Your answer needs to call {arg}()."
+        elif kind == "never_calls" and arg in ConstraintChecker.called_names(tree):
+            return f"Your answer shouldn't call {arg}() here."
+        elif kind == "defines":
+            defined = {
+                node.name for node in ast.walk(tree)
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+            }
+            if arg not in defined:
+                return f"Your answer needs to define a function called {arg}."
+        elif kind == "assigns" and arg not in ConstraintChecker.assigned_names(tree):
+            return f"Your answer needs to store a value in {arg}."
+        elif kind == "max_lines":
+            lines = [line for line in code.splitlines() if line.strip() and not line.strip().startswith("#")]
+            if len(lines) > int(arg):
+                return f"Your answer should fit in {arg} lines of code."
+        return None
+
+    @staticmethod
+    def check(code, rules):
+        # returns (ok, reason), reason is short enough to show as feedback
+        ok, reason = True, ""
+        code = code if isinstance(code, str) else ""
+
+        if not code.strip():
+            ok, reason = False, "No answer submitted"
+        else:
+            try:
+                tree = ast.parse(code)
+            except SyntaxError as e:
+                tree = None
+                where = f" on line {e.lineno}" if e.lineno else ""
+                ok, reason = False, f"Your code has a syntax error{where}: {e.msg}"
+            except ValueError:
+                tree = None
+                ok, reason = False, "Your code contains characters Python can't read"
+
+            if tree is not None:
+                for kind, arg in ConstraintChecker.parse_rules(rules):
+                    reason = ConstraintChecker.violation(tree, code, kind, arg)
+                    if reason:
+                        ok = False
+                        break
+                else:
+                    reason = ""
+
+        metrics.incr("coding.precheck_passed" if ok else "coding.precheck_rejected")
+        return ok, reason
@@ -0,0 +1,44 @@
+import threading
+from utils.metrics import metrics
+from utils.snapshot import Snapshot
+from utils.ttl_cache import TTLCache
+
+metrics.define_ratio("subunit_content.hit_ratio", "subunit_content.hits", "subunit_content.misses")
+
+class ContentStore:
+    # bounded lru of subunit content parsed, serialized and precompressed once
+    # (a Snapshot) by (subunit id, content version). the version moves on
+    # invalidate(), so a request racing an edit cant put the old content back
+    # under the current version.
+    # load(subunit_id) -> the subunit with its content parsed, or None
+    def __init__(self, load, max_entries=500, max_bytes=64 * 1024 * 1024, ttl_seconds=600):
+        self.load = load
+        self.cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds, max_bytes=max_bytes)
+        self._lock = threading.Lock()
+        self._versions = {}
+
+    def get(self, subunit_id):
+        version = self._versions.get(subunit_id, 0)
+        entry = self.cache.get((subunit_id, version))
+        if entry is not None:
+            metrics.incr("subunit_content.hits")
+            return entry
+
+        metrics.incr("subunit_content.misses")
+        data = self.load(subunit_id)
+        if data is None:
+            return None
+        entry = Snapshot(version, data)
+        with self._lock:
+            if self._versions.get(subunit_id, 0) == version:
+                self.cache.set((subunit_id, version), entry, size=entry.size)
+        stats = self.cache.stats()
+        metrics.set_gauge("subunit_content.entries", stats["entries"])
+        metrics.set_gauge("subunit_content.bytes", stats["bytes"])
+        return entry
+
+    def invalidate(self, subunit_id):
+        with self._lock:
+            version = self._versions.get(subunit_id, 0)
+            self._versions[subunit_id] = version + 1
+            self.cache.delete((subunit_id, version))
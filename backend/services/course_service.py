@@ -1,17 +1,28 @@
-from config.settings import supabase_client
+from config.settings import supabase_client, CATALOG_CACHE_TTL_SECONDS
+from utils.snapshot import SnapshotCache
 
 class CourseService:
+    @staticmethod
+    def load_catalog():
+        response = supabase_client.table("RefUnit").select("unitID, unitName,unitDescription, RefSubUnit(subUnitID, subUnitName)").execute()
+        return response.data
+
     @staticmethod
     def get_courses():
+        # the catalog snapshot, its body is already serialized for the route
         try:
-            response = supabase_client.table("RefUnit").select("unitID, unitName,unitDescription, RefSubUnit(subUnitID, subUnitName)").execute()
-            if response.data:
-                return response.data, 200
+            snapshot = catalog.get()
+            if snapshot is not None:
+                return snapshot, 200
             else:
                 return {"error": "No courses found"}, 404
         except Exception as e:
             return {"error": str(e)}, 500
 
+    @staticmethod
+    def invalidate_catalog():
+        catalog.invalidate()
+
     @staticmethod
     def add_course(data):
         try:
@@ -21,6 +32,7 @@ class CourseService:
             }
             response = supabase_client.table("RefUnit").insert(new_course).execute()
             if response.data:
+                CourseService.invalidate_catalog()
                 return response.data, 201
             else:
                 return {"error": "Failed to add course"}, 500
@@ -44,4 +56,7 @@ class CourseService:
                 return {"error": "No questions found"}, 404
         except Exception as e:
             return {"error": str(e)}, 500
-        
\ No newline at end of file
+
+
+# units and their subunits for GET /api/courses, serialized once per change
+catalog = SnapshotCache("catalog", CourseService.load_catalog, ttl_seconds=CATALOG_CACHE_TTL_SECONDS)
@@ -0,0 +1,143 @@
+import json
+import random
+import re
+import threading
+from utils.metrics import metrics
+
+# near-duplicate check for generated questions: every question becomes a
+# minhash signature over 3-token shingles of its normalized text and answer,
+# signatures are bucketed by band (lsh) so a lookup only compares against
+# questions that share a band, whatever the size of the subunit's bank
+
+TOKEN = re.compile(r"[a-z_][a-z0-9_]*|\d+|[^\sa-z0-9_]")
+MASK = (1 << 64) - 1
+# punctuation that only changes the wording, dropped so "in place" and "in place." match
+FILLER = set(".,;:?!'\"`")
+
+
+class MinHashLSH:
+    def __init__(self, num_perm=64, bands=16, threshold=0.7, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.rows = num_perm // bands
+        self.bands = bands
+        self.threshold = threshold
+        rng = random.Random(seed)
+        # each permutation xors the shingle hash with its own random seed, cheaper
+        # than a*h+b mod p in python and close enough to min-wise for a 64 bit hash
+        self.seeds = [rng.getrandbits(64) for _ in range(num_perm)]
+        self.buckets = [{} for _ in range(bands)]   # band -> band key -> set of entry ids
+        self.signatures = {}                         # entry id -> signature
+
+    @staticmethod
+    def shingles(text):
+        # lowercase word and code tokens, brackets and operators kept since they matter in code
+        tokens = [t for t in TOKEN.findall(text.lower()) if t not in FILLER]
+        if len(tokens) < 3:
+            return {" ".join(tokens)}
+        return {" ".join(tokens[i:i + 3]) for i in range(len(tokens) - 2)}
+
+    def signature(self, text):
+        hashes = [hash(s) & MASK for s in self.shingles(text)]
+        return tuple(min(map(seed.__xor__, hashes)) for seed in self.seeds)
+
+    def band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows] for i in range(self.bands)]
+
+    def similarity(self, a, b):
+        return sum(x == y for x, y in zip(a, b)) / len(a)
+
+    def match(self, signature):
+        # id of a stored entry at least threshold similar, or None
+        candidates = set()
+        for band, key in zip(self.buckets, self.band_keys(signature)):
+            candidates.update(band.get(key, ()))
+        for entry_id in candidates:
+            if self.similarity(signature, self.signatures[entry_id]) >= self.threshold:
+                return entry_id
+        return None
+
+    def add(self, entry_id, signature):
+        self.signatures[entry_id] = signature
+        for band, key in zip(self.buckets, self.band_keys(signature)):
+            band.setdefault(key, set()).add(entry_id)
+
+    def remove(self, entry_id):
+        signature = self.signatures.pop(entry_id, None)
+        if signature is None:
+            return
+        for band, key in zip(self.buckets, self.band_keys(signature)):
+            ids = band.get(key)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del band[key]
+
+    def __len__(self):
+        return len(self.signatures)
+
+
+class DuplicateIndex:
+    # one MinHashLSH per subunit, loaded from its existing questions the first
+    # time the subunit generates and kept up to date as questions are saved.
+    # load(lesson_id) -> rows with questionID, questionText and correctAnswer
+    def __init__(self, load, threshold=0.7, num_perm=64, bands=16):
+        self.load = load
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self._lock = threading.Lock()
+        self._indexes = {}
+        self._next_claim = 0
+
+    @staticmethod
+    def text(question_text, correct_answer):
+        if not isinstance(correct_answer, str):
+            correct_answer = json.dumps(correct_answer, sort_keys=True)
+        return f"{question_text or ''}\n{correct_answer or ''}"
+
+    def index(self, lesson_id):
+        with self._lock:
+            index = self._indexes.get(lesson_id)
+        if index is not None:
+            return index
+
+        # built outside the lock so other subunits keep going, if two threads
+        # load the same subunit the first one to finish wins
+        index = MinHashLSH(self.num_perm, self.bands, self.threshold)
+        for row in self.load(lesson_id):
+            index.add(row["questionID"], index.signature(self.text(row.get("questionText"), row.get("correctAnswer"))))
+        with self._lock:
+            index = self._indexes.setdefault(lesson_id, index)
+            metrics.set_gauge("duplicates.indexed", sum(len(i) for i in self._indexes.values()))
+        return index
+
+    def claim(self, lesson_id, question_text, correct_answer):
+        # returns a claim to pass to confirm() or release() once the question is
+        # saved or dropped, or None when the subunit already has a near-duplicate.
+        # the claim is in the index straight away so a parallel generation cant
+        # save the same question twice
+        index = self.index(lesson_id)
+        signature = index.signature(self.text(question_text, correct_answer))
+        with self._lock:
+            if index.match(signature) is not None:
+                metrics.incr("duplicates.rejected")
+                return None
+            self._next_claim += 1
+            claim = ("claim", self._next_claim)
+            index.add(claim, signature)
+        metrics.incr("duplicates.accepted")
+        return lesson_id, claim, signature
+
+    def confirm(self, claim, question_id):
+        lesson_id, entry_id, signature = claim
+        with self._lock:
+            index = self._indexes[lesson_id]
+            index.remove(entry_id)
+            index.add(question_id, signature)
+            metrics.set_gauge("duplicates.indexed", sum(len(i) for i in self._indexes.values()))
+
+    def release(self, claim):
+        lesson_id, entry_id, _ = claim
+        with self._lock:
+            self._indexes[lesson_id].remove(entry_id)
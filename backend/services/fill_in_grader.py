@@ -0,0 +1,74 @@
+import ast
+import json
+import re
+from utils.metrics import metrics
+
+metrics.define_ratio("fill_in.local_hit_ratio", ["fill_in.local_correct", "fill_in.local_incorrect"], "fill_in.llm")
+
+class FillInGrader:
+    # grades fill-in-the-blank answers without gemini when the verdict is obvious,
+    # anything it cant decide comes back as AMBIGUOUS and goes to Prompt.check_fill_in
+    CORRECT = "correct"
+    INCORRECT = "incorrect"
+    AMBIGUOUS = "ambiguous"
+
+    FULL_POINTS = 7  # same scale check_fill_in scores on
+
+    QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'", "`": "'"})
+
+    # a quoted string, a run of spaces around punctuation, or any other run of spaces
+    SPACING = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|\s*([^\w\s"'])\s*|\s+""")
+
+    @staticmethod
+    def normalize(value):
+        text = value if isinstance(value, str) else json.dumps(value)
+        text = text.translate(FillInGrader.QUOTES).strip()
+
+        try:
+            literal = ast.literal_eval(text)
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            # "print( x )" and "print(x)" are the same answer, but string contents
+            # stay as typed and so does case, print and Print arent the same name
+            return FillInGrader.SPACING.sub(lambda m: m.group(1) or m.group(2) or " ", text)
+
+        # 'hi' == "hi", 10 == 0xA, but keep the case of string contents
+        if isinstance(literal, str):
+            return "str:" + literal
+        return "lit:" + repr(literal)
+
+    @staticmethod
+    def blanks(value):
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError:
+                pass
+        if isinstance(value, (list, tuple)):
+            return list(value)
+        if value is None or value == "":
+            return []
+        return [value]
+
+    @staticmethod
+    def grade(user_answer, correct_answer):
+        # returns (verdict, base points)
+        expected = FillInGrader.blanks(correct_answer)
+        given = FillInGrader.blanks(user_answer)
+
+        if not expected:
+            verdict, points = FillInGrader.AMBIGUOUS, 0
+        elif not given or all(str(g).strip() == "" for g in given):
+            verdict, points = FillInGrader.INCORRECT, 0
+        elif len(given) == len(expected) and all(
+            FillInGrader.normalize(g) == FillInGrader.normalize(e) for g, e in zip(given, expected)
+        ):
+            verdict, points = FillInGrader.CORRECT, FillInGrader.FULL_POINTS
+        else:
+            # could still be an accepted alternative, let the llm judge
+            verdict, points = FillInGrader.AMBIGUOUS, 0
+
+        if verdict == FillInGrader.AMBIGUOUS:
+            metrics.incr("fill_in.llm")
+        else:
+            metrics.incr(f"fill_in.local_{verdict}")
+        return verdict, points
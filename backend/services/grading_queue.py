@@ -0,0 +1,306 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+# durable queue for grading jobs: the request handler enqueues and returns a job id,
+# worker threads run the handler and store the result for GET /grading-jobs/<id>.
+# the store is pluggable, sqlite keeps jobs across restarts, memory is for local runs.
+# a claimed job is leased to one worker, which renews the lease while it grades.
+# only a job whose lease ran out (its worker died) is handed to another worker
+
+class SQLiteJobStore:
+    def __init__(self, path, max_attempts=3):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS grading_jobs (
+                    id TEXT PRIMARY KEY,
+                    owner TEXT,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    lease_until REAL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            db.execute("CREATE INDEX IF NOT EXISTS grading_jobs_status ON grading_jobs (status, created_at)")
+            # files made before leases existed
+            columns = {row["name"] for row in db.execute("PRAGMA table_info(grading_jobs)")}
+            for column, kind in (("worker", "TEXT"), ("lease_until", "REAL")):
+                if column not in columns:
+                    db.execute(f"ALTER TABLE grading_jobs ADD COLUMN {column} {kind}")
+
+    def _connect(self):
+        # sqlite connections cant be shared between threads, keep one per thread
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            self._local.db = db
+        return db
+
+    def enqueue(self, owner, payload):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO grading_jobs (id, owner, status, payload, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?, ?)",
+            (job_id, owner, json.dumps(payload), now, now)
+        )
+        return job_id
+
+    def claim(self, worker, lease_seconds):
+        # returns (job_id, payload) for the oldest queued or abandoned job, leased
+        # to worker for lease_seconds, or None
+        now = time.time()
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # abandoned jobs go back in the queue, unless they keep killing their workers
+            db.execute(
+                "UPDATE grading_jobs SET status = 'failed', error = 'Worker stopped while grading', updated_at = ? "
+                "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts)
+            )
+            row = db.execute(
+                "SELECT id, payload FROM grading_jobs "
+                "WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is not None:
+                db.execute(
+                    "UPDATE grading_jobs SET status = 'running', attempts = attempts + 1, worker = ?, "
+                    "lease_until = ?, updated_at = ? WHERE id = ?",
+                    (worker, now + lease_seconds, now, row["id"])
+                )
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return (row["id"], json.loads(row["payload"])) if row else None
+
+    def renew(self, job_ids, worker, lease_seconds):
+        if not job_ids:
+            return
+        now = time.time()
+        self._connect().execute(
+            f"UPDATE grading_jobs SET lease_until = ?, updated_at = ? "
+            f"WHERE status = 'running' AND worker = ? AND id IN ({', '.join('?' * len(job_ids))})",
+            (now + lease_seconds, now, worker, *job_ids)
+        )
+
+    def complete(self, job_id, worker, result):
+        self._finish(job_id, worker, "done", json.dumps(result, default=str), None)
+
+    def fail(self, job_id, worker, error):
+        self._finish(job_id, worker, "failed", None, error)
+
+    def _finish(self, job_id, worker, status, result, error):
+        # a worker that lost its lease doesnt overwrite the one grading it now
+        self._connect().execute(
+            "UPDATE grading_jobs SET status = ?, result = ?, error = ?, lease_until = NULL, updated_at = ? "
+            "WHERE id = ? AND status = 'running' AND worker = ?",
+            (status, result, error, time.time(), job_id, worker)
+        )
+
+    def get(self, job_id):
+        row = self._connect().execute(
+            "SELECT id, owner, status, result, error, created_at, updated_at FROM grading_jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "jobId": row["id"],
+            "owner": row["owner"],
+            "status": row["status"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "createdAt": row["created_at"],
+            "updatedAt": row["updated_at"],
+        }
+
+    def purge(self, older_than_seconds):
+        self._connect().execute(
+            "DELETE FROM grading_jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+            (time.time() - older_than_seconds,)
+        )
+
+
+class MemoryJobStore:
+    # same interface as SQLiteJobStore, jobs are lost on restart
+    def __init__(self, max_attempts=3):
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def enqueue(self, owner, payload):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._jobs[job_id] = {
+                "jobId": job_id, "owner": owner, "status": "queued", "payload": payload,
+                "result": None, "error": None, "createdAt": now, "updatedAt": now,
+                "attempts": 0, "worker": None, "leaseUntil": None,
+            }
+        return job_id
+
+    def claim(self, worker, lease_seconds):
+        now = time.time()
+        with self._lock:
+            claimable = []
+            for job in self._jobs.values():
+                expired = job["status"] == "running" and job["leaseUntil"] < now
+                if expired and job["attempts"] >= self.max_attempts:
+                    job.update(status="failed", error="Worker stopped while grading", updatedAt=now)
+                elif job["status"] == "queued" or expired:
+                    claimable.append(job)
+            if not claimable:
+                return None
+            job = min(claimable, key=lambda j: j["createdAt"])
+            job.update(status="running", attempts=job["attempts"] + 1, worker=worker,
+                       leaseUntil=now + lease_seconds, updatedAt=now)
+            return job["jobId"], job["payload"]
+
+    def renew(self, job_ids, worker, lease_seconds):
+        now = time.time()
+        with self._lock:
+            for job_id in job_ids:
+                job = self._jobs.get(job_id)
+                if job and job["status"] == "running" and job["worker"] == worker:
+                    job.update(leaseUntil=now + lease_seconds, updatedAt=now)
+
+    def complete(self, job_id, worker, result):
+        self._finish(job_id, worker, status="done", result=result)
+
+    def fail(self, job_id, worker, error):
+        self._finish(job_id, worker, status="failed", error=error)
+
+    def _finish(self, job_id, worker, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job and job["status"] == "running" and job["worker"] == worker:
+                job.update(leaseUntil=None, updatedAt=time.time(), **fields)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            hidden = ("payload", "attempts", "worker", "leaseUntil")
+            return {k: v for k, v in job.items() if k not in hidden} if job else None
+
+    def purge(self, older_than_seconds):
+        cutoff = time.time() - older_than_seconds
+        with self._lock:
+            for job_id in [j for j, job in self._jobs.items()
+                           if job["status"] in ("done", "failed") and job["updatedAt"] < cutoff]:
+                del self._jobs[job_id]
+
+
+def make_job_store(backend, path=None):
+    if backend == "sqlite":
+        return SQLiteJobStore(path)
+    if backend == "memory":
+        return MemoryJobStore()
+    raise ValueError(f"Unknown grading queue backend: {backend}")
+
+
+class GradingQueue:
+    # handler(payload, job_id) grades one job. submit() only enqueues, the
+    # workers run in whichever process calls start(): grading_worker.py, or the
+    # dev server when main.py is run directly
+    def __init__(self, store, handler, workers=2, poll_seconds=1.0, retention_seconds=86400, lease_seconds=60):
+        self.store = store
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.poll_seconds = poll_seconds
+        self.retention_seconds = retention_seconds
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._held = set()
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"grading-worker-{n}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            thread = threading.Thread(target=self._heartbeat, name="grading-heartbeat", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def join(self):
+        for thread in list(self._threads):
+            thread.join()
+
+    def submit(self, owner, payload):
+        job_id = self.store.enqueue(owner, payload)
+        self._wake.set()
+        return job_id
+
+    def status(self, job_id, owner=None):
+        job = self.store.get(job_id)
+        if job is None or (owner is not None and job["owner"] != owner):
+            return None
+        return {k: v for k, v in job.items() if k != "owner"}
+
+    def _heartbeat(self):
+        # keeps the leases of the jobs this process is grading alive
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            with self._lock:
+                held = list(self._held)
+            try:
+                self.store.renew(held, self.worker_id, self.lease_seconds)
+            except Exception as e:
+                print(f"Grading queue heartbeat error: {e}")
+
+    def _work(self):
+        last_purge = 0
+        while True:
+            try:
+                claimed = self.store.claim(self.worker_id, self.lease_seconds)
+            except Exception as e:
+                print(f"Grading queue claim error: {e}")
+                claimed = None
+
+            if claimed is None:
+                if time.time() - last_purge > 3600:
+                    last_purge = time.time()
+                    try:
+                        self.store.purge(self.retention_seconds)
+                    except Exception as e:
+                        print(f"Grading queue purge error: {e}")
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+                continue
+
+            job_id, payload = claimed
+            with self._lock:
+                self._held.add(job_id)
+            try:
+                self.store.complete(job_id, self.worker_id, self.handler(payload, job_id))
+            except Exception as e:
+                try:
+                    self.store.fail(job_id, self.worker_id, str(e))
+                except Exception as store_error:
+                    # the lease runs out and another worker picks the job up again
+                    print(f"Grading queue fail error: {store_error}")
+            finally:
+                with self._lock:
+                    self._held.discard(job_id)
@@ -0,0 +1,88 @@
+import hashlib
+import threading
+from utils.metrics import metrics
+from utils.ttl_cache import TTLCache
+
+class IdempotencyConflict(Exception):
+    # the key was already used with a different request body
+    pass
+
+
+class IdempotencyTimeout(Exception):
+    # the first request with this key is still running
+    pass
+
+
+class IdempotencyStore:
+    # remembers the response to a request sent with an Idempotency-Key header,
+    # per (user, endpoint, key), so a client retry or double click gets the same
+    # response instead of grading and awarding points twice. a duplicate that
+    # arrives while the first one is still running waits for it
+    MAX_KEY_LENGTH = 255
+
+    def __init__(self, max_entries, ttl_seconds, wait_seconds):
+        self.cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.wait_seconds = wait_seconds
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(body):
+        if isinstance(body, str):
+            body = body.encode()
+        return hashlib.sha256(body or b"").hexdigest()
+
+    def begin(self, user_id, scope, key, body):
+        # returns (entry, stored), stored is None when this request has to do the
+        # work and then call finish(entry, ...) or forget(entry)
+        cache_key = (str(user_id), scope, key)
+        fingerprint = self.fingerprint(body)
+
+        while True:
+            with self._lock:
+                entry = self.cache.get(cache_key)
+                if entry is None:
+                    entry = {"key": cache_key, "fingerprint": fingerprint, "done": threading.Event(), "stored": None}
+                    self.cache.set(cache_key, entry)
+                    return entry, None
+
+            if entry["fingerprint"] != fingerprint:
+                metrics.incr("idempotency.conflicts")
+                raise IdempotencyConflict("Idempotency-Key was already used with a different request")
+
+            if not entry["done"].is_set():
+                metrics.incr("idempotency.waits")
+                if not entry["done"].wait(self.wait_seconds):
+                    raise IdempotencyTimeout("A request with this Idempotency-Key is still being processed")
+
+            if entry["stored"] is not None:
+                metrics.incr("idempotency.replays")
+                return entry, entry["stored"]
+            # the first request failed before answering, loop and take over
+
+    def finish(self, entry, response, status):
+        if status >= 500:
+            # server errors arent worth remembering, let the client retry for real
+            self.forget(entry)
+            return
+        entry["stored"] = (response, status)
+        entry["done"].set()
+
+    def forget(self, entry):
+        with self._lock:
+            if self.cache.get(entry["key"]) is entry:
+                self.cache.delete(entry["key"])
+        entry["done"].set()
+
+    def run(self, user_id, scope, key, body, fn):
+        # returns (response, status, replayed), fn() -> (response, status) only
+        # runs for the first request with this key
+        entry, stored = self.begin(user_id, scope, key, body)
+        if stored is not None:
+            return stored[0], stored[1], True
+        try:
+            response, status = fn()
+        except Exception:
+            self.forget(entry)
+            raise
+        self.finish(entry, response, status)
+        return response, status, False
@@ -0,0 +1,37 @@
+import sys
+from config.settings import supabase_client
+
+class PointsService:
+    # every balance change goes through the PointsLedger table,
+    # see migrations/002_points_ledger.sql for the rpcs. a source starting
+    # with "grading_job:" is only ever awarded once (006_points_job_source.sql)
+
+    @staticmethod
+    def award(user_id, delta, source):
+        # one round-trip, the ledger row and the balance bump commit together
+        if not delta:
+            return None
+        res = supabase_client.rpc("award_points", {
+            "p_user_id": user_id,
+            "p_delta": int(delta),
+            "p_source": source
+        }).execute()
+        return res.data
+
+    @staticmethod
+    def reconcile(user_ids=None):
+        try:
+            res = supabase_client.rpc("reconcile_points", {
+                "p_user_ids": list(user_ids) if user_ids else None
+            }).execute()
+            return {"message": "Balances reconciled", "corrected": res.data or 0}, 200
+        except Exception as e:
+            return {"error": str(e)}, 500
+
+# reconciliation job, run from backend/:
+#   python -m services.points_service             (every user)
+#   python -m services.points_service <userID>... (only those users)
+if __name__ == "__main__":
+    result, status = PointsService.reconcile(sys.argv[1:] or None)
+    print(result)
+    sys.exit(0 if status == 200 else 1)
@@ -0,0 +1,105 @@
+import queue
+import threading
+from collections import deque
+from utils.metrics import metrics
+
+metrics.define_ratio("question_pool.hit_ratio", "question_pool.hits", "question_pool.misses")
+
+class QuestionPool:
+    # stock of generated questions nobody has been handed yet, per
+    # (lessonID, questionTypeID, skilllevel), so "generate more" can answer from
+    # memory while a background thread generates the next batch. only take()
+    # queues refills, so a lesson is stocked once someone asks it for more
+    # questions rather than whenever its page is viewed.
+    # targets(skill_level) -> {question_type_id: how many to keep in stock}
+    # generate(lesson_id, skill_level, question_type_ids) -> {question_type_id: [rows]}
+    def __init__(self, targets, generate, max_lessons=500):
+        self.targets = targets
+        self.generate = generate
+        self.max_lessons = max_lessons
+        self._lock = threading.Lock()
+        self._stock = {}           # (lesson_id, type_id, skill_level) -> deque of question rows
+        self._pending = set()      # (lesson_id, skill_level) queued or refilling
+        self._refills = queue.Queue()
+        self._worker = None
+
+    def take(self, lesson_id, skill_level, counts):
+        # pops counts[type_id] questions of every type, or returns None and leaves
+        # the stock alone when any type is short. either way a refill is queued
+        with self._lock:
+            short = any(
+                len(self._stock.get((lesson_id, type_id, skill_level), ())) < count
+                for type_id, count in counts.items()
+            )
+            questions = []
+            if not short:
+                for type_id, count in counts.items():
+                    stock = self._stock[(lesson_id, type_id, skill_level)]
+                    questions.extend(stock.popleft() for _ in range(count))
+            self._report()
+
+        metrics.incr("question_pool.misses" if short else "question_pool.hits")
+        self.replenish(lesson_id, skill_level)
+        return None if short else questions
+
+    def stocked_ids(self, lesson_id, type_id, skill_level):
+        # ids held back for "generate more", the page load shouldnt show them yet
+        with self._lock:
+            return {row["questionID"] for row in self._stock.get((lesson_id, type_id, skill_level), ())}
+
+    def depth(self, lesson_id, skill_level):
+        with self._lock:
+            return {
+                type_id: len(self._stock.get((lesson_id, type_id, skill_level), ()))
+                for type_id in self.targets(skill_level)
+            }
+
+    def missing(self, lesson_id, skill_level):
+        depth = self.depth(lesson_id, skill_level)
+        return [type_id for type_id, target in self.targets(skill_level).items() if depth[type_id] < target]
+
+    def replenish(self, lesson_id, skill_level):
+        # queues a background refill unless the stock is full or one is already queued
+        key = (lesson_id, skill_level)
+        if not self.missing(lesson_id, skill_level):
+            return
+        with self._lock:
+            if key in self._pending:
+                return
+            lessons = {lesson for lesson, _ in self._pending} | {lesson for lesson, _, _ in self._stock}
+            if lesson_id not in lessons and len(lessons) >= self.max_lessons:
+                return
+            self._pending.add(key)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._work, name="question-pool", daemon=True)
+                self._worker.start()
+        self._refills.put(key)
+
+    def _work(self):
+        while True:
+            lesson_id, skill_level = self._refills.get()
+            added = 0
+            try:
+                missing = self.missing(lesson_id, skill_level)
+                if missing:
+                    metrics.incr("question_pool.refills")
+                    generated = self.generate(lesson_id, skill_level, missing)
+                    with self._lock:
+                        for type_id, rows in generated.items():
+                            self._stock.setdefault((lesson_id, type_id, skill_level), deque()).extend(rows)
+                            added += len(rows)
+                        self._report()
+            except Exception as e:
+                metrics.incr("question_pool.refill_failures")
+                print(f"Question pool refill failed for lesson {lesson_id}: {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard((lesson_id, skill_level))
+            # one generation may not reach the target, go again only if it helped
+            if added:
+                self.replenish(lesson_id, skill_level)
+
+    def _report(self):
+        # caller holds the lock
+        metrics.set_gauge("question_pool.depth", sum(len(stock) for stock in self._stock.values()))
+        metrics.set_gauge("question_pool.keys", sum(1 for stock in self._stock.values() if stock))
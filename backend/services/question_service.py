@@ -1,8 +1,47 @@
 import json
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 from prompt import *
-from config.settings import supabase_client
+from config.settings import (
+    supabase_client, GENERATION_MAX_WORKERS, GENERATION_TIMEOUT_SECONDS, GENERATION_TYPE_TIMEOUTS,
+    GENERATION_FRESH_SECONDS, QUESTION_POOL_ENABLED, QUESTION_POOL_TARGET_BATCHES, QUESTION_POOL_MAX_LESSONS,
+    DUPLICATE_CHECK_ENABLED, DUPLICATE_THRESHOLD, DUPLICATE_NUM_PERM, DUPLICATE_BANDS,
+    QUESTION_SET_CACHE_TTL_SECONDS, QUESTION_SET_CACHE_MAX_ENTRIES, QUESTION_SET_CANDIDATES
+)
+from utils.metrics import metrics
+from utils.single_flight import SingleFlight
+from utils.json_stream import iter_json_array
+from utils.ttl_cache import TTLCache
+from services.question_pool import QuestionPool
+from services.duplicate_index import DuplicateIndex
+from services.seen_index import SeenIndex
+from services.answer_service import seen_questions, code_runner
+from services.code_runner import checkable
 from services.user_service import *
 
+metrics.define_ratio("question_sets.hit_ratio", "question_sets.hits", "question_sets.misses")
+
+# (lessonID, skill level) -> the newest candidates for its page, see Questions.invalidate.
+# lessonID -> times invalidated, so a select that raced a save isnt cached
+question_sets = TTLCache(max_entries=QUESTION_SET_CACHE_MAX_ENTRIES, ttl_seconds=QUESTION_SET_CACHE_TTL_SECONDS)
+question_set_versions = {}
+
+# shared by every generate request, a type that times out keeps its thread until gemini answers
+generation_pool = ThreadPoolExecutor(max_workers=max(4, GENERATION_MAX_WORKERS), thread_name_prefix="generator")
+
+# one generation per (subunit, skill level) at a time, and requests right after
+# it finishes get the questions it just made instead of another gemini round
+generation_flight = SingleFlight(
+    "generation", fresh_seconds=GENERATION_FRESH_SECONDS, keep=lambda result: result[1] == 200
+)
+# the same for the streamed endpoint, which the page uses: later requests get the
+# leader's events replayed from the start and then live. a failed run isnt replayed
+generation_stream_flight = SingleFlight(
+    "generation_stream", fresh_seconds=GENERATION_FRESH_SECONDS,
+    keep=lambda event: event is not None and event[0] == "done" and "error" not in event[1]
+)
+
 class Questions:
     def __init__(self,
                     question_type_id: int,
@@ -14,7 +53,9 @@ class Questions:
                     constraints: str,
                     generated: bool,
                     skilllevel: int,
-                    avgTimeSeconds: int):
+                    avgTimeSeconds: int,
+                    test_cases: list = None,
+                    constraint_rules: list = None):
             
             self.question_type_id = question_type_id
             self.lesson_id = lesson_id
@@ -26,51 +67,264 @@ class Questions:
             self.generated = generated
             self.skilllevel = skilllevel
             self.avgTimeSeconds = avgTimeSeconds
+            self.test_cases = test_cases or []
+            self.constraint_rules = constraint_rules or []
+
+    # questions shown per type on a subunit page, by chosen skill level
+    TYPE_LIMITS = {
+        1: {
+            1: 3,  # MCQ
+            3: 1,  # Fill-in
+            4: 1   # Drag-Drop
+            # No coding
+        },
+        2: {
+            1: 2,
+            3: 1,
+            4: 1,
+            2: 1  # 1 Coding
+        },
+        3: {
+            3: 1,  # Fill-in
+            2: 4  # coding
+        },
+    }
+
+    # columns sent to the client for a question
+    CLIENT_FIELDS = ("questionID", "questionText", "correctAnswer", "options", "questionTypeID",
+                     "constraints", "skilllevel", "avgTimeSeconds")
 
     @staticmethod
-    def fetch_questions_by_type(subunit_id, question_type_id, limit):
+    def from_generated(q, question_type_id, subunit_id, skill_level):
+        return Questions(
+            question_type_id=question_type_id,
+            lesson_id=subunit_id,
+            question_text=q["question"],
+            correct_answer=q["correct_answer"],
+            options=q.get("options", {}),
+            constraints=q.get("constraints", ""),
+            tags=q.get("tags", []),
+            generated=True,
+            skilllevel=skill_level,
+            avgTimeSeconds=q.get("avgTimeSeconds", 120),
+            test_cases=q.get("test_cases", []),
+            constraint_rules=q.get("constraint_rules", [])
+        )
+
+    @staticmethod
+    def fetch_question_set(subunit_id, type_limits, exclude=()):
+        # the newest type_limits[type] generated questions of every type in one
+        # select_questions rpc (migrations/005_question_selection.sql), grouped
+        # by type in type_limits order, newest first
+        response = supabase_client.rpc("select_questions", {
+            "p_lesson_id": subunit_id,
+            "p_limits": {str(q_type): limit for q_type, limit in type_limits.items()},
+            "p_exclude": sorted(exclude)
+        }).execute()
+
+        by_type = {q_type: [] for q_type in type_limits}
+        for row in response.data or []:
+            rows = by_type.get(row["questionTypeID"])
+            if rows is not None and len(rows) < type_limits[row["questionTypeID"]]:
+                rows.append({k: row.get(k) for k in Questions.CLIENT_FIELDS})
+        return [row for rows in by_type.values() for row in rows]
+
+    @staticmethod
+    def pick(candidates, type_limits, seen):
+        # a page from the candidates, per type the newest questions the user
+        # hasnt answered and answered ones only when there arent enough
+        by_type = {q_type: ([], []) for q_type in type_limits}
+        for row in candidates:
+            unseen, answered = by_type[row["questionTypeID"]]
+            (answered if SeenIndex.contains(seen, row["questionID"]) else unseen).append(row)
+
+        questions = []
+        for q_type, limit in type_limits.items():
+            unseen, answered = by_type[q_type]
+            page = (unseen + answered)[:limit]
+            metrics.incr("question_sets.repeats", max(0, len(page) - len(unseen)))
+            questions.extend(page)
+        return questions
+
+    @staticmethod
+    def invalidate(subunit_id):
+        # new questions for the lesson, every skill level's cached page is stale
+        question_set_versions[subunit_id] = question_set_versions.get(subunit_id, 0) + 1
+        question_sets.delete_where(lambda key: key[0] == subunit_id)
+
+    @staticmethod
+    def to_row(question):
+        return {
+            "questionTypeID": question.question_type_id,
+            "lessonID": question.lesson_id,
+            "correctAnswer": question.correct_answer,
+            "questionText": question.question_text,
+            "options": question.options,
+            "tags": question.tags,
+            "constraints": question.constraints,
+            "generated": True,
+            "skilllevel": question.skilllevel,
+            "avgTimeSeconds": question.avgTimeSeconds,
+            "testCases": question.test_cases,
+            "constraintRules": question.constraint_rules
+        }
+
+    def persist(question): 
         try:
-            fields = "questionID, questionText, correctAnswer, options, questionTypeID, constraints, skilllevel, avgTimeSeconds"
             response = (
                 supabase_client.table("Question")
-                .select(fields)
-                .eq("lessonID", subunit_id)
-                .eq("questionTypeID", question_type_id)
-                .eq("generated", True)
-                .order("created_at", desc=True)
-                .limit(limit)
+                .insert([Questions.to_row(question)])
                 .execute()
             )
-            return response.data if response.data else []
-        except Exception as e:
-            print(f"Error fetching questions type {question_type_id}:", e)
-            return []
+            Questions.invalidate(question.lesson_id)
+            return {"success": True, "data": response.data, "status": 201}
+        except Exception as exception:
+            return {"success": False, "error": str(exception), "status": 500}
 
-    def persist(question): 
+    @staticmethod
+    def persist_batch(questions):
+        # one insert for the whole batch, postgrest runs it as a single statement
+        # so either every question is saved or none are. data is the new rows in
+        # the order given, questionID included
+        if not questions:
+            return {"success": True, "data": [], "status": 201}
         try:
             response = (
                 supabase_client.table("Question")
-                .insert([
-                    {   
-                        "questionTypeID": question.question_type_id,
-                        "lessonID": question.lesson_id,
-                        "correctAnswer": question.correct_answer,
-                        "questionText": question.question_text,
-                        "options": question.options,
-                        "tags": question.tags,
-                        "constraints": question.constraints,
-                        "generated": True,
-                        "skilllevel": question.skilllevel,
-                        "avgTimeSeconds": question.avgTimeSeconds
-                    }
-                ])
+                .insert([Questions.to_row(question) for question in questions])
                 .execute()
             )
-            print(response.data)
+            if len(response.data or []) != len(questions):
+                raise Exception(f"Saved {len(response.data or [])} of {len(questions)} questions")
+            for lesson_id in {question.lesson_id for question in questions}:
+                Questions.invalidate(lesson_id)
             return {"success": True, "data": response.data, "status": 201}
         except Exception as exception:
             return {"success": False, "error": str(exception), "status": 500}
 
+    @staticmethod
+    def fetch_for_index(subunit_id, page_size=1000):
+        # every question of the subunit, in pages since supabase caps a select
+        rows = []
+        while True:
+            response = (
+                supabase_client.table("Question")
+                .select("questionID, questionText, correctAnswer")
+                .eq("lessonID", subunit_id)
+                .order("questionID")
+                .range(len(rows), len(rows) + page_size - 1)
+                .execute()
+            )
+            page = response.data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+
+    @staticmethod
+    def claim_unique(q, subunit_id):
+        # (True, claim) when q may be saved, claim is None if it went unchecked.
+        # (False, None) when the subunit already has a near-duplicate of it
+        if not duplicate_index:
+            return True, None
+        try:
+            claim = duplicate_index.claim(subunit_id, q.get("question"), q.get("correct_answer"))
+        except Exception as e:
+            # the bank couldnt be loaded, save unchecked rather than lose the question
+            print(f"Duplicate check failed for lesson {subunit_id}: {e}")
+            return True, None
+        if claim is None:
+            print(f"Skipping near-duplicate question for lesson {subunit_id}: {q.get('question')!r}")
+            return False, None
+        return True, claim
+
+    @staticmethod
+    def check_tests(generated, question_type_id):
+        # coding questions keep only the test cases their own correct_answer
+        # passes in the sandbox, and a question whose answer passes none of
+        # them is left out. gemini gets those wrong often enough
+        if question_type_id != 2:
+            return generated
+        runs = {}
+        for i, q in enumerate(generated):
+            tests = q.get("test_cases")
+            if isinstance(tests, list) and tests and code_runner.available():
+                # an assertion the parent cant compare would never grade anything
+                tests = [t for t in tests if checkable(t)]
+                runs[i] = (tests, code_runner.submit(str(q.get("correct_answer") or ""), tests))
+
+        checked = []
+        for i, q in enumerate(generated):
+            if not q.get("test_cases"):
+                checked.append(q)
+                continue
+            if i not in runs:
+                # nothing to check them with here, unchecked tests arent saved
+                checked.append({**q, "test_cases": []})
+                continue
+            tests, future = runs[i]
+            try:
+                results = future.result(timeout=code_runner.timeout(tests))
+                if any(r.get("infra") for r in results):
+                    raise Exception(next(r["error"] for r in results if r.get("infra")))
+            except Exception as e:
+                # the runner failing says nothing about the tests
+                print(f"Test case check failed for {q.get('question')!r}: {e}")
+                checked.append({**q, "test_cases": []})
+                continue
+            passing = [test for test, result in zip(tests, results) if result["passed"]]
+            metrics.incr("generation.tests_dropped", len(q["test_cases"]) - len(passing))
+            if not passing:
+                metrics.incr("generation.questions_dropped")
+                print(f"Skipping question whose answer fails its tests: {q.get('question')!r}")
+                continue
+            checked.append({**q, "test_cases": passing})
+        return checked
+
+    @staticmethod
+    def save_generated(q, question_type_id, subunit_id, skill_level):
+        # persists one generated question and returns its row, or None when the
+        # subunit already has a near-duplicate of it or its tests dont hold
+        checked = Questions.check_tests([q], question_type_id)
+        if not checked:
+            return None
+        q = checked[0]
+        unique, claim = Questions.claim_unique(q, subunit_id)
+        if not unique:
+            return None
+
+        res = Questions.persist(Questions.from_generated(q, question_type_id, subunit_id, skill_level))
+        if not res["success"]:
+            if claim:
+                duplicate_index.release(claim)
+            raise Exception(res.get("error", "tests error"))
+        row = res["data"][0]
+        if claim:
+            duplicate_index.confirm(claim, row["questionID"])
+        return row
+
+    @staticmethod
+    def save_generated_batch(generated, question_type_id, subunit_id, skill_level):
+        # persists a generated batch in one all-or-nothing insert, near-duplicates
+        # and questions failing their own tests left out, and returns the saved rows
+        batch = []
+        claims = []
+        for q in Questions.check_tests(generated, question_type_id):
+            unique, claim = Questions.claim_unique(q, subunit_id)
+            if unique:
+                batch.append(Questions.from_generated(q, question_type_id, subunit_id, skill_level))
+                claims.append(claim)
+
+        res = Questions.persist_batch(batch)
+        if not res["success"]:
+            for claim in claims:
+                if claim:
+                    duplicate_index.release(claim)
+            raise Exception(res.get("error", "tests error"))
+        for claim, row in zip(claims, res["data"]):
+            if claim:
+                duplicate_index.confirm(claim, row["questionID"])
+        return res["data"]
+
     @staticmethod
     def get_questions(subunit_id, user):
         try:
@@ -78,28 +332,35 @@ class Questions:
             if skill_level_id not in [1, 2, 3]:
                 return {"error": "Invalid skill level provided"}, 400
 
-            if skill_level_id == 1:
-                type_limits = {
-                    1: 3,  # MCQ
-                    3: 1,  # Fill-in
-                    4: 1   # Drag-Drop
-                    # No coding
-                }
-            elif skill_level_id == 2:
-                type_limits = {
-                    1: 2,
-                    3: 1,
-                    4: 1,
-                    2: 1  # 1 Coding
-                }
-            elif skill_level_id == 3:
-                type_limits = {
-                    3: 1,  # Fill-in
-                    2: 4  # coding
-                }
-            questions = []
-            for q_type, limit in type_limits.items():
-                questions.extend(Questions.fetch_questions_by_type(subunit_id, q_type, limit))
+            type_limits = Questions.TYPE_LIMITS[skill_level_id]
+            key = (subunit_id, skill_level_id)
+            candidates = question_sets.get(key)
+            if candidates is None:
+                metrics.incr("question_sets.misses")
+                version = question_set_versions.get(subunit_id, 0)
+                # questions stocked for "generate more" stay hidden until they're handed out
+                held = set()
+                if question_pool:
+                    for q_type in type_limits:
+                        held |= question_pool.stocked_ids(subunit_id, q_type, skill_level_id)
+                candidates = Questions.fetch_question_set(
+                    subunit_id,
+                    {q_type: limit * QUESTION_SET_CANDIDATES for q_type, limit in type_limits.items()},
+                    held
+                )
+                if question_set_versions.get(subunit_id, 0) == version:
+                    question_sets.set(key, candidates)
+            else:
+                metrics.incr("question_sets.hits")
+
+            seen = ()
+            if user.get("userID"):
+                try:
+                    seen = seen_questions.seen(user["userID"], subunit_id)
+                except Exception as e:
+                    # without the index the page just may repeat answered questions
+                    print(f"Seen questions unavailable for {user['userID']}: {e}")
+            questions = Questions.pick(candidates, type_limits, seen)
 
             if not questions:
                 return {"error": "No questions found"}, 404
@@ -109,55 +370,266 @@ class Questions:
         except Exception as e:
             return {"error": str(e)}, 500
 
+    # question type id -> name used in responses and GENERATION_TYPE_TIMEOUTS,
+    # its prompt and the streamed version of the prompt
+    GENERATORS = {
+        1: ("mcq", Prompt.generate_MCQ, Prompt.stream_MCQ),
+        2: ("coding", Prompt.generate_coding, Prompt.stream_coding),
+        3: ("fill_in", Prompt.generate_fill_in, Prompt.stream_fill_in),
+        4: ("drag_and_drop", Prompt.generate_drag_and_drop, Prompt.stream_drag_and_drop),
+    }
+
+    @staticmethod
+    def generate_type(question_type_id, prompt, subunit_id, skill_level, deadline):
+        # runs on generation_pool, generates and persists one question type,
+        # returns the new questions as the client sees them
+        name, generate, _ = Questions.GENERATORS[question_type_id]
+        result = generate(prompt)
+        if not result.ok:
+            raise Exception(f"{result.error}: {result.details}")
+        if not isinstance(result.data, list):
+            raise Exception(f"Malformed {name} questions")
+        # the request already reported this type as timed out, dont save questions nobody asked for
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{name} questions arrived after the deadline")
+
+        rows = Questions.save_generated_batch(result.data, question_type_id, subunit_id, skill_level)
+        return [{k: row.get(k) for k in Questions.CLIENT_FIELDS} for row in rows]
+
+    @staticmethod
+    def take_stocked(subunit_id, skill_level):
+        # a page worth of pre-generated questions, or None when the pool cant cover it
+        if question_pool is None:
+            return None
+        questions = question_pool.take(subunit_id, skill_level, Questions.TYPE_LIMITS.get(skill_level, {}))
+        if questions is not None:
+            # they were hidden from the cached page while stocked
+            Questions.invalidate(subunit_id)
+        return questions
+
+    @staticmethod
+    def stocked_summary(questions, skill_level):
+        return {
+            "message": "Questions generated and stored",
+            "question_ids": [q["questionID"] for q in questions],
+            "succeeded": [Questions.GENERATORS[t][0] for t in Questions.TYPE_LIMITS.get(skill_level, {})],
+            "failed": {},
+            "fromPool": True
+        }
+
     def generate_questions(subunit_id, user):
-        try:
-            skill_level = user["chosenSkillLevel"]
-            
-            subunit_info = (
-            supabase_client.table("RefSubUnit")
-                    .select("subUnitDescription, RefUnit(unitDescription)")
-                    .eq("subUnitID", subunit_id)
-                    .single()
-                    .execute()
-            )
+        skill_level = user["chosenSkillLevel"]
+        questions = Questions.take_stocked(subunit_id, skill_level)
+        if questions is not None:
+            return Questions.stocked_summary(questions, skill_level), 200
 
-            if not subunit_info.data:
+        # a class clicking "generate more" on the same subunit shares one generation
+        return generation_flight.do(
+            (subunit_id, skill_level), lambda: Questions.run_generation(subunit_id, skill_level)
+        )
+
+    @staticmethod
+    def generation_prompt(subunit_id, skill_level):
+        # None when the subunit doesnt exist
+        subunit_info = (
+        supabase_client.table("RefSubUnit")
+                .select("subUnitDescription, RefUnit(unitDescription)")
+                .eq("subUnitID", subunit_id)
+                .single()
+                .execute()
+        )
+
+        if not subunit_info.data:
+            return None
+
+        unitDescription = subunit_info.data["RefUnit"]["unitDescription"]
+        subUnitDescription = subunit_info.data["subUnitDescription"]
+        prompt = f"generate new questions for: unitDescription:({unitDescription}), subUnitDescription: ({subUnitDescription}), Skill Level is {skill_level} (Beginner=1, Intermediate=2, Advanced=3)"
+        print(prompt)
+        return prompt
+
+    @staticmethod
+    def run_generation(subunit_id, skill_level):
+        try:
+            prompt = Questions.generation_prompt(subunit_id, skill_level)
+            if prompt is None:
                 return {"error": "Subunit not found"}, 404
 
-            unitDescription = subunit_info.data["RefUnit"]["unitDescription"]
-            subUnitDescription = subunit_info.data["subUnitDescription"]
-            prompt = f"generate new questions for: unitDescription:({unitDescription}), subUnitDescription: ({subUnitDescription}), Skill Level is {skill_level} (Beginner=1, Intermediate=2, Advanced=3)"
-            print(prompt)
+            # all four types at once, each saved as soon as it parses, so the request
+            # takes about as long as the slowest type and one failure keeps the others
+            started = time.monotonic()
+            futures = {}
+            for question_type_id, (name, _, _) in Questions.GENERATORS.items():
+                deadline = started + GENERATION_TYPE_TIMEOUTS.get(name, GENERATION_TIMEOUT_SECONDS)
+                future = generation_pool.submit(
+                    Questions.generate_type, question_type_id, prompt, subunit_id, skill_level, deadline
+                )
+                futures[name] = (future, deadline)
 
             question_ids = []
+            succeeded = []
+            failed = {}
+            for name, (future, deadline) in futures.items():
+                try:
+                    rows = future.result(timeout=max(0, deadline - time.monotonic()))
+                    question_ids.extend(row["questionID"] for row in rows)
+                    succeeded.append(name)
+                except FuturesTimeout:
+                    metrics.incr("generation.timeouts")
+                    failed[name] = "Timed out"
+                except Exception as e:
+                    metrics.incr("generation.failures")
+                    failed[name] = str(e)
+
+            if not succeeded:
+                return {"error": "Question generation failed", "failed": failed}, 500
 
-            def process_questions(data, question_type_id):
-                for q in data:
-                    avg_time = q.get("avgTimeSeconds", 120)
-                    question = Questions(
-                        question_type_id=question_type_id,
-                        lesson_id=subunit_id,
-                        question_text=q["question"],
-                        correct_answer=q["correct_answer"],
-                        options=q.get("options", {}),
-                        constraints=q.get("constraints", ""),
-                        tags=q.get("tags", []),
-                        generated=True,
-                        skilllevel=skill_level,
-                        avgTimeSeconds=avg_time
-                    )
-                    res = Questions.persist(question)
-                    if not res["success"]:
-                        raise Exception(res.get("error", "tests error"))
-                    question_ids.append(res["data"][0]["questionID"])
-
-            # Generate and persist the questions for each type
-            process_questions(json.loads(Prompt.generate_MCQ(prompt)), 1)
-            process_questions(json.loads(Prompt.generate_coding(prompt)), 2)
-            process_questions(json.loads(Prompt.generate_fill_in(prompt)), 3)
-            process_questions(json.loads(Prompt.generate_drag_and_drop(prompt)), 4)
-
-            return {"message": "Questions generated and stored", "question_ids": question_ids}, 200
+            return {
+                "message": "Questions generated and stored",
+                "question_ids": question_ids,
+                "succeeded": succeeded,
+                "failed": failed
+            }, 200
 
         except Exception as e:
             return {"error": str(e)}, 500
+
+    @staticmethod
+    def generate_stock(subunit_id, skill_level, question_type_ids):
+        # background refill for question_pool, returns {question_type_id: [rows]}
+        # for the types that generated in time
+        prompt = Questions.generation_prompt(subunit_id, skill_level)
+        if prompt is None:
+            return {}
+
+        started = time.monotonic()
+        futures = {}
+        for question_type_id in question_type_ids:
+            name = Questions.GENERATORS[question_type_id][0]
+            deadline = started + GENERATION_TYPE_TIMEOUTS.get(name, GENERATION_TIMEOUT_SECONDS)
+            futures[question_type_id] = (generation_pool.submit(
+                Questions.generate_type, question_type_id, prompt, subunit_id, skill_level, deadline
+            ), deadline)
+
+        generated = {}
+        for question_type_id, (future, deadline) in futures.items():
+            try:
+                generated[question_type_id] = future.result(timeout=max(0, deadline - time.monotonic()))
+            except Exception as e:
+                print(f"Stock generation failed for type {question_type_id}: {e}")
+        return generated
+
+    @staticmethod
+    def stream_type(question_type_id, prompt, subunit_id, skill_level, deadline, events):
+        # runs on generation_pool, persists each question of one type as soon as
+        # its object closes in the gemini stream and puts it on the events queue
+        name, _, stream = Questions.GENERATORS[question_type_id]
+        question_ids = []
+        try:
+            for q in iter_json_array(stream(prompt)):
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"{name} questions arrived after the deadline")
+                row = Questions.save_generated(q, question_type_id, subunit_id, skill_level)
+                if row is None:
+                    continue
+                question_ids.append(row["questionID"])
+                events.put((name, "question", {k: row.get(k) for k in Questions.CLIENT_FIELDS}))
+            events.put((name, "done", question_ids))
+        except Exception as e:
+            events.put((name, "failed", str(e)))
+
+    @staticmethod
+    def stream_questions(subunit_id, skill_level):
+        # stream_generation shared by everyone asking for the same page at once
+        return generation_stream_flight.stream(
+            (subunit_id, skill_level), lambda: Questions.stream_generation(subunit_id, skill_level)
+        )
+
+    @staticmethod
+    def stream_generation(subunit_id, skill_level):
+        # yields ("question", row) for every new question the page would show, as
+        # soon as it is saved, then ("done", {...}) with the same summary as
+        # generate_questions. every generated question is saved either way
+        stocked = Questions.take_stocked(subunit_id, skill_level)
+        if stocked is not None:
+            for row in stocked:
+                yield "question", row
+            yield "done", Questions.stocked_summary(stocked, skill_level)
+            return
+
+        try:
+            prompt = Questions.generation_prompt(subunit_id, skill_level)
+        except Exception as e:
+            yield "done", {"error": str(e)}
+            return
+        if prompt is None:
+            yield "done", {"error": "Subunit not found"}
+            return
+
+        type_limits = Questions.TYPE_LIMITS.get(skill_level, {})
+        shown = {question_type_id: 0 for question_type_id in type_limits}
+
+        started = time.monotonic()
+        events = queue.Queue()
+        deadlines = {}
+        for question_type_id, (name, _, _) in Questions.GENERATORS.items():
+            deadlines[name] = started + GENERATION_TYPE_TIMEOUTS.get(name, GENERATION_TIMEOUT_SECONDS)
+            generation_pool.submit(
+                Questions.stream_type, question_type_id, prompt, subunit_id, skill_level, deadlines[name], events
+            )
+
+        question_ids = []
+        succeeded = []
+        failed = {}
+        while deadlines:
+            try:
+                name, kind, data = events.get(timeout=max(0, min(deadlines.values()) - time.monotonic()))
+            except queue.Empty:
+                now = time.monotonic()
+                for name in [n for n, deadline in deadlines.items() if deadline <= now]:
+                    metrics.incr("generation.timeouts")
+                    failed[name] = "Timed out"
+                    del deadlines[name]
+                continue
+            if name not in deadlines:
+                continue
+
+            if kind == "question":
+                question_ids.append(data["questionID"])
+                question_type_id = data["questionTypeID"]
+                if shown.get(question_type_id, 0) < type_limits.get(question_type_id, 0):
+                    shown[question_type_id] += 1
+                    yield "question", data
+            elif kind == "done":
+                succeeded.append(name)
+                del deadlines[name]
+            else:
+                metrics.incr("generation.failures")
+                failed[name] = data
+                del deadlines[name]
+
+        if not succeeded:
+            yield "done", {"error": "Question generation failed", "question_ids": question_ids, "failed": failed}
+            return
+        yield "done", {"question_ids": question_ids, "succeeded": succeeded, "failed": failed}
+
+
+# pre-generated questions for "generate more", QUESTION_POOL_TARGET_BATCHES pages
+# worth per (lesson, type, skill level) kept in stock by a background thread
+question_pool = QuestionPool(
+    targets=lambda skill_level: {
+        question_type_id: limit * QUESTION_POOL_TARGET_BATCHES
+        for question_type_id, limit in Questions.TYPE_LIMITS.get(skill_level, {}).items()
+    },
+    generate=Questions.generate_stock,
+    max_lessons=QUESTION_POOL_MAX_LESSONS
+) if QUESTION_POOL_ENABLED else None
+
+# per-subunit minhash index of the question bank, generated questions too close
+# to one the subunit already has are dropped instead of saved
+duplicate_index = DuplicateIndex(
+    load=Questions.fetch_for_index,
+    threshold=DUPLICATE_THRESHOLD,
+    num_perm=DUPLICATE_NUM_PERM,
+    bands=DUPLICATE_BANDS
+) if DUPLICATE_CHECK_ENABLED else None
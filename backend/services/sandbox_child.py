@@ -0,0 +1,179 @@
+import builtins
+import ctypes
+import io
+import json
+import os
+import resource
+import sys
+
+# runs one test case of a student's answer, started by CodeRunner as
+# "python -I -S sandbox_child.py" in a fresh interpreter with only stdin,
+# stdout and stderr open and an empty environment. the job comes in as json
+# on stdin: the code, the text for input() and the expressions of the test's
+# assertion. it never gets the expected output or values, the parent compares
+# those, so whatever the answer writes to stdout can only ever be its own
+# output and values. before the answer runs the process gets its rlimits,
+# drops root and installs a seccomp filter that only allows the syscalls
+# plain computation needs, so files, sockets, processes and signals are
+# refused by the kernel rather than by anything the answer could overwrite.
+# stdlib only, this file runs outside the app's import path
+
+# imported before the filter goes on, student code can only import these
+PRELOADED_MODULES = (
+    "math", "random", "string", "itertools", "collections", "functools",
+    "statistics", "datetime", "re", "operator", "decimal", "fractions", "json",
+)
+
+# everything else fails with EPERM
+ALLOWED_SYSCALLS = (
+    "read", "write", "readv", "writev", "close", "fstat", "newfstatat", "lseek",
+    "mmap", "munmap", "mremap", "mprotect", "madvise", "brk",
+    "rt_sigaction", "rt_sigprocmask", "rt_sigreturn", "sigaltstack",
+    "futex", "getpid", "gettid", "getrandom", "sched_yield", "sched_getaffinity",
+    "clock_gettime", "clock_getres", "clock_nanosleep", "nanosleep", "gettimeofday", "time",
+    "getrusage", "exit", "exit_group",
+)
+
+SCMP_ACT_ALLOW = 0x7FFF0000
+SCMP_ACT_ERRNO_EPERM = 0x00050000 | 1
+NOBODY = 65534
+
+MAX_OUTPUT_CHARS = 10000
+MAX_VALUE_CHARS = 2000
+
+# written right before the answer runs, the parent starts the wall clock on it
+READY = b"READY\n"
+
+
+class SandboxUnavailable(Exception):
+    pass
+
+
+class OutputLimitExceeded(Exception):
+    pass
+
+
+class CappedOutput(io.StringIO):
+    def write(self, text):
+        if self.tell() + len(text) > MAX_OUTPUT_CHARS:
+            raise OutputLimitExceeded("Output limit exceeded")
+        return super().write(text)
+
+
+def describe(error):
+    message = str(error)
+    return f"{type(error).__name__}: {message}" if message else type(error).__name__
+
+
+def apply_limits(limits):
+    cpu = limits["cpu_seconds"]
+    memory = limits["memory_mb"] * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (3, 3))
+
+
+def drop_root():
+    # hard rlimits stay put once we arent root. inside a user namespace where
+    # nobody isnt mapped this fails, there "root" has no privileges outside anyway
+    if os.geteuid() != 0:
+        return
+    try:
+        os.setgroups([])
+        os.setgid(NOBODY)
+        os.setuid(NOBODY)
+    except OSError:
+        pass
+
+
+def load_seccomp():
+    # opened before the fd limit leaves no room for it
+    try:
+        lib = ctypes.CDLL("libseccomp.so.2")
+    except OSError as e:
+        raise SandboxUnavailable(f"libseccomp not found: {e}")
+    lib.seccomp_init.restype = ctypes.c_void_p
+    lib.seccomp_init.argtypes = [ctypes.c_uint32]
+    lib.seccomp_rule_add.argtypes = [ctypes.c_void_p, ctypes.c_uint32, ctypes.c_int, ctypes.c_uint]
+    lib.seccomp_syscall_resolve_name.argtypes = [ctypes.c_char_p]
+    lib.seccomp_load.argtypes = [ctypes.c_void_p]
+    return lib
+
+
+def install_seccomp(lib):
+    ctx = lib.seccomp_init(SCMP_ACT_ERRNO_EPERM)
+    if not ctx:
+        raise SandboxUnavailable("seccomp_init failed")
+    for name in ALLOWED_SYSCALLS:
+        number = lib.seccomp_syscall_resolve_name(name.encode())
+        if number >= 0 and lib.seccomp_rule_add(ctx, SCMP_ACT_ALLOW, number, 0) != 0:
+            raise SandboxUnavailable(f"seccomp_rule_add failed for {name}")
+    # libseccomp sets no_new_privs before loading, the filter cant be lifted afterwards
+    if lib.seccomp_load(ctx) != 0:
+        raise SandboxUnavailable("seccomp_load failed")
+    # nothing left that could be useful to the answer
+    for name in [n for n in sys.modules if n == "ctypes" or n.startswith(("ctypes.", "_ctypes"))]:
+        del sys.modules[name]
+
+
+def run(job):
+    code = job["code"]
+
+    for name in PRELOADED_MODULES:
+        __import__(name)
+    lib = load_seccomp()
+
+    stdin = io.StringIO(job.get("stdin") or "")
+    stdout = CappedOutput()
+
+    def quiet_input(prompt=""):
+        # the prompt text isnt part of the expected output
+        line = stdin.readline()
+        if not line:
+            raise EOFError("EOF when reading a line")
+        return line.rstrip("\n")
+
+    safe_builtins = dict(vars(builtins))
+    safe_builtins["input"] = quiet_input
+    namespace = {"__name__": "__main__", "__builtins__": safe_builtins}
+
+    try:
+        compiled = compile(code, "<answer>", "exec")
+    except SyntaxError as e:
+        return {"output": "", "error": f"SyntaxError: {e.msg} (line {e.lineno})", "syntax": True}
+    probes = [compile(probe, "<test>", "eval") for probe in job.get("probes") or []]
+
+    apply_limits(job["limits"])
+    drop_root()
+    install_seccomp(lib)
+
+    os.write(sys.__stdout__.fileno(), READY)
+    sys.stdin, sys.stdout, sys.stderr = stdin, stdout, io.StringIO()
+    values = []
+    try:
+        exec(compiled, namespace)
+        for probe in probes:
+            values.append(repr(eval(probe, namespace))[:MAX_VALUE_CHARS])
+        return {"output": stdout.getvalue(), "values": values, "error": None}
+    except BaseException as e:
+        return {"output": stdout.getvalue(), "values": values, "error": describe(e)}
+
+
+def main():
+    result_fd = sys.__stdout__.fileno()
+    try:
+        job = json.loads(sys.stdin.buffer.read())
+        result = run(job)
+    except SandboxUnavailable as e:
+        result = {"output": "", "error": f"Sandbox unavailable: {e}"}
+    except BaseException as e:
+        result = {"output": "", "error": describe(e)}
+    os.write(result_fd, b"\n" + json.dumps(result).encode() + b"\n")
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
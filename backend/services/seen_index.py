@@ -0,0 +1,106 @@
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from utils.metrics import metrics
+from utils.ttl_cache import TTLCache
+
+class SeenIndex:
+    # questions each active user has answered, as a sorted array of question ids
+    # per lesson so picking a page skips them without an anti-join in the db.
+    # a user is loaded once, kept up to date by mark() on every submission and
+    # dropped when idle for ttl_seconds or pushed out by max_users.
+    # load(user_id) -> rows with questionID and lessonID
+    def __init__(self, load, max_users=10000, ttl_seconds=3600):
+        self.load = load
+        self.cache = TTLCache(max_entries=max_users, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()
+        self._loading = {}   # user id -> marks made while their answers were loading
+
+    def lessons(self, user_id):
+        lessons = self.cache.get(user_id)
+        if lessons is not None:
+            return lessons
+
+        with self._lock:
+            self._loading.setdefault(user_id, [])
+        try:
+            rows = self.load(user_id)
+        except Exception:
+            with self._lock:
+                self._loading.pop(user_id, None)
+            raise
+
+        lessons = {}
+        for row in rows:
+            question_id = self.question_id(row.get("questionID"))
+            if row.get("lessonID") is not None and question_id is not None:
+                lessons.setdefault(row["lessonID"], set()).add(question_id)
+        with self._lock:
+            current = self.cache.get(user_id)
+            if current is not None:
+                # a parallel load finished first and took the pending marks
+                return current
+            # answers saved while the select was running may not be in it
+            for lesson_id, question_id in self._loading.pop(user_id, []):
+                lessons.setdefault(lesson_id, set()).add(question_id)
+            lessons = {lesson_id: array("q", sorted(ids)) for lesson_id, ids in lessons.items()}
+            self.cache.set(user_id, lessons, size=self.size(lessons))
+        self._report()
+        return lessons
+
+    def seen(self, user_id, lesson_id):
+        return self.lessons(user_id).get(lesson_id, ())
+
+    @staticmethod
+    def question_id(value):
+        # ids arrive as ints from the db and as strings from request bodies,
+        # the arrays only hold ints. None for anything that isnt an id
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def contains(seen, question_id):
+        question_id = SeenIndex.question_id(question_id)
+        if question_id is None:
+            return False
+        i = bisect_left(seen, question_id)
+        return i < len(seen) and seen[i] == question_id
+
+    def mark(self, user_id, answered):
+        # answered: (lessonID, questionID) pairs just saved for the user
+        answered = [
+            (lesson_id, self.question_id(question_id)) for lesson_id, question_id in answered
+            if lesson_id is not None and self.question_id(question_id) is not None
+        ]
+        if not answered:
+            return
+        with self._lock:
+            if user_id in self._loading:
+                self._loading[user_id].extend(answered)
+                return
+            lessons = self.cache.get(user_id)
+            if lessons is None:
+                # not loaded, the next load reads these from the db
+                return
+            for lesson_id, question_id in answered:
+                seen = lessons.setdefault(lesson_id, array("q"))
+                i = bisect_left(seen, question_id)
+                if i == len(seen) or seen[i] != question_id:
+                    seen.insert(i, question_id)
+            self.cache.set(user_id, lessons, size=self.size(lessons))
+        self._report()
+
+    @staticmethod
+    def size(lessons):
+        return sys.getsizeof(lessons) + sum(sys.getsizeof(seen) for seen in lessons.values())
+
+    def _report(self):
+        stats = self.cache.stats()
+        metrics.set_gauge("seen_questions.users", stats["entries"])
+        metrics.set_gauge("seen_questions.bytes", stats["bytes"])
+        metrics.set_gauge(
+            "seen_questions.bytes_per_user", round(stats["bytes"] / stats["entries"]) if stats["entries"] else 0
+        )
@@ -1,30 +1,44 @@
 import json
-from config.settings import supabase_client
+from config.settings import (
+    supabase_client, CONTENT_CACHE_MAX_ENTRIES, CONTENT_CACHE_MAX_BYTES, CONTENT_CACHE_TTL_SECONDS
+)
+from services.content_store import ContentStore
+from services.course_service import CourseService
 
 class SubunitService:
+    @staticmethod
+    def load_subunit(subunit_id):
+        # the subunit with its content parsed, None when it doesnt exist
+        response = (
+            supabase_client.from_("RefSubUnit")
+            .select("subUnitID, subUnitName, subUnitContent")
+            .eq("subUnitID", subunit_id)
+            .execute()
+        )
+
+        if not response.data:
+            return None
+
+        subunit = response.data[0]
+
+        # If content is a JSON string, try parsing it
+        if isinstance(subunit.get('subUnitContent'), str):
+            try:
+                subunit['subUnitContent'] = json.loads(subunit['subUnitContent'])
+            except json.JSONDecodeError:
+                pass
+
+        return subunit
+
     @staticmethod
     def get_subunit_content(subunit_id):
+        # a Snapshot of the subunit, parsed and serialized once and kept precompressed
         try:
-            response = (
-                supabase_client.from_("RefSubUnit")
-                .select("subUnitID, subUnitName, subUnitContent")
-                .eq("subUnitID", subunit_id)
-                .execute()
-            )
-            
-            if not response.data:
+            entry = content_store.get(subunit_id)
+            if entry is None:
                 return {"error": "Subunit not found"}, 404
-            
-            subunit = response.data[0]
-            
-            # If content is a JSON string, try parsing it
-            if isinstance(subunit.get('subUnitContent'), str):
-                try:
-                    subunit['subUnitContent'] = json.loads(subunit['subUnitContent'])
-                except json.JSONDecodeError:
-                    pass
-
-            return subunit, 200
+
+            return entry, 200
         
         except Exception as e:
             return {"error": str(e)}, 500
@@ -39,11 +53,21 @@ class SubunitService:
             response = supabase_client.from_("RefSubUnit").insert(new_subunit).execute()
             
             if response.data:
+                # the catalog lists every subunit
+                CourseService.invalidate_catalog()
+                for subunit in response.data:
+                    content_store.invalidate(subunit["subUnitID"])
                 return response.data, 201
             else:
                 return {"error": "Failed to add subunit"}, 500
         
         except Exception as e:
             return {"error": str(e)}, 500
-    
-   
\ No newline at end of file
+
+
+content_store = ContentStore(
+    SubunitService.load_subunit,
+    max_entries=CONTENT_CACHE_MAX_ENTRIES,
+    max_bytes=CONTENT_CACHE_MAX_BYTES,
+    ttl_seconds=CONTENT_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,53 @@
+import ast
+import hashlib
+import json
+import re
+from services.fill_in_grader import FillInGrader
+from utils.metrics import metrics
+from utils.ttl_cache import TTLCache
+
+metrics.define_ratio("verdict_cache.hit_ratio", "verdict_cache.hits", "verdict_cache.misses")
+
+class VerdictCache:
+    # remembers how an answer was graded, keyed on (questionID, normalized answer),
+    # so retries of the same or reformatted answer skip the sandbox and gemini.
+    # verdicts hold base points only, time and retry bonuses are applied per attempt
+    FIELDS = ("isCorrect", "feedback", "points")
+
+    def __init__(self, max_entries, ttl_seconds, max_bytes):
+        self.cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds, max_bytes=max_bytes)
+
+    @staticmethod
+    def normalize(question_type_id, user_answer):
+        if question_type_id == 2:
+            code = user_answer if isinstance(user_answer, str) else json.dumps(user_answer)
+            try:
+                # same tree means same program, whatever the spacing or comments
+                return ast.dump(ast.parse(code))
+            except (SyntaxError, ValueError):
+                return re.sub(r"\s+", " ", code).strip()
+        return json.dumps([FillInGrader.normalize(b) for b in FillInGrader.blanks(user_answer)])
+
+    @staticmethod
+    def key(question_id, question_type_id, user_answer):
+        digest = hashlib.sha256(VerdictCache.normalize(question_type_id, user_answer).encode()).hexdigest()
+        return (str(question_id), digest)
+
+    def get(self, question_id, question_type_id, user_answer):
+        entry = self.cache.get(self.key(question_id, question_type_id, user_answer))
+        if entry is None:
+            metrics.incr("verdict_cache.misses")
+            return None
+        verdict, cost_seconds = entry
+        metrics.incr("verdict_cache.hits")
+        metrics.incr("verdict_cache.saved_ms", round(cost_seconds * 1000))
+        return dict(verdict)
+
+    def put(self, question_id, question_type_id, user_answer, verdict, cost_seconds):
+        verdict = {field: verdict.get(field) for field in self.FIELDS}
+        size = len(json.dumps(verdict))
+        self.cache.set(self.key(question_id, question_type_id, user_answer), (verdict, cost_seconds), size=size)
+        stats = self.cache.stats()
+        metrics.set_gauge("verdict_cache.entries", stats["entries"])
+        metrics.set_gauge("verdict_cache.bytes", stats["bytes"])
+
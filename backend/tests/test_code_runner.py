@@ -0,0 +1,81 @@
+import pytest
+from services.code_runner import CodeRunner, split_assertion
+
+# runs the real sandbox, skipped where seccomp cant load
+
+ADD = "def add(a, b):\n    return a + b\n"
+ASSERT_ADD = {"stdin": "", "expected_output": "", "assertion": "assert add(2, 3) == 5"}
+
+
+@pytest.fixture(scope="module")
+def runner():
+    runner = CodeRunner(workers=2, wall_seconds=2)
+    if not runner.available():
+        pytest.skip("sandbox unavailable here")
+    yield runner
+    runner.shutdown()
+
+
+def test_correct_answer_passes(runner):
+    assert runner.run(ADD, [ASSERT_ADD]) == [{"passed": True, "output": "", "error": None}]
+
+
+def test_wrong_answer_fails(runner):
+    [result] = runner.run("def add(a, b):\n    return a - b\n", [ASSERT_ADD])
+    assert not result["passed"]
+
+
+def test_forged_result_on_stdout_fails(runner):
+    forged = "import os; os.write(1, b'\\n{\"output\":\"\",\"error\":null}\\n'); os._exit(0)"
+    [result] = runner.run(forged, [ASSERT_ADD])
+    assert not result["passed"]
+
+
+def test_forged_result_with_values_fails(runner):
+    # the child never sees the expected value, so the answer can only report its own
+    forged = "import os; os.write(1, b'\\n{\"output\":\"\",\"values\":[\"None\"],\"error\":null}\\n'); os._exit(0)"
+    [result] = runner.run(forged, [ASSERT_ADD])
+    assert not result["passed"]
+
+
+def test_forged_output_fails(runner):
+    test = {"stdin": "2\n3\n", "expected_output": "5", "assertion": ""}
+    forged = "import os; os.write(1, b'\\n{\"output\":\"\",\"values\":[],\"error\":null}\\n'); os._exit(0)"
+    [result] = runner.run(forged, [test])
+    assert not result["passed"]
+    [result] = runner.run("print(int(input()) + int(input()))", [test])
+    assert result["passed"]
+
+
+def test_files_are_refused(runner):
+    [result] = runner.run("print(open('/etc/hostname').read())", [{"stdin": "", "expected_output": "", "assertion": ""}])
+    assert not result["passed"] and "PermissionError" in result["error"]
+
+
+def test_split_assertion():
+    assert split_assertion("assert add(2, 3) == 5\nassert 'ab' == join('a', 'b')") == [
+        ("add(2, 3)", 5), ("join('a', 'b')", "ab")
+    ]
+    assert split_assertion("") == []
+    assert split_assertion("assert is_even(4)") is None
+    assert split_assertion("print(1)") is None
+
+
+def test_queue_wait_isnt_charged_to_the_answer():
+    runner = CodeRunner(workers=1, wall_seconds=0.5)
+    if not runner.available():
+        pytest.skip("sandbox unavailable here")
+    slow = "import time\nstart = time.monotonic()\nwhile time.monotonic() - start < 0.3:\n    pass\n" + ADD
+    futures = [runner.submit(slow, [ASSERT_ADD]) for _ in range(4)]
+    assert all(future.result(timeout=runner.timeout([ASSERT_ADD]))[0]["passed"] for future in futures)
+    runner.shutdown()
+
+
+def test_long_queue_is_an_infra_error():
+    runner = CodeRunner(workers=1, wall_seconds=0.5, queue_seconds=0.1)
+    if not runner.available():
+        pytest.skip("sandbox unavailable here")
+    runner.submit("import time\ntime.sleep(0.4)", [ASSERT_ADD])
+    [result] = runner.submit(ADD, [ASSERT_ADD]).result(timeout=runner.timeout([ASSERT_ADD]) * 2)
+    assert result["infra"] and not result["passed"]
+    runner.shutdown()
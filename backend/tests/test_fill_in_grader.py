@@ -0,0 +1,20 @@
+from services.fill_in_grader import FillInGrader
+
+
+def test_string_contents_keep_their_spacing():
+    assert FillInGrader.normalize('"Hello, World"') != FillInGrader.normalize('"Hello,World"')
+    assert FillInGrader.normalize('print( "Hello, World" )') != FillInGrader.normalize('print("Hello,World")')
+    assert FillInGrader.grade(['"Hello,World"'], ['"Hello, World"'])[0] == FillInGrader.AMBIGUOUS
+
+
+def test_code_spacing_is_ignored():
+    assert FillInGrader.normalize("print( x )") == FillInGrader.normalize("print(x)")
+    assert FillInGrader.normalize("print ('a  b')") == "print('a  b')"
+    assert FillInGrader.normalize("'hi'") == FillInGrader.normalize('"hi"')
+    assert FillInGrader.normalize("[1,2]") == FillInGrader.normalize("[1, 2]")
+
+
+def test_identifiers_are_case_sensitive():
+    assert FillInGrader.normalize("Print(x)") != FillInGrader.normalize("print(x)")
+    assert FillInGrader.grade(["Print"], ["print"])[0] == FillInGrader.AMBIGUOUS
+    assert FillInGrader.grade(["print"], ["print"])[0] == FillInGrader.CORRECT
@@ -0,0 +1,76 @@
+import gzip
+from flask import request
+from utils.metrics import metrics
+
+# brotli is optional, without it everything is served gzip or plain
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# in order of preference when the client accepts several equally
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+
+def compress(body, encoding, level=None):
+    # level None is the best ratio, worth it for bodies compressed once and served often
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=9 if level is None else level, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(body, quality=11 if level is None else level)
+    raise ValueError(f"Unsupported encoding {encoding}")
+
+
+def negotiate(accept_encodings, available=ENCODINGS):
+    # the encoding out of available the client ranks highest, None for identity
+    best, best_quality = None, 0
+    for encoding in available:
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+# on the fly compression trades ratio for speed, bodies compressed ahead of time use compress()'s defaults
+FAST_LEVELS = {"gzip": 6, "br": 4}
+COMPRESSIBLE = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def compress_response(response, accept_encodings, min_bytes):
+    # compresses a finished response in the encoding the client prefers. streams
+    # (server-sent events) are left alone so each event still goes out as it
+    # happens, and so are files, bodies under min_bytes and anything already encoded
+    if response.status_code < 200 or response.status_code in (204, 206, 304) \
+            or response.direct_passthrough or response.is_streamed \
+            or "Content-Encoding" in response.headers \
+            or response.mimetype == "text/event-stream" \
+            or not (response.mimetype or "").startswith(COMPRESSIBLE) \
+            or "no-transform" in response.headers.get("Cache-Control", ""):
+        return response
+
+    body = response.get_data()
+    if len(body) < min_bytes:
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate(accept_encodings)
+    if encoding is None:
+        return response
+    compressed = compress(body, encoding, FAST_LEVELS[encoding])
+    if len(compressed) >= len(body):
+        return response
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    # a strong etag promises these exact bytes, the compressed body is only equivalent
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    metrics.incr("compression.bytes_in", len(body))
+    metrics.incr("compression.bytes_out", len(compressed))
+    return response
+
+
+def install_compression(app, min_bytes=1024):
+    @app.after_request
+    def compress_after_request(response):
+        return compress_response(response, request.accept_encodings, min_bytes)
@@ -0,0 +1,28 @@
+from flask import Response, request
+from utils.compression import negotiate
+
+def conditional_response(body, etag, max_age, mimetype="application/json"):
+    # 304 without a body when the client already holds this etag, otherwise
+    # the body. either way with the etag and how long the client may reuse it,
+    # max_age 0 makes the client revalidate every time
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"public, max-age={max_age}" if max_age else "no-cache"
+    return response
+
+
+def negotiated_response(bodies, etag, max_age, mimetype="application/json"):
+    # bodies: {encoding: bytes} with None for the uncompressed one. serves the
+    # encoding the client prefers, each encoding has its own etag as a strong
+    # etag has to change with the bytes
+    encoding = negotiate(request.accept_encodings, [e for e in bodies if e is not None])
+    if encoding is not None:
+        etag = f"{etag}-{encoding}"
+    response = conditional_response(bodies[encoding], etag, max_age, mimetype)
+    if encoding is not None and response.status_code == 200:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
@@ -0,0 +1,63 @@
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+from werkzeug.http import http_date
+
+# orjson is optional, without it everything goes through the stdlib encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    # sorted keys and http dates for datetimes, so the bytes match what the
+    # default provider sent before. uuids and dataclasses orjson does itself
+    OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def default(o):
+    # what flask's default provider falls back on for values json cant encode
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj, indent=False):
+    # compact utf-8 json, used for response bodies serialized ahead of time
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+    if indent:
+        return json.dumps(obj, default=default, sort_keys=True, indent=2).encode("utf-8")
+    return json.dumps(obj, default=default, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+class OrjsonProvider(JSONProvider):
+    # app.json backed by orjson, jsonify and request.get_json go through it
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs):
+        return dumps_bytes(obj, indent=bool(kwargs.get("indent"))).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = dumps_bytes(obj, indent=self._app.debug)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+def make_json_provider(app, name):
+    # "orjson" when it is installed, anything else keeps flask's provider
+    if name == "orjson" and orjson is not None:
+        return OrjsonProvider(app)
+    return DefaultJSONProvider(app)
@@ -0,0 +1,69 @@
+import json
+
+class JSONArrayStream:
+    # incremental parser for a top level json array arriving in chunks, feed()
+    # returns the elements completed by that chunk so each one can be used
+    # before the rest of the array has been generated. elements are expected
+    # to be objects or arrays, which is all our response schemas produce
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._element_start = None
+        self.closed = False
+
+    def feed(self, text):
+        self._buffer += text
+        elements = []
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer) and not self.closed:
+            ch = buffer[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif not self._started:
+                if ch == "[":
+                    self._started = True
+                elif not ch.isspace():
+                    raise ValueError(f"Expected a json array, got {ch!r}")
+            elif ch in "{[":
+                if self._depth == 0:
+                    self._element_start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    # the closing bracket of the array itself
+                    self.closed = True
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        elements.append(json.loads(buffer[self._element_start:i + 1]))
+                        self._element_start = None
+            i += 1
+
+        # keep only what the next chunk may still need
+        cut = self._element_start if self._element_start is not None else i
+        self._buffer = buffer[cut:]
+        self._pos = i - cut
+        if self._element_start is not None:
+            self._element_start = 0
+        return elements
+
+
+def iter_json_array(chunks):
+    # yields each element of a streamed json array as soon as it is complete
+    parser = JSONArrayStream()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    if not parser.closed:
+        raise ValueError("Json array ended early")
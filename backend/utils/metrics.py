@@ -0,0 +1,44 @@
+import threading
+
+class Metrics:
+    # process-wide counters and gauges, served by GET /api/metrics
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._ratios = {}
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def get(self, name):
+        with self._lock:
+            return self._counters.get(name, self._gauges.get(name, 0))
+
+    def define_ratio(self, name, hits, misses):
+        # reported as hits / (hits + misses), hits and misses can be lists of counters
+        hits = [hits] if isinstance(hits, str) else list(hits)
+        misses = [misses] if isinstance(misses, str) else list(misses)
+        with self._lock:
+            self._ratios[name] = (hits, misses)
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            ratios = dict(self._ratios)
+
+        computed = {}
+        for name, (hits, misses) in ratios.items():
+            hit_total = sum(counters.get(h, 0) for h in hits)
+            total = hit_total + sum(counters.get(m, 0) for m in misses)
+            computed[name] = round(hit_total / total, 4) if total else None
+
+        return {"counters": counters, "gauges": gauges, "ratios": computed}
+
+metrics = Metrics()
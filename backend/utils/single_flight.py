@@ -0,0 +1,130 @@
+import threading
+import time
+from utils.metrics import metrics
+
+class SingleFlight:
+    # calls with the same key while one is running wait for it and share its
+    # result, and for fresh_seconds afterwards they get that result straight
+    # away. keep(result) decides if a result is good enough to hand out later,
+    # failures are only shared with the calls that were already waiting.
+    # counts go to <name>.leaders, <name>.collapsed and <name>.fresh_hits.
+    # an instance is used either with do() or with stream(), not both
+    def __init__(self, name, fresh_seconds=0, keep=None):
+        self.name = name
+        self.fresh_seconds = fresh_seconds
+        self.keep = keep or (lambda result: True)
+        self._lock = threading.Lock()
+        self._calls = {}
+        metrics.define_ratio(
+            f"{name}.collapse_ratio", [f"{name}.collapsed", f"{name}.fresh_hits"], f"{name}.leaders"
+        )
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call["done"].is_set() and time.monotonic() - call["finished"] > self.fresh_seconds:
+                call = None
+            leader = call is None
+            if leader:
+                call = {"done": threading.Event(), "result": None, "error": None, "finished": 0}
+                self._calls[key] = call
+
+        if not leader:
+            if call["done"].is_set():
+                metrics.incr(f"{self.name}.fresh_hits")
+            else:
+                metrics.incr(f"{self.name}.collapsed")
+                call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        metrics.incr(f"{self.name}.leaders")
+        try:
+            call["result"] = fn()
+        except Exception as e:
+            call["error"] = e
+        call["finished"] = time.monotonic()
+
+        with self._lock:
+            if call["error"] is not None or not self.keep(call["result"]) or self.fresh_seconds <= 0:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            # drop other keys whose window is over so the table doesnt grow forever
+            now = time.monotonic()
+            for stale in [k for k, c in self._calls.items()
+                          if c["done"].is_set() and now - c["finished"] > self.fresh_seconds]:
+                del self._calls[stale]
+        call["done"].set()
+
+        if call["error"] is not None:
+            raise call["error"]
+        return call["result"]
+
+    def stream(self, key, produce):
+        # do() for a generator: the first call runs produce() on its own thread
+        # and every call with the same key, while it runs or fresh_seconds after,
+        # gets all of its items from the start. the producer keeps going when a
+        # reader goes away. keep(last item) decides if later calls may replay it
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call["done"].is_set() and time.monotonic() - call["finished"] > self.fresh_seconds:
+                call = None
+            leader = call is None
+            if leader:
+                call = {
+                    "done": threading.Event(), "items": [], "error": None, "finished": 0,
+                    "changed": threading.Condition(threading.Lock()),
+                }
+                self._calls[key] = call
+
+        if leader:
+            metrics.incr(f"{self.name}.leaders")
+            threading.Thread(
+                target=self._produce, args=(key, call, produce), name=f"{self.name}-stream", daemon=True
+            ).start()
+        elif call["done"].is_set():
+            metrics.incr(f"{self.name}.fresh_hits")
+        else:
+            metrics.incr(f"{self.name}.collapsed")
+        return self._replay(call)
+
+    def _produce(self, key, call, produce):
+        try:
+            for item in produce():
+                with call["changed"]:
+                    call["items"].append(item)
+                    call["changed"].notify_all()
+        except Exception as e:
+            call["error"] = e
+        call["finished"] = time.monotonic()
+
+        with self._lock:
+            last = call["items"][-1] if call["items"] else None
+            if call["error"] is not None or not self.keep(last) or self.fresh_seconds <= 0:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            now = time.monotonic()
+            for stale in [k for k, c in self._calls.items()
+                          if c["done"].is_set() and now - c["finished"] > self.fresh_seconds]:
+                del self._calls[stale]
+        with call["changed"]:
+            call["done"].set()
+            call["changed"].notify_all()
+
+    @staticmethod
+    def _replay(call):
+        sent = 0
+        while True:
+            with call["changed"]:
+                while sent == len(call["items"]) and not call["done"].is_set():
+                    call["changed"].wait()
+                items = call["items"][sent:]
+                finished = call["done"].is_set()
+            for item in items:
+                yield item
+            sent += len(items)
+            if finished:
+                if call["error"] is not None:
+                    raise call["error"]
+                return
@@ -0,0 +1,65 @@
+import hashlib
+import threading
+import time
+from utils.compression import ENCODINGS, compress
+from utils.json_provider import dumps_bytes
+from utils.metrics import metrics
+
+class Snapshot:
+    # a response body serialized once, with a strong etag over its bytes, and
+    # precompressed in every encoding we serve. bodies maps the encoding (None
+    # for none) to the bytes, encodings that dont make the body smaller are left out
+    def __init__(self, version, data):
+        self.version = version
+        self.data = data
+        self.body = dumps_bytes(data)
+        # from the bytes alone so every worker process hands out the same etag
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.built = time.monotonic()
+        self.bodies = {None: self.body}
+        for encoding in ENCODINGS:
+            compressed = compress(self.body, encoding)
+            if len(compressed) < len(self.body):
+                self.bodies[encoding] = compressed
+        self.size = sum(len(body) for body in self.bodies.values())
+
+class SnapshotCache:
+    # read-through cache of one rarely changing payload. build() returns the data
+    # or None when there is nothing to serve, which isnt cached. writers call
+    # invalidate() so the next read rebuilds, ttl_seconds only covers changes
+    # made outside the app. counts go to <name>.hits, .misses and .invalidations
+    def __init__(self, name, build, ttl_seconds=300):
+        self.name = name
+        self.build = build
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._snapshot = None
+        # held while building so a burst of misses runs one build, and
+        # invalidate() waits for a build that may have read the old rows
+        self._lock = threading.Lock()
+        metrics.define_ratio(f"{name}.hit_ratio", f"{name}.hits", f"{name}.misses")
+
+    def get(self):
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - snapshot.built < self.ttl_seconds:
+            metrics.incr(f"{self.name}.hits")
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() - snapshot.built < self.ttl_seconds:
+                metrics.incr(f"{self.name}.hits")
+                return snapshot
+            metrics.incr(f"{self.name}.misses")
+            data = self.build()
+            if not data:
+                self._snapshot = None
+                return None
+            self._snapshot = Snapshot(self.version, data)
+            return self._snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._snapshot = None
+        metrics.incr(f"{self.name}.invalidations")
@@ -9,6 +9,7 @@ function QuestionRenderer({
   submissionResults,
   toggleHint,
   showHints,
+  hints,
   questionStartTimes,
   setQuestionStartTimes,
 }) {
@@ -165,7 +166,7 @@ function QuestionRenderer({
             <strong>Feedback:</strong> {result.feedback}
           </div>
         )}
-        {result.hint && result.retry >= 3 && (
+        {[2, 3].includes(question.questionTypeID) && result.retry >= 3 && (
           <div className="hint-container">
             <button onClick={() => toggleHint(questionId)} className="hint-button">
               <span className="hint-symbol"></span>
@@ -173,7 +174,7 @@ function QuestionRenderer({
             </button>
             {showHints[questionId] && (
               <div className="hint-text">
-                <strong>Hint:</strong> {result.hint}
+                <strong>Hint:</strong> {hints[questionId] || "Thinking of a hint..."}
               </div>
             )}
           </div>
@@ -1,4 +1,4 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { useNavigate, useParams } from "react-router-dom";
 import QuestionRender from "./QuestionRender";
 import "../css/questions.css";
@@ -9,15 +9,19 @@ function Questions() {
   const [questionStartTimes, setQuestionStartTimes] = useState({});
   const [submissionResults, setSubmissionResults] = useState({});
   const [showHints, setShowHints] = useState({});
+  const [hints, setHints] = useState({});
   const [loading, setLoading] = useState(true);
   const [totalPoints, setTotalPoints] = useState(0);
+  // last submitted answers with their Idempotency-Key, resent as-is on a retry or double click
+  const lastSubmission = useRef(null);
 
   const { subunitId } = useParams();
   const navigate = useNavigate();
   const token = localStorage.getItem("token");
   const API_URL = `http://127.0.0.1:8080/api/subunits/${subunitId}/questions`;
-  const SUBMIT_URL = `http://127.0.0.1:8080/api/submit-answers`;
-  const GENERATE_URL = `http://127.0.0.1:8080/api/subunits/${subunitId}/generate-questions`;
+  const SUBMIT_STREAM_URL = `http://127.0.0.1:8080/api/submit-answers/stream`;
+  const GENERATE_STREAM_URL = `http://127.0.0.1:8080/api/subunits/${subunitId}/generate-questions/stream`;
+  const hintUrl = (questionId) => `http://127.0.0.1:8080/api/answers/${questionId}/hint`;
 
   useEffect(() => {
     if (!token) {
@@ -49,6 +53,8 @@ function Questions() {
       setUserAnswers({});
       setSubmissionResults({});
       setShowHints({});
+      setHints({});
+      lastSubmission.current = null;
     }
   };
 
@@ -62,54 +68,143 @@ function Questions() {
     setUserAnswers(prev => ({ ...prev, [questionId]: current }));
   };
 
-  const toggleHint = (questionId) => {
-    setShowHints(prev => ({ ...prev, [questionId]: !prev[questionId] }));
+  const toggleHint = async (questionId) => {
+    const opening = !showHints[questionId];
+    setShowHints(prev => ({ ...prev, [questionId]: opening }));
+    // hints are generated on the first request for the latest answer
+    if (!opening || hints[questionId]) return;
+    try {
+      const res = await fetch(hintUrl(questionId), {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      const data = await res.json();
+      setHints(prev => ({ ...prev, [questionId]: res.ok ? data.hint : "Couldn't load a hint, try again." }));
+    } catch (err) {
+      setHints(prev => ({ ...prev, [questionId]: "Couldn't load a hint, try again." }));
+    }
+  };
+
+  // reads a server-sent events response, calling onEvent(event, payload) for each event
+  const readEvents = async (res, onEvent) => {
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    const handleEvent = (raw) => {
+      const event = raw.match(/^event: (.*)$/m)?.[1];
+      const data = raw.match(/^data: (.*)$/m)?.[1];
+      if (!event || !data) return;
+      onEvent(event, JSON.parse(data));
+    };
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const events = buffer.split("\n\n");
+      buffer = events.pop();
+      events.forEach(handleEvent);
+    }
   };
 
   const generateMoreQuestions = async () => {
-    await fetch(GENERATE_URL, {
-      method: "POST",
-      headers: {
-        Authorization: `Bearer ${token}`,
-        "Content-Type": "application/json"
+    // new questions replace the current ones one by one as they are generated
+    let received = 0;
+    try {
+      const res = await fetch(GENERATE_STREAM_URL, {
+        method: "POST",
+        headers: {
+          Authorization: `Bearer ${token}`,
+          "Content-Type": "application/json"
+        }
+      });
+      if (!res.ok || !res.body) {
+        fetchQuestions();
+        return;
       }
-    });
-    fetchQuestions();
+
+      await readEvents(res, (event, payload) => {
+        if (event === "question") {
+          if (received === 0) {
+            setQuestions([]);
+            setUserAnswers({});
+            setSubmissionResults({});
+            setShowHints({});
+            setHints({});
+            lastSubmission.current = null;
+          }
+          received += 1;
+          setQuestions(prev => [...prev, payload]);
+          setQuestionStartTimes(prev => ({ ...prev, [payload.questionID]: Math.floor(Date.now() / 1000) }));
+        } else if (event === "done" && payload.error) {
+          alert("Error generating questions");
+        }
+      });
+    } catch (err) {
+      alert("Error generating questions");
+    }
+    if (received === 0) fetchQuestions();
   };
 
   const submitAnswers = async () => {
     setLoading(true);
     const currentTime = Math.floor(Date.now() / 1000);
       try {
-      const answersData = questions.map(q => ({
-        questionId: q.questionID,
-        questionTypeId: q.questionTypeID,
-        userAnswer: userAnswers[q.questionID] || '',
-        startTime: questionStartTimes[q.questionID] || currentTime - 60,
-        endTime: currentTime
-      }));
-
-      const res = await fetch(SUBMIT_URL, {
+      const answersKey = JSON.stringify(questions.map(q => [q.questionID, userAnswers[q.questionID] || '']));
+      if (lastSubmission.current?.answersKey !== answersKey) {
+        const answersData = questions.map(q => ({
+          questionId: q.questionID,
+          questionTypeId: q.questionTypeID,
+          userAnswer: userAnswers[q.questionID] || '',
+          startTime: questionStartTimes[q.questionID] || currentTime - 60,
+          endTime: currentTime
+        }));
+        lastSubmission.current = {
+          answersKey,
+          key: crypto.randomUUID(),
+          body: JSON.stringify(answersData)
+        };
+      }
+
+      setSubmissionResults({});
+      const res = await fetch(SUBMIT_STREAM_URL, {
         method: "POST",
         headers: {
           Authorization: `Bearer ${token}`,
-          "Content-Type": "application/json"
+          "Content-Type": "application/json",
+          "Idempotency-Key": lastSubmission.current.key
         },
-        body: JSON.stringify(answersData)
+        body: lastSubmission.current.body
       });
 
-      const result = await res.json();
-      if (result.results) {
-        const resultsMap = result.results.reduce((acc, r) => {
-          acc[r.questionId] = r;
-          return acc;
-        }, {});
-        setSubmissionResults(resultsMap);
-        const totalPoints = result.results.reduce((sum, r) => sum + (r.points || 0), 0);
-        setTotalPoints(totalPoints);
-      } else {
+      if (!res.ok || !res.body) {
         alert("Error submitting answers");
+        return;
       }
+
+      // server-sent events: one "result" per graded answer, then "done"
+      let earned = 0;
+      await readEvents(res, (event, payload) => {
+        if (event === "result") {
+          earned += payload.points || 0;
+          setSubmissionResults(prev => ({ ...prev, [payload.questionId]: payload }));
+          setHints(prev => ({ ...prev, [payload.questionId]: undefined }));
+          setTotalPoints(earned);
+        } else if (event === "done") {
+          if (payload.error) alert("Error submitting answers");
+          // the saved retry counts and points replace the estimates from the result events
+          const { points = {}, retries = {} } = payload;
+          setSubmissionResults(prev => Object.fromEntries(Object.entries(prev).map(([id, result]) => [
+            id,
+            {
+              ...result,
+              ...(id in points && { points: points[id] }),
+              ...(id in retries && { retry: retries[id] })
+            }
+          ])));
+          setTotalPoints(payload.totalPoints ?? earned);
+        }
+      });
     } catch (err) {
       alert("Submission failed");
     } finally {
@@ -132,6 +227,7 @@ function Questions() {
             submissionResults={submissionResults}
             toggleHint={toggleHint}
             showHints={showHints}
+            hints={hints}
             questionStartTimes={questionStartTimes}
             setQuestionStartTimes={setQuestionStartTimes}
           />